@@ -403,15 +403,30 @@ merge_gitignore() {
         ".claude/.framework-config"
         ".claude/.framework-log"
         ".claude/.last_session"
+        ".claude/*.lock"
+        ".claude/.*.tmp"
+        ".claude/logs/"
+        ".claude/cache/"
         ""
         "# Dialog exports (may contain sensitive information)"
         "dialog/*.md"
         "!dialog/README.md"
     )
 
-    # Check if patterns already exist
+    # Earlier installs already have the block; add only the patterns it lacks
     if [[ -f ".gitignore" ]] && grep -q "Claude Code Framework" .gitignore 2>/dev/null; then
-        log_warning ".gitignore already has framework patterns"
+        local added=0
+        for pattern in "${patterns[@]}"; do
+            if [[ -n "$pattern" && "$pattern" != \#* ]] && ! grep -qxF -- "$pattern" .gitignore; then
+                echo "$pattern" >> .gitignore
+                added=$((added + 1))
+            fi
+        done
+        if [[ $added -gt 0 ]]; then
+            log_success "Added $added framework pattern(s) to .gitignore"
+        else
+            log_warning ".gitignore already has framework patterns"
+        fi
         return
     fi
 
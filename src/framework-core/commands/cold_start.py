@@ -1,72 +1,166 @@
 """
 Cold Start Protocol Command
 
-Runs 10 parallel initialization tasks for session startup.
+Runs 10 initialization tasks for session startup as a dependency graph.
+Almost all tasks are independent; session_activate waits for
+crash_detection so it cannot overwrite the state being inspected.
 """
 
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 import sys
 import os
+import time
 
 # Add parent to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.parallel import run_tasks_parallel, TaskDefinition
+from utils.parallel import iter_task_graph, TaskDefinition
 from utils.result import ProtocolResult, TaskResult, ProtocolStatus, TaskStatus
-from utils.logger import log_protocol, log_task
-from tasks.config import read_framework_config, write_framework_config, is_silent_mode, get_active_preset
+from utils.context import RunContext
+from utils.resources import NETWORK, DISK, GIT_WRITE
+from utils.scheduler import SchedulePlan, load_task_history, plan_schedule
+from utils.regression import detect_regressions
+from utils.hooks import protocol_scope, notify_protocol_end
+from tasks.config import read_framework_config, update_framework_config, is_silent_mode, get_active_preset
 from tasks.git import is_git_repo, get_status
 from tasks.hooks import verify_all_hooks, install_all_hooks
 from tasks.security import quick_scan
 from tasks.session import is_crash_detected, get_crash_info, mark_session_active, read_last_session
-from tasks.version import get_current_version, is_update_available, get_update_info
+from tasks.version import get_current_version, get_latest_version, is_update_available
+
+
+# Version check is network-bound and non-critical; never let it set cold start latency
+VERSION_CHECK_TIMEOUT_S = 2.0
+
+MAX_WORKERS = 10
 
 
 def run_cold_start(
     skip_update: bool = False,
     skip_security: bool = False,
-    silent: bool = False
+    silent: bool = False,
+    deadline: Optional[float] = None,
+    on_result: Optional[Callable[[TaskResult], None]] = None
 ) -> ProtocolResult:
     """
     Run the cold start protocol with 10 parallel tasks.
 
+    All tasks and the final summary share one RunContext, so repeated
+    git and config lookups are computed once per run.
+
     Args:
         skip_update: Skip version update check
         skip_security: Skip security scan
         silent: Silent mode (minimal output)
+        deadline: Seconds the protocol may take; slower tasks come back
+            as TIMEOUT (default: no deadline)
+        on_result: Called with each TaskResult as soon as the task
+            finishes (e.g. to stream crash detection early)
 
     Returns:
-        ProtocolResult with all task results
+        ProtocolResult with all task results; perf_regressions lists
+        the tasks that ran markedly slower than their rolling baseline
     """
-    # Check if silent mode is configured
-    if not silent:
-        silent = is_silent_mode()
+    started = time.perf_counter()
+    with RunContext().activate(), protocol_scope("cold-start"):
+        # Loaded before the run, so the baseline excludes this run's own durations
+        history = load_task_history("cold-start")
+        result = _run_cold_start(skip_update, skip_security, silent, deadline, on_result, history)
+    result.perf_regressions = detect_regressions(result.tasks, history)
+    result.set_wall_clock((time.perf_counter() - started) * 1000)
+    notify_protocol_end(result)
+    return result
+
+
+def build_cold_start_tasks(skip_update: bool = False, skip_security: bool = False) -> List[TaskDefinition]:
+    """
+    Build the cold start task graph.
+
+    Args:
+        skip_update: Leave out the version check
+        skip_security: Leave out the security cleanup
 
-    # Define all cold start tasks
+    Returns:
+        List of TaskDefinition objects for run_task_graph
+    """
     task_definitions = [
         TaskDefinition("migration_cleanup", task_migration_cleanup),
         TaskDefinition("crash_detection", task_crash_detection),
         TaskDefinition("config_init", task_config_init),
         TaskDefinition("context_load", task_context_load),
-        TaskDefinition("git_hooks_install", task_git_hooks_install),
+        TaskDefinition("git_hooks_install", task_git_hooks_install, resources=(GIT_WRITE,)),
         TaskDefinition("commit_policy_verify", task_commit_policy_verify),
     ]
 
     # Conditionally add optional tasks
     if not skip_update:
-        task_definitions.append(TaskDefinition("version_check", task_version_check))
+        task_definitions.append(
+            TaskDefinition(
+                "version_check",
+                task_version_check,
+                timeout_s=VERSION_CHECK_TIMEOUT_S,
+                resources=(NETWORK,)
+            )
+        )
 
     if not skip_security:
-        task_definitions.append(TaskDefinition("security_cleanup", task_security_cleanup))
+        task_definitions.append(TaskDefinition("security_cleanup", task_security_cleanup, resources=(DISK,)))
 
     # Add dialog export check
     task_definitions.append(TaskDefinition("dialog_export", task_dialog_export))
 
-    # Add session activation (always last conceptually, but runs in parallel)
-    task_definitions.append(TaskDefinition("session_activate", task_session_activate))
+    # Session activation overwrites .last_session, so it must not run
+    # before crash detection has read the previous state
+    task_definitions.append(
+        TaskDefinition("session_activate", task_session_activate, depends_on=("crash_detection",))
+    )
+
+    return task_definitions
 
-    # Run all tasks in parallel
-    results = run_tasks_parallel(task_definitions, max_workers=10)
+
+def plan_cold_start(skip_update: bool = False, skip_security: bool = False) -> SchedulePlan:
+    """
+    Predict the cold start schedule from past task durations without running it.
+
+    Args:
+        skip_update: Leave out the version check
+        skip_security: Leave out the security cleanup
+
+    Returns:
+        SchedulePlan (see SchedulePlan.to_dict for the --plan output)
+    """
+    return plan_schedule(
+        build_cold_start_tasks(skip_update, skip_security),
+        load_task_history("cold-start"),
+        max_workers=MAX_WORKERS
+    )
+
+
+def _run_cold_start(
+    skip_update: bool = False,
+    skip_security: bool = False,
+    silent: bool = False,
+    deadline: Optional[float] = None,
+    on_result: Optional[Callable[[TaskResult], None]] = None,
+    history: Optional[Dict[str, List[float]]] = None
+) -> ProtocolResult:
+    """Body of run_cold_start, executed with the run's RunContext active."""
+    # Check if silent mode is configured
+    if not silent:
+        silent = is_silent_mode()
+
+    # Define all cold start tasks and plan them from past durations
+    task_definitions = build_cold_start_tasks(skip_update, skip_security)
+    if history is None:
+        history = load_task_history("cold-start")
+    plan = plan_schedule(task_definitions, history, max_workers=MAX_WORKERS)
+
+    # Run all tasks as soon as their dependencies allow
+    results = []
+    for result in iter_task_graph(task_definitions, max_workers=MAX_WORKERS, deadline=deadline, plan=plan):
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
 
     # Analyze results
     errors = [r for r in results if r.status == TaskStatus.ERROR]
@@ -110,6 +204,10 @@ Please choose an option.
     preset = get_active_preset()
     summary_parts.append(f"Preset: {preset}")
 
+    timed_out = [r.name for r in results if r.status == TaskStatus.TIMEOUT]
+    if timed_out:
+        summary_parts.append(f"Timed out: {', '.join(timed_out)}")
+
     return ProtocolResult.success(
         "cold-start",
         results,
@@ -180,7 +278,11 @@ def task_version_check() -> TaskResult:
     """Check for framework updates."""
     try:
         current = get_current_version()
-        update_available = is_update_available()
+        # Fetch once. urlopen's timeout applies to each socket operation, so
+        # half the task budget lets a slow connect plus read finish in time;
+        # a fetch that still overruns is abandoned by the runner at timeout_s
+        latest = get_latest_version(timeout=VERSION_CHECK_TIMEOUT_S / 2)
+        update_available = is_update_available(latest) if latest else False
 
         data = {
             "current_version": current,
@@ -188,9 +290,7 @@ def task_version_check() -> TaskResult:
         }
 
         if update_available:
-            update_info = get_update_info()
-            if update_info:
-                data["latest_version"] = update_info.get("latest_version")
+            data["latest_version"] = latest
 
         return TaskResult.create_success("version_check", data=data)
 
@@ -300,10 +400,11 @@ def task_config_init() -> TaskResult:
         config = read_framework_config()
 
         if not config.get("first_run_completed"):
-            # First run - initialize
-            config["first_run_completed"] = True
-            config["framework_version"] = get_current_version()
-            write_framework_config(config)
+            # First run - initialize (locked, as other tasks read the config meanwhile)
+            config = update_framework_config({
+                "first_run_completed": True,
+                "framework_version": get_current_version(),
+            }) or config
 
             return TaskResult.create_success(
                 "config_init",
@@ -1,19 +1,24 @@
 """
 Completion Protocol Command
 
-Runs parallel and sequential tasks for session finalization.
+Runs session finalization tasks as a dependency graph.
 """
 
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 import sys
 import os
+import time
 
 # Add parent to path for imports
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.parallel import run_tasks_parallel, run_tasks_sequential, TaskDefinition
+from utils.parallel import iter_task_graph, TaskDefinition
 from utils.result import ProtocolResult, TaskResult, ProtocolStatus, TaskStatus
-from utils.logger import log_protocol
+from utils.context import RunContext
+from utils.resources import DISK, GIT_READ, GIT_WRITE
+from utils.scheduler import SchedulePlan, load_task_history, plan_schedule
+from utils.regression import detect_regressions
+from utils.hooks import protocol_scope, notify_protocol_end
 from tasks.config import is_silent_mode, get_active_preset, get_setting
 from tasks.git import get_status, get_diff_stat, commit, has_uncommitted_changes
 from tasks.security import quick_scan, cleanup_dialogs
@@ -24,84 +29,181 @@ def run_completion(
     skip_review: bool = False,
     no_commit: bool = False,
     commit_message: Optional[str] = None,
-    silent: bool = False
+    silent: bool = False,
+    deadline: Optional[float] = None,
+    on_result: Optional[Callable[[TaskResult], None]] = None
 ) -> ProtocolResult:
     """
     Run the completion protocol.
 
-    Phase 1: 3 parallel tasks (build check, dialog export, security scan)
-    Phase 2: Sequential tasks (update metafiles, codex-review, commit, cleanup)
+    Tasks run as a dependency graph:
+    - build_check, dialog_export and security_scan start immediately
+    - update_metafiles waits for security_scan (phase 2, as before)
+    - codex_review waits for security_scan and update_metafiles, so it
+      sees the metafile updates
+    - commit waits for security_scan, update_metafiles and codex_review
+    - session_cleanup waits for security_scan and update_metafiles only
+
+    A security scan with CRITICAL findings fails and cancels the run:
+    update_metafiles, codex_review, commit and session_cleanup are
+    skipped and running siblings (and their git processes) are abandoned.
+
+    All tasks and the final summary share one RunContext, so repeated
+    git and config lookups are computed once per run.
 
     Args:
         skip_review: Skip code review (NOT RECOMMENDED)
         no_commit: Skip automatic commit
         commit_message: Custom commit message
         silent: Silent mode
+        deadline: Seconds the protocol may take; slower tasks come back
+            as TIMEOUT and their dependents are skipped (default: no deadline)
+        on_result: Called with each TaskResult as soon as the task
+            finishes (e.g. to stream security findings early)
 
     Returns:
-        ProtocolResult with all task results
+        ProtocolResult with all task results; perf_regressions lists
+        the tasks that ran markedly slower than their rolling baseline
     """
-    # Check if silent mode is configured
-    if not silent:
-        silent = is_silent_mode()
+    started = time.perf_counter()
+    with RunContext().activate(), protocol_scope("completion"):
+        # Loaded before the run, so the baseline excludes this run's own durations
+        history = load_task_history("completion")
+        result = _run_completion(skip_review, no_commit, commit_message, silent, deadline, on_result, history)
+    result.perf_regressions = detect_regressions(result.tasks, history)
+    result.set_wall_clock((time.perf_counter() - started) * 1000)
+    notify_protocol_end(result)
+    return result
+
+
+def build_completion_tasks(
+    skip_review: bool = False,
+    no_commit: bool = False,
+    commit_message: Optional[str] = None
+) -> List[TaskDefinition]:
+    """
+    Build the completion task graph.
 
-    all_results = []
+    Args:
+        skip_review: Leave out the code review
+        no_commit: Leave out the commit
+        commit_message: Custom commit message
 
-    # Phase 1: Parallel tasks
-    parallel_tasks = [
+    Returns:
+        List of TaskDefinition objects for run_task_graph
+    """
+    task_definitions = [
         TaskDefinition("build_check", task_build_check),
         TaskDefinition("dialog_export", task_dialog_export),
-        TaskDefinition("security_scan", task_security_scan),
+        # Critical: CRITICAL findings cancel the run instead of waiting for siblings
+        TaskDefinition("security_scan", task_security_scan, critical=True, resources=(DISK,)),
+        # Phase 2 only runs once the scan found nothing CRITICAL
+        TaskDefinition("update_metafiles", task_update_metafiles, depends_on=("security_scan",)),
     ]
 
-    parallel_results = run_tasks_parallel(parallel_tasks, max_workers=3)
-    all_results.extend(parallel_results)
-
-    # Check for critical errors in parallel phase
-    parallel_errors = [r for r in parallel_results if r.status == TaskStatus.ERROR]
-
-    # Check security scan results
-    security_result = next((r for r in parallel_results if r.name == "security_scan"), None)
-    if security_result and security_result.data:
-        critical_count = security_result.data.get("critical", 0)
-        if critical_count > 0:
-            return ProtocolResult.error(
-                "completion",
-                all_results,
-                summary=f"CRITICAL security issues found: {critical_count}. Fix before committing."
-            )
-
-    # Phase 2: Sequential tasks
-    sequential_tasks = [
-        TaskDefinition("update_metafiles", task_update_metafiles),
-    ]
+    commit_deps = ["security_scan", "update_metafiles"]
 
     # Add codex review unless skipped (NOT RECOMMENDED)
     if not skip_review:
-        sequential_tasks.append(
-            TaskDefinition("codex_review", task_codex_review)
-        )
+        task_definitions.append(TaskDefinition(
+            "codex_review",
+            task_codex_review,
+            depends_on=("security_scan", "update_metafiles"),
+            resources=(GIT_READ,)
+        ))
+        # Review must inspect the changes before commit stages them
+        commit_deps.append("codex_review")
 
     # Add commit unless skipped
     if not no_commit:
-        sequential_tasks.append(
+        task_definitions.append(
             TaskDefinition(
                 "commit",
                 task_commit,
-                kwargs={"message": commit_message}
+                kwargs={"message": commit_message},
+                depends_on=tuple(commit_deps),
+                resources=(GIT_WRITE,)
             )
         )
 
     # Always add session cleanup
-    sequential_tasks.append(
-        TaskDefinition("session_cleanup", task_session_cleanup)
+    task_definitions.append(
+        TaskDefinition(
+            "session_cleanup",
+            task_session_cleanup,
+            depends_on=("security_scan", "update_metafiles")
+        )
     )
 
-    sequential_results = run_tasks_sequential(sequential_tasks)
-    all_results.extend(sequential_results)
+    return task_definitions
+
+
+def plan_completion(skip_review: bool = False, no_commit: bool = False) -> SchedulePlan:
+    """
+    Predict the completion schedule from past task durations without running it.
 
-    # Check for errors
-    all_errors = [r for r in all_results if r.status == TaskStatus.ERROR]
+    Args:
+        skip_review: Leave out the code review
+        no_commit: Leave out the commit
+
+    Returns:
+        SchedulePlan (see SchedulePlan.to_dict for the --plan output)
+    """
+    task_definitions = build_completion_tasks(skip_review, no_commit)
+    return plan_schedule(
+        task_definitions,
+        load_task_history("completion"),
+        max_workers=len(task_definitions)
+    )
+
+
+def _run_completion(
+    skip_review: bool = False,
+    no_commit: bool = False,
+    commit_message: Optional[str] = None,
+    silent: bool = False,
+    deadline: Optional[float] = None,
+    on_result: Optional[Callable[[TaskResult], None]] = None,
+    history: Optional[Dict[str, List[float]]] = None
+) -> ProtocolResult:
+    """Body of run_completion, executed with the run's RunContext active."""
+    # Check if silent mode is configured
+    if not silent:
+        silent = is_silent_mode()
+
+    task_definitions = build_completion_tasks(skip_review, no_commit, commit_message)
+    if history is None:
+        history = load_task_history("completion")
+    plan = plan_schedule(
+        task_definitions,
+        history,
+        max_workers=len(task_definitions)
+    )
+
+    all_results = []
+    for result in iter_task_graph(
+        task_definitions,
+        max_workers=len(task_definitions),
+        deadline=deadline,
+        plan=plan
+    ):
+        all_results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    # Check security scan results
+    security_result = next((r for r in all_results if r.name == "security_scan"), None)
+    if security_result and security_result.data:
+        critical_count = security_result.data.get("critical", 0)
+        if critical_count > 0:
+            return ProtocolResult.error(
+                "completion",
+                all_results,
+                summary=f"CRITICAL security issues found: {critical_count}. Fix before committing."
+            )
+
+    # Check for errors (a timed-out completion task is a failure)
+    all_errors = [r for r in all_results if r.status in (TaskStatus.ERROR, TaskStatus.TIMEOUT)]
 
     # Get commit result for summary
     commit_result = next((r for r in all_results if r.name == "commit"), None)
@@ -207,16 +309,21 @@ def task_security_scan() -> TaskResult:
     try:
         findings = quick_scan()
 
-        return TaskResult.create_success(
-            "security_scan",
-            data={
-                "total": findings["total_findings"],
-                "critical": len(findings.get("CRITICAL", [])),
-                "high": len(findings.get("HIGH", [])),
-                "medium": len(findings.get("MEDIUM", [])),
-                "scanned_files": findings["scanned_files"]
-            }
-        )
+        data = {
+            "total": findings["total_findings"],
+            "critical": len(findings.get("CRITICAL", [])),
+            "high": len(findings.get("HIGH", [])),
+            "medium": len(findings.get("MEDIUM", [])),
+            "scanned_files": findings["scanned_files"]
+        }
+
+        if data["critical"] > 0:
+            # Fail the task so the graph skips phase 2, commit and session cleanup
+            result = TaskResult.create_error("security_scan", f"{data['critical']} CRITICAL finding(s)")
+            result.data = data
+            return result
+
+        return TaskResult.create_success("security_scan", data=data)
 
     except Exception as e:
         return TaskResult.create_error("security_scan", str(e))
@@ -310,12 +417,17 @@ def task_commit(message: Optional[str] = None) -> TaskResult:
 
         status = get_status()
 
-        # Stage all changes if nothing staged
+        # Stage all changes if nothing staged, except the framework's own logs,
+        # caches and state files (older installs do not gitignore them)
         if not status["staged"]:
-            from tasks.git import stage_files
-            files_to_stage = status["unstaged"] + status["untracked"]
-            if files_to_stage:
-                stage_files(files_to_stage)
+            from tasks.git import FRAMEWORK_STATE_PATHS, is_framework_state, stage_files
+            files_to_stage = [
+                f for f in status["unstaged"] + status["untracked"]
+                if not is_framework_state(f)
+            ]
+            if not files_to_stage:
+                return TaskResult.create_skipped("commit", "No changes to commit")
+            stage_files(files_to_stage, exclude=FRAMEWORK_STATE_PATHS)
 
         # Generate commit message if not provided
         if not message:
@@ -8,26 +8,35 @@ Requires Python 3.8+
 Usage:
     python main.py cold-start [--silent] [--json]
     python main.py completion [--silent] [--json]
+    python main.py --trace trace.json cold-start
     python main.py --version
 
 Exit Codes:
     0 = success
     1 = error
     2 = user_input_required
+    3 = performance regression (with --fail-on-regression)
 """
 
 import argparse
 import sys
 import json
+from typing import Optional
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from commands.cold_start import run_cold_start
-from commands.completion import run_completion
+from commands.cold_start import run_cold_start, plan_cold_start
+from commands.completion import run_completion, plan_completion
 from utils.result import ProtocolStatus
-from utils.logger import setup_logging
+from utils.logger import setup_logging, convert_legacy_logs, query_logs, rebuild_log_index, task_stats
+from utils.stats import format_prometheus, summarize_stats, write_textfile
+from utils.trace import Tracer, span
+from utils.encoding import dumps, write_json
+from utils.payload import DEFAULT_MAX_ITEMS, PayloadSpiller, load_spilled, new_run_id
+from utils.hooks import JsonLogObserver, TraceObserver, register_observer
+from utils.usage import enable_usage_capture
 
 __version__ = "2.0.0"
 
@@ -65,6 +74,27 @@ def create_parser() -> argparse.ArgumentParser:
         help="Pretty-print JSON output"
     )
 
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream NDJSON: one line per task as it finishes, then a protocol summary line"
+    )
+
+    parser.add_argument(
+        "--resources",
+        action="store_true",
+        help="Record per-task CPU time, peak RSS growth, subprocess spawns and bytes read/written"
+    )
+
+    parser.add_argument(
+        "--max-items",
+        type=int,
+        default=DEFAULT_MAX_ITEMS,
+        metavar="N",
+        help=f"Summarize lists longer than N in task data and store the full data under "
+             f".claude/cache/results (default: {DEFAULT_MAX_ITEMS}, 0 = no limit)"
+    )
+
     parser.add_argument(
         "--log-dir",
         type=str,
@@ -72,6 +102,13 @@ def create_parser() -> argparse.ArgumentParser:
         help="Log directory (default: .claude/logs)"
     )
 
+    parser.add_argument(
+        "--trace",
+        type=str,
+        metavar="FILE",
+        help="Write a Chrome trace-event timeline of the run to FILE (open in Perfetto)"
+    )
+
     subparsers = parser.add_subparsers(
         dest="command",
         title="commands",
@@ -93,6 +130,22 @@ def create_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Skip security scan (not recommended)"
     )
+    cold_start_parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Protocol deadline in seconds; slower tasks are reported as timeout"
+    )
+    cold_start_parser.add_argument(
+        "--fail-on-regression",
+        type=float,
+        metavar="RATIO",
+        help="Exit with code 3 when a task regressed to at least RATIO times its baseline duration"
+    )
+    cold_start_parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the schedule predicted from past runs instead of running"
+    )
 
     # Completion command
     completion_parser = subparsers.add_parser(
@@ -114,6 +167,22 @@ def create_parser() -> argparse.ArgumentParser:
         type=str,
         help="Custom commit message"
     )
+    completion_parser.add_argument(
+        "--deadline",
+        type=float,
+        help="Protocol deadline in seconds; slower tasks are reported as timeout"
+    )
+    completion_parser.add_argument(
+        "--fail-on-regression",
+        type=float,
+        metavar="RATIO",
+        help="Exit with code 3 when a task regressed to at least RATIO times its baseline duration"
+    )
+    completion_parser.add_argument(
+        "--plan",
+        action="store_true",
+        help="Print the schedule predicted from past runs instead of running"
+    )
 
     # Status command
     status_parser = subparsers.add_parser(
@@ -121,10 +190,99 @@ def create_parser() -> argparse.ArgumentParser:
         help="Show current framework status"
     )
 
+    # Result command
+    result_parser = subparsers.add_parser(
+        "result",
+        help="Inspect stored task payloads"
+    )
+    result_subparsers = result_parser.add_subparsers(dest="result_command")
+    result_show_parser = result_subparsers.add_parser(
+        "show",
+        help="Print the full data of a task whose output was summarized"
+    )
+    result_show_parser.add_argument("run_id", help="run_id from the protocol output")
+    result_show_parser.add_argument("task", help="Task name")
+
+    # Stats command
+    stats_parser = subparsers.add_parser(
+        "stats",
+        help="Show task latency percentiles, counts and error rates from the logs"
+    )
+    stats_parser.add_argument("--protocol", help="Only this protocol")
+    stats_parser.add_argument("--task", help="Only this task")
+    stats_parser.add_argument("--days", type=int, default=7, help="Days to cover, including today (default: 7)")
+    stats_parser.add_argument(
+        "--format",
+        choices=["json", "prometheus"],
+        default="json",
+        help="Output format (default: json)"
+    )
+    stats_parser.add_argument(
+        "--textfile",
+        metavar="FILE",
+        help="Also write Prometheus metrics atomically to FILE (node_exporter textfile collector)"
+    )
+
+    # Logs command
+    logs_parser = subparsers.add_parser(
+        "logs",
+        help="Maintain the protocol logs"
+    )
+    logs_subparsers = logs_parser.add_subparsers(dest="logs_command")
+    logs_subparsers.add_parser(
+        "convert",
+        help="Rewrite legacy JSON-array log files as JSONL"
+    )
+    logs_query_parser = logs_subparsers.add_parser(
+        "query",
+        help="Print matching log entries as NDJSON, oldest first"
+    )
+    logs_query_parser.add_argument("--protocol", help="Protocol (cold-start, completion, ...)")
+    logs_query_parser.add_argument("--task", help="Task name")
+    logs_query_parser.add_argument("--status", help="Status (success, error, skipped, timeout)")
+    logs_query_parser.add_argument("--type", dest="entry_type", help="Entry type (task, protocol_summary, error, dropped)")
+    logs_query_parser.add_argument("--since", help="Earliest timestamp, e.g. 2026-01-01 or 2026-01-01T09:00")
+    logs_query_parser.add_argument("--until", help="Timestamp the entries must precede")
+    logs_query_parser.add_argument("--min-duration", type=float, metavar="MS", help="Only entries that took at least MS milliseconds")
+    logs_query_parser.add_argument("--limit", type=int, help="Maximum number of entries")
+    logs_subparsers.add_parser(
+        "reindex",
+        help="Rebuild the log index from the log files"
+    )
+
     return parser
 
 
-def output_result(result, pretty: bool = False, silent: bool = False) -> int:
+def protocol_exit_code(result, fail_on_regression: Optional[float] = None) -> int:
+    """
+    Exit code of a protocol run.
+
+    Args:
+        result: ProtocolResult object
+        fail_on_regression: Turn a successful run into exit code 3 when a
+            task regressed to at least this ratio of its baseline
+
+    Returns:
+        Exit code (0=success, 1=error, 2=user_input_required, 3=regression)
+    """
+    if result.status == ProtocolStatus.USER_INPUT_REQUIRED:
+        return 2
+    if result.status != ProtocolStatus.SUCCESS:
+        return 1
+    if fail_on_regression is not None and any(
+        r["ratio"] is None or r["ratio"] >= fail_on_regression for r in result.perf_regressions
+    ):
+        return 3
+    return 0
+
+
+def output_result(
+    result,
+    pretty: bool = False,
+    silent: bool = False,
+    spiller: Optional[PayloadSpiller] = None,
+    fail_on_regression: Optional[float] = None
+) -> int:
     """
     Output the result and return appropriate exit code.
 
@@ -132,26 +290,77 @@ def output_result(result, pretty: bool = False, silent: bool = False) -> int:
         result: ProtocolResult object
         pretty: Pretty-print JSON
         silent: Suppress output
+        spiller: Bounds task payloads before output (None = print in full)
+        fail_on_regression: See protocol_exit_code
 
     Returns:
-        Exit code (0=success, 1=error, 2=user_input_required)
+        Exit code (0=success, 1=error, 2=user_input_required, 3=regression)
     """
-    # Determine exit code
-    if result.status == ProtocolStatus.SUCCESS:
-        exit_code = 0
-    elif result.status == ProtocolStatus.USER_INPUT_REQUIRED:
-        exit_code = 2
-    else:
-        exit_code = 1
-
-    # Output result
-    if not silent or result.status != ProtocolStatus.SUCCESS:
-        json_output = result.to_json() if pretty else json.dumps(result.to_dict())
-        print(json_output)
+    exit_code = protocol_exit_code(result, fail_on_regression)
+
+    # Output result (compact output is streamed without building the dict tree)
+    if not silent or exit_code != 0:
+        if spiller is not None:
+            result = spiller.bound_protocol(result)
+        if pretty:
+            print(result.to_json())
+        else:
+            write_json(result)
 
     return exit_code
 
 
+def stream_task_result(task_result, spiller: Optional[PayloadSpiller] = None) -> None:
+    """Print one NDJSON line for a finished task."""
+    if spiller is not None:
+        task_result = spiller.bound(task_result)
+    write_json(task_result, leading={"type": "task"}, flush=True)
+
+
+def output_stream_summary(
+    result,
+    spiller: Optional[PayloadSpiller] = None,
+    fail_on_regression: Optional[float] = None
+) -> int:
+    """
+    Print the final NDJSON protocol line and return the exit code.
+
+    Task results were already streamed, so the summary carries counts
+    instead of the task list.
+
+    Args:
+        result: ProtocolResult object
+        spiller: Spiller used for the task lines (adds the run id)
+        fail_on_regression: See protocol_exit_code
+
+    Returns:
+        Exit code (0=success, 1=error, 2=user_input_required, 3=regression)
+    """
+    line = {"type": "protocol"}
+    line.update(result.to_dict())
+    del line["tasks"]
+    line["task_count"] = len(result.tasks)
+    if spiller is not None:
+        line["run_id"] = spiller.run_id
+    print(dumps(line), flush=True)
+    return protocol_exit_code(result, fail_on_regression)
+
+
+def output_plan(plan, pretty: bool = False) -> int:
+    """
+    Print a predicted schedule.
+
+    Args:
+        plan: SchedulePlan object
+        pretty: Pretty-print JSON
+
+    Returns:
+        Exit code (always 0)
+    """
+    print(json.dumps(plan.to_dict(), indent=2 if pretty else None))
+    return 0
+
+
 def run_status() -> dict:
     """Get current framework status."""
     from tasks.config import read_framework_config, get_active_preset
@@ -170,6 +379,100 @@ def run_status() -> dict:
     }
 
 
+def run_command(args: argparse.Namespace, parser: argparse.ArgumentParser) -> int:
+    """
+    Dispatch a parsed command.
+
+    Returns:
+        Exit code
+    """
+    spiller = PayloadSpiller(new_run_id(), args.max_items) if args.max_items > 0 else None
+    on_result = (lambda task_result: stream_task_result(task_result, spiller)) if args.stream else None
+
+    if args.command == "cold-start":
+        if args.plan:
+            return output_plan(plan_cold_start(args.skip_update, args.skip_security), args.pretty)
+        result = run_cold_start(
+            skip_update=args.skip_update,
+            skip_security=args.skip_security,
+            silent=args.silent,
+            deadline=args.deadline,
+            on_result=on_result
+        )
+        if args.stream:
+            return output_stream_summary(result, spiller, args.fail_on_regression)
+        return output_result(result, args.pretty, args.silent, spiller, args.fail_on_regression)
+
+    elif args.command == "completion":
+        if args.plan:
+            return output_plan(plan_completion(args.skip_review, args.no_commit), args.pretty)
+        result = run_completion(
+            skip_review=args.skip_review,
+            no_commit=args.no_commit,
+            commit_message=args.message,
+            silent=args.silent,
+            deadline=args.deadline,
+            on_result=on_result
+        )
+        if args.stream:
+            return output_stream_summary(result, spiller, args.fail_on_regression)
+        return output_result(result, args.pretty, args.silent, spiller, args.fail_on_regression)
+
+    elif args.command == "status":
+        status = run_status()
+        if args.pretty:
+            print(json.dumps(status, indent=2))
+        else:
+            print(json.dumps(status))
+        return 0
+
+    elif args.command == "result":
+        if args.result_command != "show":
+            parser.parse_args(["result", "--help"])
+            return 1
+        stored = load_spilled(args.run_id, args.task)
+        print(json.dumps(stored["data"], indent=2) if args.pretty else dumps(stored["data"]))
+        return 0
+
+    elif args.command == "stats":
+        stats = task_stats(protocol=args.protocol, task=args.task, days=args.days)
+        if args.textfile:
+            write_textfile(args.textfile, format_prometheus(stats))
+        if args.format == "prometheus":
+            sys.stdout.write(format_prometheus(stats))
+        else:
+            summaries = summarize_stats(stats)
+            print(json.dumps(summaries, indent=2) if args.pretty else dumps(summaries))
+        return 0
+
+    elif args.command == "logs":
+        if args.logs_command == "convert":
+            print(dumps({"converted": convert_legacy_logs(args.log_dir)}))
+            return 0
+        if args.logs_command == "reindex":
+            print(dumps({"indexed": rebuild_log_index(args.log_dir)}))
+            return 0
+        if args.logs_command == "query":
+            for entry in query_logs(
+                protocol=args.protocol,
+                task=args.task,
+                status=args.status,
+                entry_type=args.entry_type,
+                since=args.since,
+                until=args.until,
+                min_duration_ms=args.min_duration,
+                limit=args.limit
+            ):
+                print(dumps(entry))
+            return 0
+        parser.parse_args(["logs", "--help"])
+        return 1
+
+    else:
+        parser.print_help()
+        return 1
+
+
 def main() -> int:
     """Main entry point."""
     parser = create_parser()
@@ -181,41 +484,28 @@ def main() -> int:
         silent_mode=args.silent
     )
 
+    # Record every task and protocol in the logs (and the scheduler's history)
+    register_observer(JsonLogObserver())
+
     # Handle no command
     if not args.command:
         parser.print_help()
         return 0
 
+    if args.resources:
+        enable_usage_capture()
+
+    tracer = Tracer() if args.trace else None
+    if tracer is not None:
+        register_observer(TraceObserver(tracer))
+
     # Execute command
     try:
-        if args.command == "cold-start":
-            result = run_cold_start(
-                skip_update=args.skip_update,
-                skip_security=args.skip_security,
-                silent=args.silent
-            )
-            return output_result(result, args.pretty, args.silent)
-
-        elif args.command == "completion":
-            result = run_completion(
-                skip_review=args.skip_review,
-                no_commit=args.no_commit,
-                commit_message=args.message,
-                silent=args.silent
-            )
-            return output_result(result, args.pretty, args.silent)
-
-        elif args.command == "status":
-            status = run_status()
-            if args.pretty:
-                print(json.dumps(status, indent=2))
-            else:
-                print(json.dumps(status))
-            return 0
+        if tracer is None:
+            return run_command(args, parser)
 
-        else:
-            parser.print_help()
-            return 1
+        with tracer.activate(), span(args.command, "protocol"):
+            return run_command(args, parser)
 
     except KeyboardInterrupt:
         print("\nInterrupted by user", file=sys.stderr)
@@ -230,6 +520,10 @@ def main() -> int:
         print(json.dumps(error_output), file=sys.stderr)
         return 1
 
+    finally:
+        if tracer is not None:
+            tracer.write(args.trace)
+
 
 if __name__ == "__main__":
     sys.exit(main())
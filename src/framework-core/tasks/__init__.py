@@ -7,27 +7,33 @@ Task modules:
 - hooks: Git hooks management
 - security: Security scanning
 - session: Session state management
+- settings: Effective settings snapshot (defaults, settings.json, .framework-config, preset)
 - version: Version checking and updates
 """
 
-from .config import read_framework_config, write_framework_config, get_active_preset, get_setting
-from .git import get_status, get_diff_stat, commit, get_recent_commits
+from .config import (
+    read_framework_config, write_framework_config, update_framework_config, get_active_preset, get_setting,
+)
+from .git import get_status, get_diff_stat, commit, get_recent_commits, get_status_async, get_statuses_async
 from .hooks import is_hook_installed, install_hook, verify_all_hooks
 from .security import quick_scan, run_initial_scan, cleanup_dialogs
 from .session import read_last_session, write_last_session, is_crash_detected, clear_session
+from .settings import get_effective_settings, get_effective
 from .version import get_current_version, get_latest_version, is_update_available
 
 __all__ = [
     # config
-    "read_framework_config", "write_framework_config", "get_active_preset", "get_setting",
+    "read_framework_config", "write_framework_config", "update_framework_config", "get_active_preset", "get_setting",
     # git
-    "get_status", "get_diff_stat", "commit", "get_recent_commits",
+    "get_status", "get_diff_stat", "commit", "get_recent_commits", "get_status_async", "get_statuses_async",
     # hooks
     "is_hook_installed", "install_hook", "verify_all_hooks",
     # security
     "quick_scan", "run_initial_scan", "cleanup_dialogs",
     # session
     "read_last_session", "write_last_session", "is_crash_detected", "clear_session",
+    # settings
+    "get_effective_settings", "get_effective",
     # version
     "get_current_version", "get_latest_version", "is_update_available",
 ]
@@ -2,12 +2,22 @@
 Configuration and preset management tasks.
 
 Handles reading/writing .framework-config and settings.json.
+
+All reads and writes go through the process-wide config store (see
+utils.config_store), which parses each file once and re-parses only
+when its mtime, size or inode changed. Writes are atomic, and
+update_framework_config() changes keys under the file's advisory lock so
+parallel tasks cannot lose each other's updates.
+
+get_setting() and get_active_preset() answer from the effective
+settings snapshot (see tasks.settings).
 """
 
-import json
 from pathlib import Path
 from typing import Any, Dict, Optional
 
+from utils.config_store import load_json, save_json, update_json
+
 # Default paths
 FRAMEWORK_CONFIG_PATH = Path(".claude/.framework-config")
 SETTINGS_PATH = Path(".claude/settings.json")
@@ -42,16 +52,11 @@ def read_framework_config() -> Dict[str, Any]:
     Returns:
         Configuration dictionary (defaults if file doesn't exist)
     """
-    if not FRAMEWORK_CONFIG_PATH.exists():
-        return DEFAULT_FRAMEWORK_CONFIG.copy()
-
-    try:
-        with open(FRAMEWORK_CONFIG_PATH, "r") as f:
-            config = json.load(f)
-            # Merge with defaults for missing keys
-            return {**DEFAULT_FRAMEWORK_CONFIG, **config}
-    except (json.JSONDecodeError, IOError):
+    config = load_json(FRAMEWORK_CONFIG_PATH)
+    if not isinstance(config, dict):
         return DEFAULT_FRAMEWORK_CONFIG.copy()
+    # Merge with defaults for missing keys
+    return {**DEFAULT_FRAMEWORK_CONFIG, **config}
 
 
 def write_framework_config(config: Dict[str, Any]) -> bool:
@@ -65,16 +70,32 @@ def write_framework_config(config: Dict[str, Any]) -> bool:
         True if successful, False otherwise
     """
     try:
-        # Ensure directory exists
-        FRAMEWORK_CONFIG_PATH.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(FRAMEWORK_CONFIG_PATH, "w") as f:
-            json.dump(config, f, indent=2)
+        save_json(FRAMEWORK_CONFIG_PATH, dict(config))
         return True
-    except IOError:
+    except OSError:
         return False
 
 
+def update_framework_config(changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Set keys of the framework configuration in one locked read-modify-write.
+
+    Args:
+        changes: Keys and values to set
+
+    Returns:
+        The configuration written, or None if it could not be written
+    """
+    def apply(config: Any) -> Dict[str, Any]:
+        base = config if isinstance(config, dict) else {}
+        return {**DEFAULT_FRAMEWORK_CONFIG, **base, **changes}
+
+    try:
+        return update_json(FRAMEWORK_CONFIG_PATH, apply)
+    except OSError:
+        return None
+
+
 def get_active_preset() -> str:
     """
     Get the currently active preset.
@@ -82,14 +103,9 @@ def get_active_preset() -> str:
     Returns:
         Preset name (default: "verbose")
     """
-    # First check framework config
-    config = read_framework_config()
-    if config.get("active_preset"):
-        return config["active_preset"]
-
-    # Fall back to settings.json
-    settings = read_settings()
-    return settings.get("preset", "verbose")
+    # Resolved in the snapshot: framework config first, then settings.json
+    from .settings import get_effective
+    return get_effective("preset", "verbose")
 
 
 def set_active_preset(preset: str) -> bool:
@@ -106,9 +122,7 @@ def set_active_preset(preset: str) -> bool:
     if preset not in valid_presets:
         return False
 
-    config = read_framework_config()
-    config["active_preset"] = preset
-    return write_framework_config(config)
+    return update_framework_config({"active_preset": preset}) is not None
 
 
 def read_settings() -> Dict[str, Any]:
@@ -118,21 +132,19 @@ def read_settings() -> Dict[str, Any]:
     Returns:
         Settings dictionary (defaults if file doesn't exist)
     """
-    if not SETTINGS_PATH.exists():
-        return DEFAULT_SETTINGS.copy()
-
-    try:
-        with open(SETTINGS_PATH, "r") as f:
-            settings = json.load(f)
-            return settings
-    except (json.JSONDecodeError, IOError):
+    settings = load_json(SETTINGS_PATH)
+    if not isinstance(settings, dict):
         return DEFAULT_SETTINGS.copy()
+    return dict(settings)
 
 
 def get_setting(key: str, default: Any = None) -> Any:
     """
     Get a specific setting value using dot notation.
 
+    Values come from the effective settings snapshot, so defaults fill in
+    keys settings.json leaves out and schema-rejected values are ignored.
+
     Args:
         key: Setting key (e.g., "execution.parallelism")
         default: Default value if key not found
@@ -140,17 +152,8 @@ def get_setting(key: str, default: Any = None) -> Any:
     Returns:
         Setting value or default
     """
-    settings = read_settings()
-    keys = key.split(".")
-
-    value = settings
-    for k in keys:
-        if isinstance(value, dict) and k in value:
-            value = value[k]
-        else:
-            return default
-
-    return value
+    from .settings import get_effective
+    return get_effective(key, default)
 
 
 def get_preset_config(preset_name: str) -> Optional[Dict[str, Any]]:
@@ -163,15 +166,11 @@ def get_preset_config(preset_name: str) -> Optional[Dict[str, Any]]:
     Returns:
         Preset configuration dictionary or None if not found
     """
-    if not PRESETS_PATH.exists():
-        return None
-
-    try:
-        with open(PRESETS_PATH, "r") as f:
-            presets = json.load(f)
-            return presets.get("presets", {}).get(preset_name)
-    except (json.JSONDecodeError, IOError):
+    presets = load_json(PRESETS_PATH)
+    if not isinstance(presets, dict):
         return None
+    preset = presets.get("presets", {}).get(preset_name)
+    return dict(preset) if isinstance(preset, dict) else preset
 
 
 def is_silent_mode() -> bool:
@@ -2,33 +2,162 @@
 Git operations tasks.
 
 Handles git status, diff, commit, and history operations.
+
+The *_async variants run git through asyncio subprocesses so many
+repositories or submodules can be queried from one event loop.
+
+Within a protocol run, is_git_repo(), get_status() and get_diff_stat()
+are memoized in the RunContext; stage_files() and commit() invalidate
+the cached working-tree state.
+
+Read-only commands run with GIT_OPTIONAL_LOCKS=0 so they never take
+.git/index.lock; every other command holds the "git:write" resource
+(see utils.resources), so concurrent tasks' writers are serialized.
 """
 
+import asyncio
+import fnmatch
+import os
 import subprocess
+import time
 import json
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Sequence
+
+from utils.cancellation import run_subprocess
+from utils.context import memoize, invalidate_prefix
+from utils.trace import span
+from utils.resources import GIT_WRITE, hold_resources
+from utils.usage import record_subprocess
+
+# RunContext keys; everything under STATE_KEY_PREFIX changes when we stage or commit
+IS_REPO_KEY = "git.is_repo"
+STATE_KEY_PREFIX = "git.state."
+STATUS_KEY = STATE_KEY_PREFIX + "status"
+DIFF_STAT_KEY = STATE_KEY_PREFIX + "diff_stat"
+
+# Files the framework itself writes into the work tree (logs, caches, state
+# and lock files); never staged by the completion commit. Glob patterns in
+# git's ":(glob)" pathspec syntax.
+FRAMEWORK_STATE_PATHS = (
+    ".claude/.framework-config",
+    ".claude/.framework-log",
+    ".claude/.last_session",
+    ".claude/*.lock",
+    ".claude/.*.tmp",
+    ".claude/logs/**",
+    ".claude/cache/**",
+)
+
+# Subcommands that never modify the repository
+READ_ONLY_COMMANDS = frozenset({"status", "diff", "rev-parse", "log", "show", "ls-files", "cat-file"})
+
+
+def _read_only_env() -> Dict[str, str]:
+    """Environment that skips the optional index refresh (and its lock) of status/diff."""
+    return {**os.environ, "GIT_OPTIONAL_LOCKS": "0"}
+
 
+def _is_read_only(args: List[str]) -> bool:
+    """True for git invocations that do not write to the repository."""
+    if args[0] == "branch":
+        return args[1:] == ["--show-current"]
+    return args[0] in READ_ONLY_COMMANDS
 
-def _run_git_command(args: List[str], check: bool = True) -> subprocess.CompletedProcess:
+
+def _copy_status(status: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    """Copy a status dict so callers can mutate their lists."""
+    return {key: list(files) for key, files in status.items()}
+
+
+def _copy_diff_stat(stat: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a diff stat dict including its nested staged/unstaged dicts."""
+    return {key: dict(value) if isinstance(value, dict) else value for key, value in stat.items()}
+
+
+def _run_git_command(
+    args: List[str],
+    check: bool = True,
+    cwd: Optional[str] = None
+) -> subprocess.CompletedProcess:
     """
     Run a git command and return the result.
 
+    When called from a protocol task, the git process is killed if the
+    run is cancelled. Read-only commands run lock-free; others hold the
+    "git:write" resource for the duration of the call.
+
     Args:
         args: Command arguments (without 'git')
         check: Raise exception on non-zero exit
+        cwd: Directory to run in (default: current directory)
 
     Returns:
         CompletedProcess result
     """
-    return subprocess.run(
+    with span(f"git {args[0]}", "git", argv=" ".join(args)[:200]):
+        if _is_read_only(args):
+            return run_subprocess(["git"] + args, check=check, cwd=cwd, env=_read_only_env())
+        with hold_resources((GIT_WRITE,)):
+            return run_subprocess(["git"] + args, check=check, cwd=cwd)
+
+
+async def _run_git_command_async(
+    args: List[str],
+    check: bool = True,
+    cwd: Optional[str] = None
+) -> subprocess.CompletedProcess:
+    """
+    Run a git command without blocking the event loop.
+
+    The child process is killed if the awaiting task is cancelled.
+    Read-only commands run with GIT_OPTIONAL_LOCKS=0; write commands do
+    not take the "git:write" resource here (it would block the loop).
+
+    Args:
+        args: Command arguments (without 'git')
+        check: Raise exception on non-zero exit
+        cwd: Directory to run in (default: current directory)
+
+    Returns:
+        CompletedProcess result with decoded stdout/stderr
+    """
+    started = time.perf_counter()
+    process = await asyncio.create_subprocess_exec(
+        "git", *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        cwd=cwd,
+        env=_read_only_env() if _is_read_only(args) else None
+    )
+
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+        raise
+    finally:
+        record_subprocess(["git"] + args, time.perf_counter() - started)
+
+    result = subprocess.CompletedProcess(
         ["git"] + args,
-        capture_output=True,
-        text=True,
-        check=check
+        process.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace")
     )
+    if check:
+        result.check_returncode()
+    return result
 
 
 def is_git_repo() -> bool:
+    """Check if current directory is a git repository (memoized per run)."""
+    return memoize(IS_REPO_KEY, _is_git_repo)
+
+
+def _is_git_repo() -> bool:
     """Check if current directory is a git repository."""
     try:
         result = _run_git_command(["rev-parse", "--is-inside-work-tree"], check=False)
@@ -37,62 +166,123 @@ def is_git_repo() -> bool:
         return False
 
 
+def _parse_status_porcelain(output: str) -> Dict[str, List[str]]:
+    """Parse `git status --porcelain -z` output into staged/unstaged/untracked lists."""
+    status = {
+        "staged": [],
+        "unstaged": [],
+        "untracked": [],
+    }
+
+    # Parse porcelain output (null-separated)
+    entries = output.split("\0")
+    for entry in entries:
+        if not entry or len(entry) < 3:
+            continue
+
+        index_status = entry[0]
+        worktree_status = entry[1]
+        filename = entry[3:]
+
+        # Staged changes (index has changes)
+        if index_status in ("M", "A", "D", "R", "C"):
+            status["staged"].append(filename)
+
+        # Unstaged changes (worktree has changes)
+        if worktree_status in ("M", "D"):
+            status["unstaged"].append(filename)
+
+        # Untracked files
+        if index_status == "?" and worktree_status == "?":
+            status["untracked"].append(filename)
+
+    return status
+
+
 def get_status() -> Dict[str, List[str]]:
     """
-    Get git status as a structured dictionary.
+    Get git status as a structured dictionary (memoized per run).
 
     Returns:
         Dictionary with 'staged', 'unstaged', and 'untracked' file lists
     """
-    status = {
-        "staged": [],
-        "unstaged": [],
-        "untracked": [],
-    }
+    return memoize(STATUS_KEY, _get_status, copy=_copy_status)
 
+
+def _get_status() -> Dict[str, List[str]]:
+    """Run git status and parse it."""
     if not is_git_repo():
-        return status
+        return _parse_status_porcelain("")
 
     try:
         result = _run_git_command(["status", "--porcelain", "-z"])
-        if not result.stdout:
-            return status
+        return _parse_status_porcelain(result.stdout)
+    except subprocess.CalledProcessError:
+        return _parse_status_porcelain("")
 
-        # Parse porcelain output (null-separated)
-        entries = result.stdout.split("\0")
-        for entry in entries:
-            if not entry or len(entry) < 3:
-                continue
 
-            index_status = entry[0]
-            worktree_status = entry[1]
-            filename = entry[3:]
+async def is_git_repo_async(cwd: Optional[str] = None) -> bool:
+    """Check if a directory is inside a git work tree (asyncio variant)."""
+    try:
+        result = await _run_git_command_async(["rev-parse", "--is-inside-work-tree"], check=False, cwd=cwd)
+        return result.returncode == 0 and result.stdout.strip() == "true"
+    except (FileNotFoundError, NotADirectoryError):
+        return False
 
-            # Staged changes (index has changes)
-            if index_status in ("M", "A", "D", "R", "C"):
-                status["staged"].append(filename)
 
-            # Unstaged changes (worktree has changes)
-            if worktree_status in ("M", "D"):
-                status["unstaged"].append(filename)
+async def get_status_async(cwd: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Get git status for a directory without blocking the event loop.
 
-            # Untracked files
-            if index_status == "?" and worktree_status == "?":
-                status["untracked"].append(filename)
+    Args:
+        cwd: Repository or submodule path (default: current directory)
 
+    Returns:
+        Dictionary with 'staged', 'unstaged', and 'untracked' file lists
+    """
+    if not await is_git_repo_async(cwd):
+        return _parse_status_porcelain("")
+
+    try:
+        result = await _run_git_command_async(["status", "--porcelain", "-z"], cwd=cwd)
+        return _parse_status_porcelain(result.stdout)
     except subprocess.CalledProcessError:
-        pass
+        return _parse_status_porcelain("")
 
-    return status
+
+async def get_statuses_async(paths: List[str], max_concurrency: int = 8) -> Dict[str, Dict[str, List[str]]]:
+    """
+    Get git status for many repositories or submodules concurrently.
+
+    Args:
+        paths: Directories to query
+        max_concurrency: Maximum git processes running at once
+
+    Returns:
+        Dictionary mapping each path to its status dictionary
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def one(path: str) -> Dict[str, List[str]]:
+        async with semaphore:
+            return await get_status_async(path)
+
+    statuses = await asyncio.gather(*(one(path) for path in paths))
+    return dict(zip(paths, statuses))
 
 
 def get_diff_stat() -> Dict[str, Any]:
     """
-    Get diff statistics for staged and unstaged changes.
+    Get diff statistics for staged and unstaged changes (memoized per run).
 
     Returns:
         Dictionary with files changed, insertions, deletions
     """
+    return memoize(DIFF_STAT_KEY, _get_diff_stat, copy=_copy_diff_stat)
+
+
+def _get_diff_stat() -> Dict[str, Any]:
+    """Run git diff --numstat for staged and unstaged changes."""
     stat = {
         "files": 0,
         "insertions": 0,
@@ -161,6 +351,7 @@ def commit(message: str, add_all: bool = False) -> Optional[str]:
     try:
         if add_all:
             _run_git_command(["add", "-A"])
+            invalidate_prefix(STATE_KEY_PREFIX)
 
         # Check if there's anything to commit
         status = get_status()
@@ -169,7 +360,10 @@ def commit(message: str, add_all: bool = False) -> Optional[str]:
 
         # Create commit with co-author
         full_message = f"{message}\n\nCo-Authored-By: Claude Opus 4.5 <noreply@anthropic.com>"
-        _run_git_command(["commit", "-m", full_message])
+        try:
+            _run_git_command(["commit", "-m", full_message])
+        finally:
+            invalidate_prefix(STATE_KEY_PREFIX)
 
         # Get commit hash
         result = _run_git_command(["rev-parse", "HEAD"])
@@ -239,12 +433,23 @@ def has_uncommitted_changes() -> bool:
     return bool(status["staged"] or status["unstaged"] or status["untracked"])
 
 
-def stage_files(files: List[str]) -> bool:
+def is_framework_state(path: str) -> bool:
+    """Check if a repository path is one of the FRAMEWORK_STATE_PATHS."""
+    path = path.rstrip("/")
+    return any(
+        fnmatch.fnmatchcase(path, pattern) or (pattern.endswith("/**") and path == pattern[:-3])
+        for pattern in FRAMEWORK_STATE_PATHS
+    )
+
+
+def stage_files(files: List[str], exclude: Sequence[str] = ()) -> bool:
     """
     Stage specific files for commit.
 
     Args:
         files: List of file paths to stage
+        exclude: Glob patterns left unstaged even inside a listed
+            directory (e.g. FRAMEWORK_STATE_PATHS)
 
     Returns:
         True if successful
@@ -253,7 +458,10 @@ def stage_files(files: List[str]) -> bool:
         return False
 
     try:
-        _run_git_command(["add"] + files)
+        excludes = [f":(exclude,glob){pattern}" for pattern in exclude]
+        _run_git_command(["add", "--"] + files + excludes)
         return True
     except subprocess.CalledProcessError:
         return False
+    finally:
+        invalidate_prefix(STATE_KEY_PREFIX)
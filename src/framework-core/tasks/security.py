@@ -48,6 +48,14 @@ EXCLUDED_PATHS = {
     "dist", "build", ".next", "coverage", "security/reports"
 }
 
+# File count from which scans fan out to the process pool
+# (below it, worker start-up costs more than the regex work)
+PARALLEL_SCAN_THRESHOLD = 64
+
+# Below PARALLEL_SCAN_THRESHOLD, batches of at least this many files are
+# split into child tasks of this size on the caller's runner pool
+CHILD_SCAN_CHUNK = 16
+
 
 def quick_scan() -> Dict[str, Any]:
     """
@@ -71,12 +79,12 @@ def quick_scan() -> Dict[str, Any]:
     status = get_status()
     files_to_scan = status.get("staged", []) + status.get("unstaged", [])
 
-    for file_path in files_to_scan:
-        path = Path(file_path)
-        if not path.exists() or path.suffix not in SCANNABLE_EXTENSIONS:
-            continue
+    paths = [
+        path for path in map(Path, files_to_scan)
+        if path.exists() and path.suffix in SCANNABLE_EXTENSIONS
+    ]
 
-        file_findings = scan_file(path)
+    for file_findings in scan_files(paths):
         findings["scanned_files"] += 1
 
         for finding in file_findings:
@@ -142,13 +150,14 @@ def run_initial_scan() -> Dict[str, Any]:
             findings["total_findings"] += 1
 
     # Scan source files for hardcoded secrets
-    for path in project_root.rglob("*"):
-        if path.is_dir() or should_exclude_path(path):
-            continue
-        if path.suffix not in SCANNABLE_EXTENSIONS:
-            continue
+    paths = [
+        path for path in project_root.rglob("*")
+        if path.suffix in SCANNABLE_EXTENSIONS
+        and not should_exclude_path(path)
+        and not path.is_dir()
+    ]
 
-        file_findings = scan_file(path)
+    for file_findings in scan_files(paths):
         findings["scanned_files"] += 1
 
         for finding in file_findings:
@@ -203,6 +212,88 @@ def scan_file(file_path: Path) -> List[Dict[str, Any]]:
     return findings
 
 
+def scan_files(paths: List[Path]) -> List[List[Dict[str, Any]]]:
+    """
+    Scan several files for credential patterns.
+
+    Large batches are spread over the shared process pool in chunks
+    (through map_parallel, so only a few chunks are in flight at once)
+    so the regex work is not serialized by the GIL. Medium batches are
+    split into child tasks on the calling task's runner pool (see
+    TaskGroup), which show up under the task's result; small batches
+    run inline. When called from a task, the scan stops as soon as the
+    run is cancelled.
+
+    Args:
+        paths: Files to scan
+
+    Returns:
+        List of findings per file, in the same order as paths
+    """
+    from utils.cancellation import current_token
+    from utils.trace import span
+
+    token = current_token()
+    pool = None
+    if len(paths) >= PARALLEL_SCAN_THRESHOLD:
+        from utils.parallel import get_process_pool
+        pool = get_process_pool()
+
+    def scan_traced(path: Path) -> List[Dict[str, Any]]:
+        with span("scan_file", "scan", file=str(path)):
+            return scan_file(path)
+
+    with span("scan_files", "scan", files=len(paths), parallel=pool is not None):
+        if pool is None and len(paths) >= 2 * CHILD_SCAN_CHUNK:
+            return _scan_files_as_children(paths, token)
+
+        if pool is None:
+            results = []
+            for path in paths:
+                # Stop between files once the run is cancelled
+                if token is not None:
+                    token.raise_if_cancelled()
+                results.append(scan_traced(path))
+            return results
+
+        from utils.parallel import map_parallel, process_pool_workers, EXECUTOR_PROCESS
+
+        workers = process_pool_workers()
+        chunksize = max(1, len(paths) // (workers * 4))
+        chunks = (paths[i:i + chunksize] for i in range(0, len(paths), chunksize))
+
+        # map_parallel stops submitting chunks once the run is cancelled
+        results = []
+        for chunk_findings in map_parallel(_scan_chunk, chunks, window=workers * 2, executor=EXECUTOR_PROCESS):
+            results.extend(chunk_findings)
+        return results
+
+
+def _scan_chunk(paths: List[Path]) -> List[List[Dict[str, Any]]]:
+    """Scan a chunk of files in a worker process or child task."""
+    return [scan_file(path) for path in paths]
+
+
+def _scan_files_as_children(paths: List[Path], token) -> List[List[Dict[str, Any]]]:
+    """Scan paths as TaskGroup children of CHILD_SCAN_CHUNK files each."""
+    from utils.parallel import TaskGroup
+    from utils.result import TaskStatus
+
+    with TaskGroup() as group:
+        for index, start in enumerate(range(0, len(paths), CHILD_SCAN_CHUNK)):
+            group.spawn(f"scan_files[{index}]", _scan_chunk, paths[start:start + CHILD_SCAN_CHUNK])
+
+    if token is not None:
+        token.raise_if_cancelled()
+
+    results = []
+    for child in group.results:
+        if child.status != TaskStatus.SUCCESS:
+            raise RuntimeError(f"{child.name} failed: {child.error}")
+        results.extend(child.data["result"])
+    return results
+
+
 def should_exclude_path(path: Path) -> bool:
     """Check if a path should be excluded from scanning."""
     path_parts = set(path.parts)
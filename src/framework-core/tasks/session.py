@@ -2,6 +2,10 @@
 Session state management tasks.
 
 Handles .last_session file for crash detection and recovery.
+
+The file is replaced atomically (see utils.state_file), so crash
+detection never reads a half-written session; update_session_task()
+holds the file's advisory lock for its read-modify-write.
 """
 
 import json
@@ -9,6 +13,8 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional, Any
 
+from utils.state_file import atomic_write_json, locked
+
 # Session file path
 SESSION_FILE = Path(".claude/.last_session")
 
@@ -57,13 +63,9 @@ def write_last_session(
         session_data["metadata"] = metadata
 
     try:
-        # Ensure directory exists
-        SESSION_FILE.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(SESSION_FILE, "w") as f:
-            json.dump(session_data, f, indent=2)
+        atomic_write_json(SESSION_FILE, session_data)
         return True
-    except IOError:
+    except OSError:
         return False
 
 
@@ -175,12 +177,16 @@ def update_session_task(task: str) -> bool:
     Returns:
         True if successful
     """
-    session = read_last_session()
-    if not session:
-        return mark_session_active(task)
-
-    return write_last_session(
-        session.get("status", "active"),
-        task,
-        session.get("metadata")
-    )
+    try:
+        with locked(SESSION_FILE):
+            session = read_last_session()
+            if not session:
+                return mark_session_active(task)
+
+            return write_last_session(
+                session.get("status", "active"),
+                task,
+                session.get("metadata")
+            )
+    except OSError:
+        return False
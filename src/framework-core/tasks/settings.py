@@ -0,0 +1,332 @@
+"""
+Effective settings snapshot.
+
+Resolves the framework's effective settings once instead of through
+ad-hoc lookups: DEFAULT_SETTINGS deep-merged with settings.json
+(validated against settings.schema.json), the .framework-config and the
+active preset's definition from presets.json, flattened to dotted keys:
+
+    {"execution.parallelism": true, "preset": "balanced",
+     "framework.version": "2.0.0", "config.project_id": "...",
+     "preset_config.confirmations": "single", ...}
+
+- settings keys are unprefixed; "preset" and "framework.version" hold
+  the resolved values (.framework-config wins, as in get_active_preset
+  and get_current_version)
+- .framework-config keys are prefixed "config."
+- the active preset's definition is prefixed "preset_config."
+- lists stay values and are not flattened
+
+Settings values the schema rejects are replaced by their default (or
+left out) and reported under the snapshot's "errors".
+
+The snapshot is cached in .claude/cache/settings.snapshot.json together
+with the SHA-256 of every input file. At startup that one file is read;
+the inputs are only stat()ed, and hashed again only when their mtime,
+size or inode changed, so touching a file without changing it keeps the
+snapshot. Like the result sidecars in .claude/cache/results, the
+snapshot is local derived data: install.sh gitignores .claude/cache/
+and the completion commit never stages it.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.config_store import load_json, save_json
+from .config import (
+    DEFAULT_FRAMEWORK_CONFIG, DEFAULT_SETTINGS, FRAMEWORK_CONFIG_PATH, PRESETS_PATH, SETTINGS_PATH,
+)
+
+SETTINGS_SCHEMA_PATH = Path(".claude/settings.schema.json")
+SNAPSHOT_PATH = Path(".claude/cache/settings.snapshot.json")
+
+# Bumped when the snapshot layout changes
+SNAPSHOT_VERSION = 1
+
+# Files the snapshot is derived from
+INPUT_PATHS = (SETTINGS_PATH, SETTINGS_SCHEMA_PATH, FRAMEWORK_CONFIG_PATH, PRESETS_PATH)
+
+# Serializes rebuilds, so parallel tasks do not all rebuild the same snapshot
+_build_lock = threading.Lock()
+
+# Changing the built-in defaults also invalidates cached snapshots
+_DEFAULTS_HASH = hashlib.sha256(
+    json.dumps([DEFAULT_SETTINGS, DEFAULT_FRAMEWORK_CONFIG], sort_keys=True).encode("utf-8")
+).hexdigest()
+
+_JSON_TYPES = {
+    "object": dict,
+    "array": list,
+    "string": str,
+    "boolean": bool,
+    "integer": int,
+    "number": (int, float),
+    "null": type(None),
+}
+
+
+def get_effective_settings() -> Dict[str, Any]:
+    """
+    Get the flat effective settings, rebuilding the snapshot if an input changed.
+
+    Returns:
+        Dotted key -> value (a copy the caller may change)
+    """
+    return dict(load_snapshot()["settings"])
+
+
+def get_effective(key: str, default: Any = None) -> Any:
+    """
+    Look up one effective setting.
+
+    Args:
+        key: Dotted key (e.g. "execution.parallelism"); a key with
+            nested settings below it returns them as a dict
+        default: Value when the key is not set
+
+    Returns:
+        Setting value or default
+    """
+    settings = load_snapshot()["settings"]
+    if key in settings:
+        return settings[key]
+    return unflatten(settings, key + ".", default)
+
+
+def load_snapshot() -> Dict[str, Any]:
+    """
+    Get the snapshot record (settings, errors, inputs), from the cache when current.
+
+    The cached file goes through the config store, so within a process
+    it is parsed once and later calls cost one stat() per file.
+    """
+    cached = load_json(SNAPSHOT_PATH)
+    inputs = _revalidate(cached)
+    if inputs is not None and inputs == cached["inputs"]:
+        return cached
+
+    with _build_lock:
+        # Another thread may have rebuilt it while we waited
+        cached = load_json(SNAPSHOT_PATH)
+        inputs = _revalidate(cached)
+        if inputs is not None and inputs == cached["inputs"]:
+            return cached
+        return _refresh(cached, inputs)
+
+
+def _refresh(cached: Any, inputs: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """Rebuild the snapshot (or only its input stats) and cache it."""
+    if inputs is not None:
+        # Only metadata changed: keep the settings, record the new stats
+        snapshot = {**cached, "inputs": inputs}
+    else:
+        snapshot = build_snapshot()
+    try:
+        save_json(SNAPSHOT_PATH, snapshot, indent=None)
+    except OSError:
+        # Read-only checkout: use the snapshot without caching it
+        pass
+    return snapshot
+
+
+def build_snapshot() -> Dict[str, Any]:
+    """
+    Resolve the effective settings from the input files.
+
+    Returns:
+        Snapshot record: version, defaults hash, inputs (path -> stat
+        signature and SHA-256), settings and errors
+    """
+    inputs = {str(path): _fingerprint(path) for path in INPUT_PATHS}
+
+    raw_settings = load_json(SETTINGS_PATH)
+    settings = _deep_merge(DEFAULT_SETTINGS, raw_settings if isinstance(raw_settings, dict) else {})
+    flat = flatten(settings)
+    defaults = flatten(DEFAULT_SETTINGS)
+
+    errors = []
+    schema = load_json(SETTINGS_SCHEMA_PATH)
+    if isinstance(schema, dict):
+        for path, message in validate(settings, schema):
+            key = ".".join(path)
+            errors.append(f"{key or '<root>'}: {message}")
+            # Replace the rejected value by its default, or drop it
+            for name in [k for k in flat if _is_under(k, key)]:
+                del flat[name]
+            flat.update({k: v for k, v in defaults.items() if _is_under(k, key)})
+
+    raw_config = load_json(FRAMEWORK_CONFIG_PATH)
+    raw_config = raw_config if isinstance(raw_config, dict) else {}
+    config = {**DEFAULT_FRAMEWORK_CONFIG, **raw_config}
+    flat.update(flatten(config, "config."))
+
+    preset = config.get("active_preset") or flat.get("preset") or "verbose"
+    flat["preset"] = preset
+    if "framework_version" in raw_config:
+        flat["framework.version"] = raw_config["framework_version"]
+
+    presets = load_json(PRESETS_PATH)
+    if isinstance(presets, dict):
+        definition = presets.get("presets", {}).get(preset)
+        if isinstance(definition, dict):
+            flat.update(flatten(definition, "preset_config."))
+
+    return {
+        "version": SNAPSHOT_VERSION,
+        "defaults": _DEFAULTS_HASH,
+        "inputs": inputs,
+        "settings": flat,
+        "errors": errors,
+    }
+
+
+def flatten(value: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """Flatten nested dicts to dotted keys (empty dicts and lists stay values)."""
+    flat: Dict[str, Any] = {}
+    for key, item in value.items():
+        if isinstance(item, dict) and item:
+            flat.update(flatten(item, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = item
+    return flat
+
+
+def unflatten(flat: Dict[str, Any], prefix: str, default: Any = None) -> Any:
+    """Rebuild the nested dict of all keys under prefix, or default if there are none."""
+    nested: Dict[str, Any] = {}
+    for key, value in flat.items():
+        if not key.startswith(prefix):
+            continue
+        *parents, leaf = key[len(prefix):].split(".")
+        node = nested
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return nested if nested else default
+
+
+def validate(value: Any, schema: Dict[str, Any], path: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], str]]:
+    """
+    Check value against the JSON Schema subset settings.schema.json uses.
+
+    Supports type, enum, const, minimum, maximum, properties, required,
+    additionalProperties and items; other keywords are ignored.
+
+    Yields:
+        (path of the offending value, message)
+    """
+    expected = schema.get("type")
+    if expected is not None:
+        names = expected if isinstance(expected, list) else [expected]
+        if not any(_is_type(value, name) for name in names):
+            yield path, f"expected {' or '.join(names)}, got {type(value).__name__}"
+            return
+
+    if "enum" in schema and value not in schema["enum"]:
+        yield path, f"{value!r} is not one of {schema['enum']!r}"
+    if "const" in schema and value != schema["const"]:
+        yield path, f"expected {schema['const']!r}"
+    if _is_type(value, "number"):
+        if "minimum" in schema and value < schema["minimum"]:
+            yield path, f"{value} is below the minimum {schema['minimum']}"
+        if "maximum" in schema and value > schema["maximum"]:
+            yield path, f"{value} is above the maximum {schema['maximum']}"
+
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", []):
+            if name not in value:
+                yield path + (name,), "required setting is missing"
+        additional = schema.get("additionalProperties", True)
+        for name, item in value.items():
+            if name in properties:
+                yield from validate(item, properties[name], path + (name,))
+            elif additional is False:
+                yield path + (name,), "unknown setting"
+            elif isinstance(additional, dict):
+                yield from validate(item, additional, path + (name,))
+
+    if isinstance(value, list) and isinstance(schema.get("items"), dict):
+        for i, item in enumerate(value):
+            for item_path, message in validate(item, schema["items"], path):
+                yield item_path, f"item {i}: {message}"
+
+
+def _is_under(name: str, key: str) -> bool:
+    """Whether flat key name is key itself or nested below it ("" covers everything)."""
+    return not key or name == key or name.startswith(key + ".")
+
+
+def _is_type(value: Any, name: str) -> bool:
+    if name in ("integer", "number") and isinstance(value, bool):
+        return False
+    expected = _JSON_TYPES.get(name)
+    return expected is None or isinstance(value, expected)
+
+
+def _deep_merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _signature(path: Path) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size, st.st_ino]
+
+
+def _fingerprint(path: Path) -> Dict[str, Any]:
+    """Stat signature and SHA-256 of an input file (both None if it is missing)."""
+    signature = _signature(path)
+    if signature is None:
+        return {"stat": None, "sha256": None}
+    try:
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return {"stat": None, "sha256": None}
+    return {"stat": signature, "sha256": digest}
+
+
+def _revalidate(snapshot: Any) -> Optional[Dict[str, Any]]:
+    """
+    Check a cached snapshot against the defaults and every input file.
+
+    Returns:
+        The inputs with current stat signatures if the snapshot is still
+        valid (equal to the recorded ones unless files were only
+        touched), or None if it must be rebuilt
+    """
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+    if snapshot.get("defaults") != _DEFAULTS_HASH or not isinstance(snapshot.get("settings"), dict):
+        return None
+
+    recorded_inputs = snapshot.get("inputs")
+    if not isinstance(recorded_inputs, dict):
+        return None
+    inputs = {}
+    for path in INPUT_PATHS:
+        recorded = recorded_inputs.get(str(path))
+        if not isinstance(recorded, dict):
+            return None
+        if _signature(path) == recorded.get("stat"):
+            inputs[str(path)] = recorded
+            continue
+        # Changed metadata only counts when the contents changed too
+        current = _fingerprint(path)
+        if current["sha256"] != recorded.get("sha256"):
+            return None
+        inputs[str(path)] = current
+    return inputs
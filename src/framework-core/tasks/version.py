@@ -11,6 +11,8 @@ from pathlib import Path
 from typing import Optional, Tuple
 from packaging import version as pkg_version
 
+from utils.config_store import load_json, update_json
+
 # Version info
 CURRENT_VERSION = "2.0.0"
 
@@ -34,34 +36,28 @@ def get_current_version() -> str:
     Returns:
         Version string
     """
-    # Check framework config first
-    if FRAMEWORK_CONFIG.exists():
-        try:
-            with open(FRAMEWORK_CONFIG, "r") as f:
-                config = json.load(f)
-                if "framework_version" in config:
-                    return config["framework_version"]
-        except (json.JSONDecodeError, IOError):
-            pass
+    # Check framework config first (both files come from the config store)
+    config = load_json(FRAMEWORK_CONFIG)
+    if isinstance(config, dict) and "framework_version" in config:
+        return config["framework_version"]
 
     # Check settings.json
-    if SETTINGS_PATH.exists():
-        try:
-            with open(SETTINGS_PATH, "r") as f:
-                settings = json.load(f)
-                version = settings.get("framework", {}).get("version")
-                if version:
-                    return version
-        except (json.JSONDecodeError, IOError):
-            pass
+    settings = load_json(SETTINGS_PATH)
+    if isinstance(settings, dict):
+        version = settings.get("framework", {}).get("version")
+        if version:
+            return version
 
     return CURRENT_VERSION
 
 
-def get_latest_version() -> Optional[str]:
+def get_latest_version(timeout: float = 5) -> Optional[str]:
     """
     Get the latest available version from GitHub releases.
 
+    Args:
+        timeout: Network timeout in seconds
+
     Returns:
         Latest version string or None if can't fetch
     """
@@ -71,7 +67,7 @@ def get_latest_version() -> Optional[str]:
             headers={"Accept": "application/vnd.github.v3+json"}
         )
 
-        with urllib.request.urlopen(req, timeout=5) as response:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
             data = json.loads(response.read().decode())
             tag_name = data.get("tag_name", "")
 
@@ -85,15 +81,19 @@ def get_latest_version() -> Optional[str]:
         return None
 
 
-def is_update_available() -> bool:
+def is_update_available(latest: Optional[str] = None) -> bool:
     """
     Check if a newer version is available.
 
+    Args:
+        latest: Already-fetched latest version (fetched if None)
+
     Returns:
         True if update available
     """
     current = get_current_version()
-    latest = get_latest_version()
+    if latest is None:
+        latest = get_latest_version()
 
     if not latest:
         return False
@@ -136,17 +136,21 @@ def compare_versions(v1: str, v2: str) -> int:
             return 0
 
 
-def get_update_info() -> Optional[dict]:
+def get_update_info(latest: Optional[str] = None) -> Optional[dict]:
     """
     Get detailed update information.
 
+    Args:
+        latest: Already-fetched latest version (fetched if None)
+
     Returns:
         Dictionary with update details or None if no update
     """
     current = get_current_version()
-    latest = get_latest_version()
+    if latest is None:
+        latest = get_latest_version()
 
-    if not latest or not is_update_available():
+    if not latest or not is_update_available(latest):
         return None
 
     return {
@@ -166,23 +170,15 @@ def update_version_in_config(new_version: str) -> bool:
     Returns:
         True if successful
     """
-    config = {}
-
-    if FRAMEWORK_CONFIG.exists():
-        try:
-            with open(FRAMEWORK_CONFIG, "r") as f:
-                config = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
-
-    config["framework_version"] = new_version
+    def apply(config):
+        config = config if isinstance(config, dict) else {}
+        config["framework_version"] = new_version
+        return config
 
     try:
-        FRAMEWORK_CONFIG.parent.mkdir(parents=True, exist_ok=True)
-        with open(FRAMEWORK_CONFIG, "w") as f:
-            json.dump(config, f, indent=2)
+        update_json(FRAMEWORK_CONFIG, apply)
         return True
-    except IOError:
+    except OSError:
         return False
 
 
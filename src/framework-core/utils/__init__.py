@@ -2,17 +2,45 @@
 Framework utilities module.
 
 Utilities:
-- parallel: ThreadPoolExecutor wrapper for parallel task execution
+- parallel: ThreadPoolExecutor wrapper for parallel and dependency-graph task execution
 - logger: JSON-based structured logging
+- log_index: SQLite index behind log queries and per-day task stats
+- sketch: Mergeable latency quantile sketches
+- stats: Task latency summaries and Prometheus export
+- regression: Rolling-baseline (EWMA) detection of slowed-down tasks
 - result: TaskResult and ProtocolResult dataclasses
+- cancellation: CancellationToken and cancellable subprocess helper
+- context: RunContext for run-scoped memoization
+- config_store: Process-wide, stat-validated cache of parsed config files
+- state_file: Atomic (temp file, fsync, rename) state writes and fcntl advisory locks
+- trace: Chrome trace-event timeline of tasks and nested spans
+- resources: Resource-class semaphores and reader/writer locks (network, disk, git)
+- scheduler: History-driven schedule planning (priorities, inline tasks, pool size)
+- usage: Per-task CPU, RSS, subprocess and I/O accounting (--resources)
+- hooks: Task lifecycle observers (JSON logger, tracer, metrics)
+- encoding: Streaming compact JSON output of results (orjson when installed)
 """
 
-from .parallel import run_tasks_parallel, time_task
+from .parallel import (
+    run_tasks_parallel, run_tasks_parallel_async, run_task_graph,
+    iter_tasks_parallel, iter_task_graph, map_parallel, TaskDefinition, TaskGroup, time_task,
+)
 from .logger import log_task, setup_logging
 from .result import TaskResult, ProtocolResult
+from .cancellation import CancellationToken, TaskCancelledError
+from .context import RunContext
+from .trace import Tracer, span
+from .scheduler import SchedulePlan, plan_schedule
+from .hooks import TaskObserver, register_observer, unregister_observer, observing
 
 __all__ = [
-    "run_tasks_parallel", "time_task",
+    "run_tasks_parallel", "run_tasks_parallel_async", "run_task_graph",
+    "iter_tasks_parallel", "iter_task_graph", "map_parallel", "TaskDefinition", "TaskGroup", "time_task",
     "log_task", "setup_logging",
     "TaskResult", "ProtocolResult",
+    "CancellationToken", "TaskCancelledError",
+    "RunContext",
+    "Tracer", "span",
+    "SchedulePlan", "plan_schedule",
+    "TaskObserver", "register_observer", "unregister_observer", "observing",
 ]
@@ -0,0 +1,199 @@
+"""
+Cooperative cancellation for protocol runs.
+
+The runner creates one CancellationToken per run and a child token per
+task. Cancelling a token:
+- flips a flag that cooperative tasks poll (cancelled / raise_if_cancelled)
+- terminates every child process started through run_subprocess
+- cascades to child tokens
+
+The token of the task executing on the current thread (or asyncio task)
+is available through current_token(), so helpers such as
+_run_git_command can register their subprocesses without the token
+being threaded through every call.
+"""
+
+import contextvars
+import subprocess
+import threading
+import time
+from typing import List, Optional
+
+from .usage import record_subprocess
+
+# Token of the task running in the current context
+_current_token: contextvars.ContextVar = contextvars.ContextVar("cancel_token", default=None)
+
+
+class TaskCancelledError(Exception):
+    """Exception raised inside a task whose run has been cancelled."""
+
+
+class CancellationToken:
+    """
+    Thread-safe cancellation flag with subprocess tracking.
+
+    Attributes:
+        reason: Why the token was cancelled (None while active)
+    """
+
+    def __init__(self, parent: Optional["CancellationToken"] = None):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._processes: List[subprocess.Popen] = []
+        self._children: List["CancellationToken"] = []
+        self.reason: Optional[str] = None
+
+        if parent is not None:
+            parent._add_child(self)
+
+    @property
+    def cancelled(self) -> bool:
+        """True once cancel() has been called on this token or a parent."""
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        """
+        Cancel the token, its children and their tracked subprocesses.
+
+        Args:
+            reason: Human-readable cancellation reason
+        """
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            processes = list(self._processes)
+            children = list(self._children)
+
+        for process in processes:
+            _terminate(process)
+        for child in children:
+            child.cancel(reason)
+
+    def raise_if_cancelled(self) -> None:
+        """Raise TaskCancelledError if the token has been cancelled."""
+        if self._event.is_set():
+            raise TaskCancelledError(self.reason or "cancelled")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until cancelled or timeout expires.
+
+        Returns:
+            True if the token was cancelled
+        """
+        return self._event.wait(timeout)
+
+    def child(self) -> "CancellationToken":
+        """Create a token that is cancelled together with this one."""
+        return CancellationToken(parent=self)
+
+    def register_process(self, process: subprocess.Popen) -> None:
+        """Track a child process; it is terminated immediately if already cancelled."""
+        with self._lock:
+            if not self._event.is_set():
+                self._processes.append(process)
+                return
+        _terminate(process)
+
+    def unregister_process(self, process: subprocess.Popen) -> None:
+        """Stop tracking a finished child process."""
+        with self._lock:
+            try:
+                self._processes.remove(process)
+            except ValueError:
+                pass
+
+    def _add_child(self, child: "CancellationToken") -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._children.append(child)
+                return
+        child.cancel(self.reason or "cancelled")
+
+
+def _terminate(process: subprocess.Popen) -> None:
+    """Kill a child process, ignoring ones that already exited."""
+    try:
+        process.kill()
+    except (ProcessLookupError, OSError):
+        pass
+
+
+def current_token() -> Optional[CancellationToken]:
+    """Get the cancellation token of the task running in this context."""
+    return _current_token.get()
+
+
+def set_current_token(token: Optional[CancellationToken]) -> contextvars.Token:
+    """
+    Make token the current one for this context.
+
+    Returns:
+        A contextvars token to pass to reset_current_token
+    """
+    return _current_token.set(token)
+
+
+def reset_current_token(reset: contextvars.Token) -> None:
+    """Restore the token that was current before set_current_token."""
+    _current_token.reset(reset)
+
+
+def run_subprocess(
+    cmd: List[str],
+    check: bool = False,
+    cwd: Optional[str] = None,
+    env: Optional[dict] = None
+) -> subprocess.CompletedProcess:
+    """
+    Run a command like subprocess.run(capture_output=True, text=True).
+
+    When called from a task, the child process is registered with the
+    task's cancellation token and killed if the run is cancelled.
+
+    Args:
+        cmd: Command and arguments
+        check: Raise CalledProcessError on non-zero exit
+        cwd: Working directory
+        env: Environment (default: inherit)
+
+    Returns:
+        CompletedProcess result
+
+    Raises:
+        TaskCancelledError: If the run was cancelled before or during the call
+    """
+    token = current_token()
+    started = time.perf_counter()
+    if token is None:
+        try:
+            return subprocess.run(cmd, capture_output=True, text=True, check=check, cwd=cwd, env=env)
+        finally:
+            record_subprocess(cmd, time.perf_counter() - started)
+
+    token.raise_if_cancelled()
+
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=cwd,
+        env=env
+    )
+    token.register_process(process)
+    try:
+        stdout, stderr = process.communicate()
+    finally:
+        token.unregister_process(process)
+        record_subprocess(cmd, time.perf_counter() - started)
+
+    token.raise_if_cancelled()
+
+    result = subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+    if check:
+        result.check_returncode()
+    return result
@@ -0,0 +1,195 @@
+"""
+Process-wide cache of parsed JSON config files.
+
+load_json() parses a file once and keeps the document together with the
+file's (st_mtime_ns, st_size, st_ino) signature. Later calls revalidate
+with a single stat() and only parse again when the signature changed,
+so a command that reads .framework-config a dozen times parses it once.
+Concurrent loads of the same file from parallel tasks are coalesced:
+one thread parses, the others wait for its result.
+
+save_json() writes through the store, so the written document is
+cached right away under the new signature. Writes are atomic (see
+utils.state_file), and update_json() runs a read-modify-write under the
+file's advisory lock.
+
+Cached documents are shared; callers copy before mutating.
+"""
+
+import copy
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from .state_file import atomic_write_json, locked
+
+PathLike = Union[str, Path]
+Signature = Tuple[int, int, int]
+
+
+def _signature(st: os.stat_result) -> Signature:
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class _Document:
+    """A parsed file and the signature of the version that was parsed."""
+    __slots__ = ("signature", "value")
+
+    def __init__(self, signature: Signature, value: Any):
+        self.signature = signature
+        self.value = value
+
+
+class ConfigStore:
+    """
+    Thread-safe, stat-validated cache of parsed JSON files.
+
+    Attributes:
+        hits: Loads answered from the cache
+        misses: Loads that parsed the file
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._documents: Dict[str, _Document] = {}
+        self._load_locks: Dict[str, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, path: PathLike) -> Optional[Any]:
+        """
+        Return the parsed contents of a JSON file.
+
+        Args:
+            path: File to read (relative paths resolve against the
+                current directory)
+
+        Returns:
+            Parsed document, or None if the file is missing, unreadable
+            or not valid JSON
+        """
+        key = os.path.abspath(path)
+        try:
+            signature = _signature(os.stat(key))
+        except OSError:
+            return None
+
+        document = self._documents.get(key)
+        if document is not None and document.signature == signature:
+            self.hits += 1
+            return document.value
+
+        with self._load_lock(key):
+            # Another thread may have loaded this version while we waited
+            document = self._documents.get(key)
+            if document is not None and document.signature == signature:
+                self.hits += 1
+                return document.value
+
+            self.misses += 1
+            try:
+                with open(key, "rb") as f:
+                    # Key the document by what was actually read
+                    signature = _signature(os.fstat(f.fileno()))
+                    data = f.read()
+            except OSError:
+                return None
+            try:
+                value = json.loads(data)
+            except ValueError:
+                # Cache the failure too, so a broken file is parsed once
+                value = None
+            self._documents[key] = _Document(signature, value)
+            return value
+
+    def save(self, path: PathLike, value: Any, indent: Optional[int] = 2) -> None:
+        """
+        Write value as JSON and cache it.
+
+        Raises:
+            OSError: If the file cannot be written (the cached entry is
+                dropped)
+        """
+        key = os.path.abspath(path)
+        with self._load_lock(key):
+            try:
+                atomic_write_json(key, value, indent=indent)
+                signature = _signature(os.stat(key))
+            except OSError:
+                self._documents.pop(key, None)
+                raise
+            self._documents[key] = _Document(signature, value)
+
+    def update(self, path: PathLike, mutate: Callable[[Any], Any], indent: Optional[int] = 2) -> Any:
+        """
+        Read, change and write a JSON file under its advisory lock.
+
+        Args:
+            path: File to update
+            mutate: Called with the current document (None if the file is
+                missing or invalid); returns the document to write. It
+                may change its argument, which is a private copy.
+            indent: JSON indentation
+
+        Returns:
+            The document written
+
+        Raises:
+            OSError: If the file cannot be written
+        """
+        with locked(path):
+            # Fresh after the lock: any earlier writer changed the signature
+            current = copy.deepcopy(self.load(path))
+            value = mutate(current)
+            self.save(path, value, indent)
+            return value
+
+    def invalidate(self, path: Optional[PathLike] = None) -> None:
+        """Forget one file, or every file when path is None."""
+        with self._lock:
+            if path is None:
+                self._documents.clear()
+            else:
+                self._documents.pop(os.path.abspath(path), None)
+
+    def _load_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            lock = self._load_locks.get(key)
+            if lock is None:
+                lock = self._load_locks[key] = threading.Lock()
+            return lock
+
+    def _reset_locks(self) -> None:
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+
+# Store shared by the whole process
+_store = ConfigStore()
+
+
+def get_config_store() -> ConfigStore:
+    """Get the process-wide ConfigStore."""
+    return _store
+
+
+def load_json(path: PathLike) -> Optional[Any]:
+    """Parsed contents of a JSON file via the process-wide store (see ConfigStore.load)."""
+    return _store.load(path)
+
+
+def save_json(path: PathLike, value: Any, indent: Optional[int] = 2) -> None:
+    """Write a JSON file through the process-wide store (see ConfigStore.save)."""
+    _store.save(path, value, indent)
+
+
+def update_json(path: PathLike, mutate: Callable[[Any], Any], indent: Optional[int] = 2) -> Any:
+    """Read-modify-write a JSON file via the process-wide store (see ConfigStore.update)."""
+    return _store.update(path, mutate, indent)
+
+
+if hasattr(os, "register_at_fork"):
+    # A lock held by another thread at fork time would never be released in the child
+    os.register_at_fork(after_in_child=_store._reset_locks)
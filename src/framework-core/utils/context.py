@@ -0,0 +1,198 @@
+"""
+Run-scoped memoization for repeated lookups.
+
+A RunContext lives for one protocol run. Lookups such as is_git_repo(),
+get_status() and get_diff_stat() go through memoize(), which
+computes each key once per run; concurrent callers of the same key wait
+for the single in-flight computation instead of repeating it. Tasks
+that change state (staging, committing) call
+invalidate() so later lookups recompute.
+
+The runner propagates the current context to worker threads. Outside a
+run (no current context) memoize() simply calls through.
+"""
+
+import contextvars
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from .cancellation import TaskCancelledError, current_token
+
+# Context of the run in progress
+_current_context: contextvars.ContextVar = contextvars.ContextVar("run_context", default=None)
+
+# How often a waiter re-checks its own cancellation token (seconds)
+_POLL_INTERVAL_S = 0.05
+
+
+class _Entry:
+    """A memoized value, or a computation still in flight."""
+    __slots__ = ("ready", "value", "error")
+
+    def __init__(self):
+        self.ready = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class RunContext:
+    """
+    Thread-safe, single-flight memo table for one protocol run.
+
+    Attributes:
+        hits: Lookups answered from the table (including waits on an
+            in-flight computation)
+        misses: Lookups that ran the computation
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        copy: Optional[Callable[[Any], Any]] = None
+    ) -> Any:
+        """
+        Return the memoized value for key, computing it at most once.
+
+        Exceptions are re-raised to every waiter but not cached. A
+        TaskCancelledError is the exception of the computing task only
+        (e.g. its timeout_s expired): a waiter that was not cancelled
+        itself computes the value again instead. Waiting stops as soon
+        as the waiter's own task is cancelled.
+
+        Args:
+            key: Lookup key (e.g. "git.status")
+            compute: Zero-argument function producing the value
+            copy: Optional function applied to the value before it is
+                returned, so callers can mutate their copy safely
+
+        Returns:
+            The (copied) value
+
+        Raises:
+            TaskCancelledError: If the calling task is cancelled while
+                waiting
+        """
+        token = current_token()
+        while True:
+            with self._lock:
+                entry = self._entries.get(key)
+                owner = entry is None
+                if owner:
+                    entry = _Entry()
+                    self._entries[key] = entry
+                    self.misses += 1
+                else:
+                    self.hits += 1
+
+            if owner:
+                try:
+                    entry.value = compute()
+                except BaseException as e:
+                    entry.error = e
+                    with self._lock:
+                        if self._entries.get(key) is entry:
+                            del self._entries[key]
+                    raise
+                finally:
+                    entry.ready.set()
+                break
+
+            if token is None:
+                entry.ready.wait()
+            else:
+                while not entry.ready.wait(_POLL_INTERVAL_S):
+                    token.raise_if_cancelled()
+            if entry.error is None:
+                break
+            if isinstance(entry.error, TaskCancelledError) and not (token is not None and token.cancelled):
+                # The owner was cancelled, not us: elect a new owner
+                continue
+            raise entry.error
+
+        return copy(entry.value) if copy is not None else entry.value
+
+    def invalidate(self, *keys: str) -> None:
+        """Forget the given keys; in-flight computations still finish for their waiters."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def invalidate_prefix(self, prefix: str) -> None:
+        """Forget every key starting with prefix (e.g. "config.")."""
+        with self._lock:
+            for key in [k for k in self._entries if k.startswith(prefix)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Forget everything."""
+        with self._lock:
+            self._entries.clear()
+
+    @contextmanager
+    def activate(self) -> Iterator["RunContext"]:
+        """Make this the current context for the duration of a with block."""
+        reset = _current_context.set(self)
+        try:
+            yield self
+        finally:
+            _current_context.reset(reset)
+
+
+def current_context() -> Optional[RunContext]:
+    """Get the RunContext of the run in progress, if any."""
+    return _current_context.get()
+
+
+def set_current_context(context: Optional[RunContext]) -> contextvars.Token:
+    """
+    Make context the current one.
+
+    Returns:
+        A contextvars token to pass to reset_current_context
+    """
+    return _current_context.set(context)
+
+
+def reset_current_context(reset: contextvars.Token) -> None:
+    """Restore the context that was current before set_current_context."""
+    _current_context.reset(reset)
+
+
+def memoize(key: str, compute: Callable[[], Any], copy: Optional[Callable[[Any], Any]] = None) -> Any:
+    """
+    Memoize compute() under key in the current run, or call it directly.
+
+    Args:
+        key: Lookup key
+        compute: Zero-argument function producing the value
+        copy: Optional function applied to the returned value
+
+    Returns:
+        The (copied) value
+    """
+    context = _current_context.get()
+    if context is None:
+        return compute()
+    return context.get_or_compute(key, compute, copy)
+
+
+def invalidate(*keys: str) -> None:
+    """Invalidate keys in the current run, if any."""
+    context = _current_context.get()
+    if context is not None:
+        context.invalidate(*keys)
+
+
+def invalidate_prefix(prefix: str) -> None:
+    """Invalidate every key starting with prefix in the current run, if any."""
+    context = _current_context.get()
+    if context is not None:
+        context.invalidate_prefix(prefix)
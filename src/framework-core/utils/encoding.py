@@ -0,0 +1,97 @@
+"""
+Compact JSON output for results.
+
+write_json() streams a TaskResult or ProtocolResult to a text stream
+piece by piece: the result objects are walked through their
+_json_items() and only the leaf values (task data, lists of files, ...)
+are encoded, so the intermediate dict tree of to_dict() is never built.
+
+Leaf values are encoded with orjson when it is installed and with the
+standard json module otherwise; both produce compact JSON (no spaces
+after separators). Values orjson rejects (e.g. non-string keys or
+integers beyond 64 bits) fall back to json.
+"""
+
+import json
+import sys
+from typing import Any, Dict, Iterator, Optional, TextIO
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_SEPARATORS = (",", ":")
+
+
+def dumps(value: Any) -> str:
+    """Encode a plain JSON value compactly with the fastest available encoder."""
+    if orjson is not None:
+        try:
+            return orjson.dumps(value).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(value, separators=_SEPARATORS)
+
+
+def _is_result(value: Any) -> bool:
+    return hasattr(value, "_json_items")
+
+
+def iter_json(value: Any, leading: Optional[Dict[str, Any]] = None) -> Iterator[str]:
+    """
+    Yield the compact JSON text of a value in pieces.
+
+    Args:
+        value: Result object, list of result objects, or plain JSON value
+        leading: Keys written before a result object's own keys
+
+    Yields:
+        Consecutive pieces of the JSON text
+    """
+    if _is_result(value):
+        yield "{"
+        separator = ""
+        items = list(leading.items()) if leading else []
+        for key, item in items:
+            yield f"{separator}{dumps(key)}:{dumps(item)}"
+            separator = ","
+        for key, item in value._json_items():
+            yield f"{separator}{dumps(key)}:"
+            separator = ","
+            yield from iter_json(item)
+        yield "}"
+    elif isinstance(value, list) and value and _is_result(value[0]):
+        yield "["
+        for index, item in enumerate(value):
+            if index:
+                yield ","
+            yield from iter_json(item)
+        yield "]"
+    else:
+        yield dumps(value)
+
+
+def write_json(
+    value: Any,
+    stream: Optional[TextIO] = None,
+    leading: Optional[Dict[str, Any]] = None,
+    flush: bool = False
+) -> None:
+    """
+    Write a value as one line of compact JSON.
+
+    Args:
+        value: Result object or plain JSON value
+        stream: Destination (default: sys.stdout)
+        leading: Keys written before a result object's own keys
+        flush: Flush the stream afterwards
+    """
+    if stream is None:
+        stream = sys.stdout
+    write = stream.write
+    for piece in iter_json(value, leading):
+        write(piece)
+    write("\n")
+    if flush:
+        stream.flush()
@@ -0,0 +1,210 @@
+"""
+Task lifecycle hooks.
+
+Observers registered with register_observer() are notified by the
+runners and protocols:
+- on_task_start(task): a task is about to run (on its worker thread)
+- on_task_end(task, result): it finished, with timing already stamped
+- on_protocol_end(result): a protocol returned its ProtocolResult
+
+Tasks that never start (skipped dependents, cancelled runs) produce no
+task events. With no observers registered the runner pays one module
+attribute check per task.
+
+Built-in observers:
+- JsonLogObserver: writes task and protocol entries through
+  utils.logger (these entries are the duration history read by
+  utils.scheduler)
+- TraceObserver: adds a span per task to a Tracer
+- MetricsObserver: aggregates counts and durations in memory
+
+An observer that raises is reported on stderr and does not affect the
+task or the other observers.
+"""
+
+import contextvars
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# Registered observers; replaced (never mutated) on change so the runner
+# can read it without locking
+observers: Tuple["TaskObserver", ...] = ()
+
+_registry_lock = threading.Lock()
+
+# Name of the protocol running in the current context
+_current_protocol: contextvars.ContextVar = contextvars.ContextVar("protocol", default=None)
+
+
+class TaskObserver:
+    """Base class for observers; override the hooks you need."""
+
+    def on_task_start(self, task: Any) -> None:
+        """Called before a task runs (task is a TaskDefinition)."""
+
+    def on_task_end(self, task: Any, result: Any) -> None:
+        """Called after a task ran (result is its TaskResult)."""
+
+    def on_protocol_end(self, result: Any) -> None:
+        """Called when a protocol finished (result is its ProtocolResult)."""
+
+
+def register_observer(observer: TaskObserver) -> None:
+    """Start notifying an observer."""
+    global observers
+    with _registry_lock:
+        if observer not in observers:
+            observers = observers + (observer,)
+
+
+def unregister_observer(observer: TaskObserver) -> None:
+    """Stop notifying an observer (no-op if it is not registered)."""
+    global observers
+    with _registry_lock:
+        observers = tuple(o for o in observers if o is not observer)
+
+
+@contextmanager
+def observing(observer: TaskObserver) -> Iterator[TaskObserver]:
+    """Register an observer for the duration of a with block."""
+    register_observer(observer)
+    try:
+        yield observer
+    finally:
+        unregister_observer(observer)
+
+
+@contextmanager
+def protocol_scope(protocol: str) -> Iterator[None]:
+    """Mark the tasks run inside the with block as belonging to protocol."""
+    reset = _current_protocol.set(protocol)
+    try:
+        yield
+    finally:
+        _current_protocol.reset(reset)
+
+
+def current_protocol() -> Optional[str]:
+    """Name of the protocol running in the current context, if any."""
+    return _current_protocol.get()
+
+
+def _notify(hook: str, *args: Any) -> None:
+    for observer in observers:
+        try:
+            getattr(observer, hook)(*args)
+        except Exception as e:
+            print(f"[WARN] {type(observer).__name__}.{hook} failed: {e}", file=sys.stderr)
+
+
+def notify_task_start(task: Any) -> None:
+    """Call on_task_start on every observer."""
+    _notify("on_task_start", task)
+
+
+def notify_task_end(task: Any, result: Any) -> None:
+    """Call on_task_end on every observer."""
+    _notify("on_task_end", task, result)
+
+
+def notify_protocol_end(result: Any) -> None:
+    """Call on_protocol_end on every observer."""
+    if observers:
+        _notify("on_protocol_end", result)
+
+
+class JsonLogObserver(TaskObserver):
+    """Log every finished task and protocol to the JSON logs."""
+
+    def on_task_end(self, task: Any, result: Any) -> None:
+        from .logger import log_task
+
+        duration_ms = result.duration_ms
+        if result.duration_ns is not None:
+            # Keep sub-millisecond precision; it decides inline execution
+            duration_ms = round(result.duration_ns / 1e6, 3)
+
+        details: Dict[str, Any] = {"worker": result.worker, "queue_wait_ms": result.queue_wait_ms}
+        if result.error is not None:
+            details["error"] = result.error
+
+        log_task(result.name, result.status.value, duration_ms, protocol=current_protocol() or "general", details=details)
+
+    def on_protocol_end(self, result: Any) -> None:
+        from .logger import log_protocol
+
+        log_protocol(
+            result.protocol,
+            result.status.value,
+            result.total_duration_ms,
+            task_count=len(result.tasks),
+            error_count=result.error_count,
+            summary=result.summary
+        )
+
+
+class TraceObserver(TaskObserver):
+    """
+    Add a span per task to a Tracer.
+
+    Args:
+        tracer: Tracer to record into
+    """
+
+    def __init__(self, tracer: Any):
+        self.tracer = tracer
+
+    def on_task_end(self, task: Any, result: Any) -> None:
+        if result.started_at is None or result.ended_at is None:
+            return
+        self.tracer.add_span(task.name, result.started_at, result.ended_at, "task", {
+            "status": result.status.value,
+            "queue_wait_ms": result.queue_wait_ms,
+            "executor": task.executor,
+        })
+
+
+class MetricsObserver(TaskObserver):
+    """Aggregate task counts, durations and queue waits in memory."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tasks: Dict[str, Dict[str, Any]] = {}
+        self._protocols: Dict[str, int] = {}
+
+    def on_task_end(self, task: Any, result: Any) -> None:
+        duration_ms = result.duration_ns / 1e6 if result.duration_ns is not None else float(result.duration_ms)
+        with self._lock:
+            stats = self._tasks.setdefault(task.name, {
+                "count": 0,
+                "statuses": {},
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "queue_wait_ms": 0.0,
+            })
+            stats["count"] += 1
+            stats["statuses"][result.status.value] = stats["statuses"].get(result.status.value, 0) + 1
+            stats["total_ms"] += duration_ms
+            stats["max_ms"] = max(stats["max_ms"], duration_ms)
+            stats["queue_wait_ms"] += result.queue_wait_ms or 0.0
+
+    def on_protocol_end(self, result: Any) -> None:
+        with self._lock:
+            self._protocols[result.protocol] = self._protocols.get(result.protocol, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Aggregated metrics so far (task name -> stats, protocol -> runs)."""
+        with self._lock:
+            tasks = {}
+            for name, stats in self._tasks.items():
+                tasks[name] = {
+                    "count": stats["count"],
+                    "statuses": dict(stats["statuses"]),
+                    "total_ms": round(stats["total_ms"], 3),
+                    "mean_ms": round(stats["total_ms"] / stats["count"], 3),
+                    "max_ms": round(stats["max_ms"], 3),
+                    "queue_wait_ms": round(stats["queue_wait_ms"], 3),
+                }
+            return {"tasks": tasks, "protocols": dict(self._protocols)}
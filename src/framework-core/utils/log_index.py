@@ -0,0 +1,419 @@
+"""
+SQLite index of the protocol logs.
+
+The log writer (utils/logger.py) adds every entry it appends to
+{log_dir}/index.sqlite, one row per entry with the fields queries
+filter on (protocol, day, timestamp, type, task, status, duration) and
+the entry itself. query_logs() in utils/logger.py then answers
+"all security_scan runs over 2 s this month" from the index instead of
+parsing every daily file. Task entries also update a LatencySketch per
+protocol, task and day (see utils.sketch), so task_stats() merges a few
+sketches instead of reading entries.
+
+The index is derived data: it is built from the existing log files the
+first time it is opened, rows of deleted log files are pruned by
+rotation, and rebuild() recreates it from the files. When the sqlite3
+module is unavailable or the database cannot be used, the logger falls
+back to scanning the files.
+
+Several processes share one index. A writer appends entries to the log
+file inside the index's write transaction (see add()), so a rebuild
+never sees entries that are about to be indexed. Entries that were
+written but could not be indexed (e.g. the database stayed busy past
+the timeout, or this process runs without SQLite) leave an
+index.stale marker next to the index; readers seeing it rebuild the
+index from the files before trusting it.
+"""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .sketch import LatencySketch
+
+try:
+    import sqlite3
+except ImportError:  # Python built without SQLite
+    sqlite3 = None
+
+INDEX_FILE = "index.sqlite"
+
+# Present while the log files hold entries the index is missing
+STALE_FILE = "index.stale"
+
+# Bumped when the tables change; an index of another version is rebuilt
+_SCHEMA_VERSION = "2"
+
+# Seconds to wait for another process holding the database
+_BUSY_TIMEOUT_S = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    protocol TEXT NOT NULL,
+    day TEXT NOT NULL,
+    ts TEXT,
+    type TEXT NOT NULL,
+    task TEXT,
+    status TEXT,
+    duration_ms REAL,
+    entry TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_task ON entries (task, ts);
+CREATE INDEX IF NOT EXISTS entries_protocol ON entries (protocol, ts);
+CREATE INDEX IF NOT EXISTS entries_ts ON entries (ts);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS task_stats (
+    protocol TEXT NOT NULL,
+    task TEXT NOT NULL,
+    day TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    sketch TEXT NOT NULL,
+    PRIMARY KEY (protocol, task, day)
+);
+"""
+
+# Statuses counted as failures in task statistics
+FAILURE_STATUSES = ("error", "timeout")
+
+# (protocol, day, entry) triples as produced by the logger
+Rows = Iterable[Tuple[str, str, Dict[str, Any]]]
+
+
+def entry_type(entry: Dict[str, Any]) -> str:
+    """Kind of a log entry: its "type", or "task" for plain task entries."""
+    return entry.get("type") or ("task" if "task" in entry else "entry")
+
+
+class TaskStats:
+    """Run count, failure count and duration sketch of one task."""
+
+    __slots__ = ("total", "failures", "sketch")
+
+    def __init__(self, total: int = 0, failures: int = 0, sketch: Optional[LatencySketch] = None):
+        self.total = total
+        self.failures = failures
+        self.sketch = sketch or LatencySketch()
+
+    def add_entry(self, entry: Dict[str, Any]) -> None:
+        """Count a task log entry; skipped tasks add no duration."""
+        self.total += 1
+        status = entry.get("status")
+        if status in FAILURE_STATUSES:
+            self.failures += 1
+        if status == "skipped":
+            return
+        try:
+            self.sketch.add(float(entry["duration_ms"]))
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    def merge(self, other: "TaskStats") -> None:
+        """Add another TaskStats' counts and durations to this one."""
+        self.total += other.total
+        self.failures += other.failures
+        self.sketch.merge(other.sketch)
+
+
+def collect_stats(rows: Rows, into: Dict[Tuple[str, str, str], TaskStats]) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """Pass rows through, accumulating per (protocol, task, day) stats of task entries into into."""
+    for protocol, day, entry in rows:
+        if entry_type(entry) == "task" and entry.get("task"):
+            key = (protocol, entry["task"], day)
+            if key not in into:
+                into[key] = TaskStats()
+            into[key].add_entry(entry)
+        yield protocol, day, entry
+
+
+def _row(protocol: str, day: str, entry: Dict[str, Any]) -> Tuple[Any, ...]:
+    duration = entry.get("duration_ms", entry.get("total_duration_ms"))
+    try:
+        duration = float(duration) if duration is not None else None
+    except (TypeError, ValueError):
+        duration = None
+    return (
+        protocol,
+        day,
+        entry.get("timestamp"),
+        entry_type(entry),
+        entry.get("task"),
+        entry.get("status"),
+        duration,
+        json.dumps(entry, separators=(",", ":"), default=str),
+    )
+
+
+class LogIndex:
+    """
+    Connection to the index of one log directory (thread-safe).
+
+    Args:
+        log_dir: Log directory holding index.sqlite
+    """
+
+    def __init__(self, log_dir: Path):
+        self.path = Path(log_dir) / INDEX_FILE
+        self.stale_path = Path(log_dir) / STALE_FILE
+        self._lock = threading.Lock()
+        self._conn = None
+
+    @staticmethod
+    def available() -> bool:
+        """Check whether SQLite can be used at all."""
+        return sqlite3 is not None
+
+    def exists(self) -> bool:
+        """Check whether a built index is present."""
+        return self.path.is_file()
+
+    def is_stale(self) -> bool:
+        """Check whether entries were logged without being indexed."""
+        return self.stale_path.exists()
+
+    def mark_stale(self) -> None:
+        """Record that the log files hold entries missing from an existing index."""
+        if not self.exists():
+            return  # a new index is filled from the files anyway
+        try:
+            self.stale_path.touch()
+        except OSError:
+            pass
+
+    def open(self, backfill: Callable[[], Rows]) -> None:
+        """
+        Open (creating if needed) the index.
+
+        A new (or outdated) index is filled from backfill() before it is
+        marked ready, inside one write transaction, so concurrent
+        processes do not build it twice.
+
+        Raises:
+            sqlite3.Error: If the database cannot be used
+        """
+        if self._conn is not None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT_S, check_same_thread=False, isolation_level=None)
+        try:
+            conn.executescript(_SCHEMA)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ready = conn.execute("SELECT value FROM meta WHERE key = 'ready'").fetchone()
+                if ready is None or ready[0] != _SCHEMA_VERSION:
+                    try:
+                        self.stale_path.unlink()
+                    except FileNotFoundError:
+                        pass
+                    conn.execute("DELETE FROM entries")
+                    conn.execute("DELETE FROM task_stats")
+                    stats: Dict[Tuple[str, str, str], TaskStats] = {}
+                    conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (_row(*r) for r in collect_stats(backfill(), stats)))
+                    _store_stats(conn, stats)
+                    conn.execute("INSERT OR REPLACE INTO meta VALUES ('ready', ?)", (_SCHEMA_VERSION,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except BaseException:
+            conn.close()
+            raise
+        self._conn = conn
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def add(self, rows: Rows, write: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Index entries appended to the log files.
+
+        Args:
+            rows: The entries
+            write: Appends the entries to their log file and returns
+                whether it succeeded; called inside the write transaction,
+                so a concurrent rebuild() sees them either in the files
+                and the index or in neither. Nothing is indexed when it
+                returns False.
+
+        Raises:
+            sqlite3.Error: If the entries could not be indexed (write was
+                called only if this is raised after BEGIN succeeded)
+        """
+        stats: Dict[Tuple[str, str, str], TaskStats] = {}
+        rows = [_row(*r) for r in collect_stats(rows, stats)]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if write is not None and not write():
+                    self._conn.execute("ROLLBACK")
+                    return
+                self._conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                _store_stats(self._conn, stats)
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def prune(self, protocol: Optional[str] = None, before_day: Optional[str] = None, day: Optional[str] = None) -> None:
+        """Drop the rows of deleted log files (one protocol's day, or everything before a day)."""
+        clauses, params = self._day_clauses(protocol, before_day, day)
+        where = " AND ".join(clauses) or "1"
+        with self._lock:
+            self._conn.execute(f"DELETE FROM entries WHERE {where}", params)
+            self._conn.execute(f"DELETE FROM task_stats WHERE {where}", params)
+
+    @staticmethod
+    def _day_clauses(protocol: Optional[str], before_day: Optional[str], day: Optional[str]) -> Tuple[List[str], List[Any]]:
+        clauses: List[str] = []
+        params: List[Any] = []
+        if protocol is not None:
+            clauses.append("protocol = ?")
+            params.append(protocol)
+        if before_day is not None:
+            clauses.append("day < ?")
+            params.append(before_day)
+        if day is not None:
+            clauses.append("day = ?")
+            params.append(day)
+        return clauses, params
+
+    def rebuild(self, rows: Callable[[], Rows]) -> int:
+        """
+        Replace the whole index with rows() and clear the stale marker.
+
+        rows() is read inside the write transaction, after the marker is
+        removed: entries logged meanwhile without being indexed mark the
+        index stale again.
+
+        Returns:
+            Number of entries indexed
+        """
+        stats: Dict[Tuple[str, str, str], TaskStats] = {}
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                try:
+                    self.stale_path.unlink()
+                except FileNotFoundError:
+                    pass
+                rows = [_row(*r) for r in collect_stats(rows(), stats)]
+                self._conn.execute("DELETE FROM entries")
+                self._conn.execute("DELETE FROM task_stats")
+                self._conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+                _store_stats(self._conn, stats)
+                self._conn.execute("INSERT OR REPLACE INTO meta VALUES ('ready', ?)", (_SCHEMA_VERSION,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                self.mark_stale()
+                raise
+        return len(rows)
+
+    def task_stats(
+        self,
+        protocol: Optional[str] = None,
+        task: Optional[str] = None,
+        since_day: Optional[str] = None
+    ) -> Dict[Tuple[str, str], TaskStats]:
+        """Per-day stats merged into one TaskStats per (protocol, task)."""
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (("protocol", protocol), ("task", task)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since_day is not None:
+            clauses.append("day >= ?")
+            params.append(since_day)
+        sql = "SELECT protocol, task, total, failures, sketch FROM task_stats"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+
+        merged: Dict[Tuple[str, str], TaskStats] = {}
+        for row_protocol, row_task, total, failures, sketch in rows:
+            day_stats = TaskStats(total, failures, LatencySketch.from_dict(json.loads(sketch)))
+            key = (row_protocol, row_task)
+            if key in merged:
+                merged[key].merge(day_stats)
+            else:
+                merged[key] = day_stats
+        return merged
+
+    def query(
+        self,
+        protocol: Optional[str] = None,
+        task: Optional[str] = None,
+        status: Optional[str] = None,
+        entry_type: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        min_duration_ms: Optional[float] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield matching entries in timestamp order.
+
+        See utils.logger.query_logs for the arguments. Rows are fetched
+        in chunks, so memory use does not depend on the result size.
+        """
+        clauses: List[str] = []
+        params: List[Any] = []
+        for column, value in (("protocol", protocol), ("task", task), ("status", status), ("type", entry_type)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("ts >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("ts < ?")
+            params.append(until)
+        if min_duration_ms is not None:
+            clauses.append("duration_ms >= ?")
+            params.append(min_duration_ms)
+
+        sql = "SELECT entry FROM entries"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ts, rowid"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        # A separate connection, so a slow consumer does not hold the lock
+        conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT_S)
+        try:
+            cursor = conn.execute(sql, params)
+            while True:
+                chunk = cursor.fetchmany(500)
+                if not chunk:
+                    return
+                for (entry,) in chunk:
+                    yield json.loads(entry)
+        finally:
+            conn.close()
+
+
+def _store_stats(conn: Any, stats: Dict[Tuple[str, str, str], TaskStats]) -> None:
+    """Merge per-day stats into the task_stats table (inside the caller's transaction)."""
+    for (protocol, task, day), day_stats in stats.items():
+        row = conn.execute(
+            "SELECT total, failures, sketch FROM task_stats WHERE protocol = ? AND task = ? AND day = ?",
+            (protocol, task, day)
+        ).fetchone()
+        if row is not None:
+            stored = TaskStats(row[0], row[1], LatencySketch.from_dict(json.loads(row[2])))
+            stored.merge(day_stats)
+            day_stats = stored
+        conn.execute(
+            "INSERT OR REPLACE INTO task_stats VALUES (?, ?, ?, ?, ?, ?)",
+            (protocol, task, day, day_stats.total, day_stats.failures,
+             json.dumps(day_stats.sketch.to_dict(), separators=(",", ":")))
+        )
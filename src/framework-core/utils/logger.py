@@ -1,32 +1,92 @@
 """
 JSON-based structured logging for framework operations.
 
-Logs to .claude/logs/{protocol}/{date}.json with automatic rotation.
+Logs to .claude/logs/{protocol}/{date}.jsonl with automatic rotation.
+
+Each entry is one JSON line appended with a single write() to a file
+opened with O_APPEND, so writing costs the same however long the file
+is, and concurrent writers (threads or CLI processes) cannot overwrite
+each other's entries. Older releases kept each day as one JSON array in
+{date}.json; the readers still understand those files, and
+convert_legacy_logs() rewrites them as JSONL.
+
+Writes happen on a background thread: log_task, log_protocol and
+log_error only put the entry on a bounded queue, and the writer appends
+the queued entries in batches, one write() per log file per batch. A
+batch is written when batch_size entries are waiting or flush_interval_s
+has passed. Pending entries are flushed on exit (atexit, and SIGTERM
+when no other handler is installed) and before get_recent_logs reads.
+
+When the queue is full, entries are dropped by default so that a task
+never waits on log I/O; the writer then logs a {"type": "dropped"} entry
+with the count. setup_logging(block_when_full=True) makes callers wait
+for room instead. With background=False every call writes synchronously.
+
+Rotation runs at most once a day (tracked by {log_dir}/.rotated) and
+works from the dates in the file names, without stat() calls except for
+the size cap: files of past days are gzipped ({date}.jsonl.gz), files
+older than max_age_days are deleted, and the oldest files of a protocol
+go once it exceeds max_protocol_bytes. Readers open .gz files
+transparently.
+
+Every written entry is also added to a SQLite index (see
+utils.log_index), which query_logs() and get_recent_logs() read from;
+without SQLite they scan the files instead.
+
+The log directory holds a .gitignore of "*", so the logs, the index and
+the rotation marker stay out of the project's commits even where the
+project's own .gitignore does not list .claude/logs/.
 """
 
+import atexit
+import gzip
+import heapq
+import itertools
 import json
 import os
+import queue
+import signal
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional
-import threading
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from .log_index import LogIndex, TaskStats, collect_stats, entry_type
 
-# Thread-safe logging
-_log_lock = threading.Lock()
+# Current and legacy log file suffixes
+LOG_SUFFIX = ".jsonl"
+LEGACY_SUFFIX = ".json"
+GZIP_SUFFIX = ".gz"
+
+# Marker file holding the date of the last rotation
+ROTATION_MARKER = ".rotated"
 
 # Global configuration
 _config = {
     "log_dir": ".claude/logs",
     "silent_mode": False,
     "max_age_days": 7,
+    "max_protocol_bytes": 50 * 1024 * 1024,
     "initialized": False,
+    "background": True,
+    "flush_interval_s": 0.2,
+    "batch_size": 256,
+    "queue_size": 10000,
+    "block_when_full": False,
 }
 
 
 def setup_logging(
     log_dir: str = ".claude/logs",
     silent_mode: bool = False,
-    max_age_days: int = 7
+    max_age_days: int = 7,
+    max_protocol_bytes: int = 50 * 1024 * 1024,
+    background: bool = True,
+    flush_interval_s: float = 0.2,
+    batch_size: int = 256,
+    queue_size: int = 10000,
+    block_when_full: bool = False
 ) -> None:
     """
     Configure the logging system.
@@ -35,39 +95,150 @@ def setup_logging(
         log_dir: Directory for log files
         silent_mode: If True, suppress stdout output
         max_age_days: Days to keep log files (0 = no rotation)
+        max_protocol_bytes: Size cap of one protocol's log files
+            (0 = no cap)
+        background: Write on a background thread (False = write in the caller)
+        flush_interval_s: Longest time an entry waits before it is written
+        batch_size: Number of waiting entries that triggers a write
+        queue_size: Entries that may wait before the full-queue policy applies
+        block_when_full: Wait for room when the queue is full instead of
+            dropping the entry
     """
     global _config
+    # Entries queued under the old settings go to the old directory
+    flush_logs()
     _config.update({
         "log_dir": log_dir,
         "silent_mode": silent_mode,
         "max_age_days": max_age_days,
+        "max_protocol_bytes": max_protocol_bytes,
         "initialized": True,
+        "background": background,
+        "flush_interval_s": flush_interval_s,
+        "batch_size": max(1, batch_size),
+        "queue_size": max(1, queue_size),
+        "block_when_full": block_when_full,
     })
+    _stop_writer()
 
-    # Ensure log directory exists
+    # Ensure log directory exists (and is ignored by git)
     Path(log_dir).mkdir(parents=True, exist_ok=True)
+    _ignore_in_git(Path(log_dir))
 
     # Run log rotation
     if max_age_days > 0:
         _rotate_logs()
 
 
-def _rotate_logs() -> None:
-    """Remove log files older than max_age_days."""
+def _ignore_in_git(directory: Path) -> None:
+    """Write a .gitignore of "*" into directory unless it has one."""
+    gitignore = directory / ".gitignore"
+    if gitignore.exists():
+        return
+    try:
+        with open(gitignore, "x") as f:
+            f.write("# Written by framework-core: logs and their index are local data\n*\n")
+    except OSError:
+        pass
+
+
+def _rotate_logs(force: bool = False) -> None:
+    """
+    Compress, expire and cap the log files, at most once a day.
+
+    Args:
+        force: Rotate even if the marker says it already ran today
+    """
     log_dir = Path(_config["log_dir"])
-    if not log_dir.exists():
+    marker = log_dir / ROTATION_MARKER
+    today = datetime.now().strftime("%Y-%m-%d")
+
+    if not force:
+        try:
+            if marker.read_text().strip() == today:
+                return
+        except OSError:
+            pass
+
+    cutoff = (datetime.now() - timedelta(days=_config["max_age_days"])).strftime("%Y-%m-%d")
+    index = _get_index(log_dir)
+
+    try:
+        protocol_dirs = [p for p in log_dir.iterdir() if p.is_dir()]
+    except OSError:
         return
 
-    cutoff = datetime.now() - timedelta(days=_config["max_age_days"])
+    for protocol_dir in protocol_dirs:
+        kept: List[Path] = []
+        for log_file in sorted(_log_files(protocol_dir), key=_log_day):
+            day = _log_day(log_file)
+            try:
+                datetime.strptime(day, "%Y-%m-%d")
+            except ValueError:
+                continue  # not a log file of ours
+            try:
+                if day < cutoff:
+                    log_file.unlink()
+                    continue
+                if day < today and log_file.suffix != GZIP_SUFFIX:
+                    log_file = _compress(log_file)
+            except OSError:
+                pass  # Skip files we can't process
+            kept.append(log_file)
+
+        if _config["max_protocol_bytes"] > 0:
+            _cap_protocol(kept, today, index)
+
+    if index is not None:
+        try:
+            index.prune(before_day=cutoff)
+        except Exception:
+            pass
+
+    try:
+        marker.write_text(today)
+    except OSError:
+        pass
+
+
+def _compress(log_file: Path) -> Path:
+    """Gzip a closed log file next to itself and remove the original."""
+    target = log_file.with_name(log_file.name + GZIP_SUFFIX)
+    tmp_path = log_file.with_name(log_file.name + ".tmp")
+    with open(log_file, "rb") as src, gzip.open(tmp_path, "wb") as dst:
+        while True:
+            chunk = src.read(1 << 20)
+            if not chunk:
+                break
+            dst.write(chunk)
+    os.replace(tmp_path, target)
+    log_file.unlink()
+    return target
+
 
-    for log_file in log_dir.rglob("*.json"):
+def _cap_protocol(files: List[Path], today: str, index: Optional[LogIndex]) -> None:
+    """Delete a protocol's oldest log files until it fits max_protocol_bytes (today's file stays)."""
+    sizes = []
+    for log_file in files:
         try:
-            # Check file modification time
-            mtime = datetime.fromtimestamp(log_file.stat().st_mtime)
-            if mtime < cutoff:
-                log_file.unlink()
-        except (OSError, ValueError):
-            pass  # Skip files we can't process
+            sizes.append((log_file, log_file.stat().st_size))
+        except OSError:
+            continue
+
+    total = sum(size for _, size in sizes)
+    for log_file, size in sizes:
+        if total <= _config["max_protocol_bytes"] or _log_day(log_file) >= today:
+            break
+        try:
+            log_file.unlink()
+        except OSError:
+            continue
+        total -= size
+        if index is not None:
+            try:
+                index.prune(protocol=log_file.parent.name, day=_log_day(log_file))
+            except Exception:
+                pass
 
 
 def _get_log_path(protocol: str) -> Path:
@@ -75,7 +246,25 @@ def _get_log_path(protocol: str) -> Path:
     date_str = datetime.now().strftime("%Y-%m-%d")
     log_dir = Path(_config["log_dir"]) / protocol
     log_dir.mkdir(parents=True, exist_ok=True)
-    return log_dir / f"{date_str}.json"
+    return log_dir / f"{date_str}{LOG_SUFFIX}"
+
+
+def _log_files(directory: Path, recursive: bool = False) -> Iterator[Path]:
+    """Log files (current and legacy format, plain or gzipped) in a directory."""
+    glob = directory.rglob if recursive else directory.glob
+    for suffix in (LOG_SUFFIX, LEGACY_SUFFIX):
+        yield from glob(f"*{suffix}")
+        yield from glob(f"*{suffix}{GZIP_SUFFIX}")
+
+
+def _log_day(log_file: Path) -> str:
+    """Date part of a log file name ("2026-01-05" for 2026-01-05.jsonl.gz)."""
+    return log_file.name.split(".", 1)[0]
+
+
+def _encode_entry(entry: Dict[str, Any]) -> bytes:
+    """One log line; default=str keeps odd values from losing the entry."""
+    return (json.dumps(entry, separators=(",", ":"), default=str) + "\n").encode("utf-8")
 
 
 def log_task(
@@ -178,77 +367,581 @@ def log_error(
 
 
 def _write_log_entry(protocol: str, entry: Dict[str, Any]) -> None:
-    """Write a log entry to the log file (thread-safe)."""
-    with _log_lock:
-        log_path = _get_log_path(protocol)
+    """Queue a log entry for today's log file (or write it now without a background writer)."""
+    if not _config["background"]:
+        _append_entries(_get_log_path(protocol), [entry])
+        return
+
+    log_path = Path(_config["log_dir"]) / protocol / f"{datetime.now().strftime('%Y-%m-%d')}{LOG_SUFFIX}"
+    _get_writer().put(log_path, entry)
+
+
+class _LogWriter:
+    """Background thread appending queued entries to their log files in batches."""
+
+    def __init__(self, queue_size: int, batch_size: int, flush_interval_s: float, block_when_full: bool):
+        # Items: (log path, entry), a threading.Event to set once everything
+        # before it is written, or None to stop
+        self._queue: queue.Queue = queue.Queue(queue_size)
+        self._batch_size = batch_size
+        self._flush_interval_s = flush_interval_s
+        self._block_when_full = block_when_full
+        self._dropped = 0
+        self._dropped_lock = threading.Lock()
+        self._directories: set = set()
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
 
-        # Read existing entries
-        entries = []
-        if log_path.exists():
+    def put(self, log_path: Path, entry: Dict[str, Any]) -> None:
+        """Queue an entry, applying the full-queue policy."""
+        try:
+            self._queue.put((log_path, entry), block=self._block_when_full)
+        except queue.Full:
+            with self._dropped_lock:
+                self._dropped += 1
+
+    def flush(self, timeout: Optional[float] = 5.0) -> None:
+        """Wait until everything queued so far is written."""
+        if not self._thread.is_alive():
+            return
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return
+        done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Write what is queued and stop the thread."""
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            return
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            batch: List[Tuple[Path, Dict[str, Any]]] = []
+            waiters: List[threading.Event] = []
+
+            # Sleep until there is work, then gather a batch for at most
+            # flush_interval_s; a flush request or stop ends it early
+            item = self._queue.get()
+            deadline = time.monotonic() + self._flush_interval_s
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self._batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if stopping:
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif item is not None:
+                        batch.append(item)
+
+            self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch: List[Tuple[Path, Dict[str, Any]]]) -> None:
+        with self._dropped_lock:
+            dropped, self._dropped = self._dropped, 0
+        if dropped and batch:
+            notice = {"timestamp": datetime.now().isoformat(), "type": "dropped", "count": dropped}
+            batch.append((batch[-1][0], notice))
+
+        per_file: Dict[Path, List[Dict[str, Any]]] = {}
+        for log_path, entry in batch:
+            per_file.setdefault(log_path, []).append(entry)
+
+        for log_path, entries in per_file.items():
+            if log_path.parent not in self._directories:
+                log_path.parent.mkdir(parents=True, exist_ok=True)
+                self._directories.add(log_path.parent)
+            _append_entries(log_path, entries)
+
+
+_writer: Optional[_LogWriter] = None
+_writer_lock = threading.Lock()
+
+
+def _get_writer() -> _LogWriter:
+    global _writer
+    writer = _writer
+    if writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = _LogWriter(
+                    _config["queue_size"],
+                    _config["batch_size"],
+                    _config["flush_interval_s"],
+                    _config["block_when_full"],
+                )
+                _install_exit_handlers()
+            writer = _writer
+    return writer
+
+
+def _stop_writer() -> None:
+    """Flush and stop the background writer (a new one starts on the next entry)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+
+def flush_logs() -> None:
+    """Write every queued log entry now."""
+    writer = _writer
+    if writer is not None:
+        writer.flush()
+
+
+_exit_handlers_installed = False
+
+
+def _install_exit_handlers() -> None:
+    """Flush on interpreter exit and on SIGTERM (if nobody else handles it)."""
+    global _exit_handlers_installed
+    if _exit_handlers_installed:
+        return
+    _exit_handlers_installed = True
+    atexit.register(_stop_writer)
+
+    if threading.current_thread() is not threading.main_thread():
+        return
+    try:
+        if signal.getsignal(signal.SIGTERM) is not signal.SIG_DFL:
+            return
+
+        def on_sigterm(signum, frame):
+            # The handler runs between two bytecodes of the main thread,
+            # which may be holding _writer_lock or the queue's mutex, so
+            # it takes no locks: a fresh thread flushes and then lets the
+            # signal's default action end the process
+            signal.signal(signum, signal.SIG_DFL)
+            threading.Thread(target=_stop_and_kill, args=(signum,), name="log-sigterm").start()
+
+        signal.signal(signal.SIGTERM, on_sigterm)
+    except (ValueError, OSError, AttributeError):
+        pass
+
+
+def _stop_and_kill(signum: int) -> None:
+    """Flush the log writer, then re-deliver signum (now at its default action)."""
+    try:
+        _stop_writer()
+    finally:
+        os.kill(os.getpid(), signum)
+
+
+def _reset_writer_in_child() -> None:
+    """A forked child has no writer thread; start its own on first use."""
+    global _writer, _writer_lock, _index_lock
+    _writer = None
+    _writer_lock = threading.Lock()
+    # SQLite connections must not be shared with the parent
+    _indexes.clear()
+    _index_lock = threading.Lock()
+
+
+# Log directory -> open LogIndex, or None once it proved unusable
+_indexes: Dict[Path, Optional[LogIndex]] = {}
+_index_lock = threading.Lock()
+
+
+def _index_rows(log_dir: Path) -> Iterator[Tuple[str, str, Dict[str, Any]]]:
+    """(protocol, day, entry) for every entry in the log files of log_dir."""
+    try:
+        protocol_dirs = sorted(p for p in log_dir.iterdir() if p.is_dir())
+    except OSError:
+        return
+    for protocol_dir in protocol_dirs:
+        for log_file in sorted(_log_files(protocol_dir), key=_log_day):
+            try:
+                for entry in read_log_file(log_file):
+                    yield protocol_dir.name, _log_day(log_file), entry
+            except (json.JSONDecodeError, IOError, UnicodeDecodeError):
+                continue
+
+
+def _get_index(log_dir: Path) -> Optional[LogIndex]:
+    """The index of log_dir, opened (and built) on first use; None without SQLite."""
+    log_dir = Path(log_dir)
+    with _index_lock:
+        if log_dir in _indexes:
+            return _indexes[log_dir]
+        index = None
+        if LogIndex.available():
+            index = LogIndex(log_dir)
             try:
-                with open(log_path, "r") as f:
-                    content = f.read().strip()
-                    if content:
-                        entries = json.loads(content)
-                        if not isinstance(entries, list):
-                            entries = [entries]
-            except (json.JSONDecodeError, IOError):
-                entries = []
-
-        # Append new entry
-        entries.append(entry)
-
-        # Write back
+                index.open(lambda: _index_rows(log_dir))
+            except Exception as e:
+                _warn_index(e)
+                index = None
+        _indexes[log_dir] = index
+        return index
+
+
+def _current_index(log_dir: Path) -> Optional[LogIndex]:
+    """
+    The index of log_dir for queries, rebuilt first if it is stale.
+
+    Returns:
+        The index, or None when queries must read the files
+    """
+    index = _get_index(log_dir)
+    if index is not None and index.is_stale():
         try:
-            with open(log_path, "w") as f:
-                json.dump(entries, f, indent=2)
-        except IOError as e:
-            import sys
-            print(f"[WARN] Failed to write log: {e}", file=sys.stderr)
+            index.rebuild(lambda: _index_rows(log_dir))
+        except Exception as e:
+            _disable_index(log_dir, e)
+            return None
+    return index
 
 
-def get_recent_logs(
-    protocol: str,
-    days: int = 1,
-    status_filter: Optional[str] = None
-) -> list:
+def _disable_index(log_dir: Path, error: Exception) -> None:
     """
-    Get recent log entries.
+    Stop using an index that failed; queries fall back to the files.
+
+    What this process logs from now on is not indexed, so every append
+    marks the index stale for the other processes (see _append_entries).
+    """
+    with _index_lock:
+        index = _indexes.get(Path(log_dir))
+        _indexes[Path(log_dir)] = None
+    if index is not None:
+        index.close()
+    _warn_index(error)
+
+
+def _warn_index(error: Exception) -> None:
+    import sys
+    print(f"[WARN] Log index unavailable, scanning log files instead: {error}", file=sys.stderr)
+
+
+def rebuild_log_index(log_dir: Optional[str] = None) -> int:
+    """
+    Recreate the log index from the log files.
 
     Args:
-        protocol: Protocol name
-        days: Number of days to look back
-        status_filter: Filter by status (success/error/skipped)
+        log_dir: Log directory (default: the configured one)
 
     Returns:
-        List of log entries
+        Number of entries indexed
+
+    Raises:
+        RuntimeError: If SQLite is not available
     """
-    entries = []
-    log_dir = Path(_config["log_dir"]) / protocol
+    flush_logs()
+    log_dir_path = Path(log_dir or _config["log_dir"])
+    index = _get_index(log_dir_path)
+    if index is None:
+        raise RuntimeError("The log index needs the sqlite3 module")
+    return index.rebuild(lambda: _index_rows(log_dir_path))
 
-    if not log_dir.exists():
-        return entries
 
-    cutoff = datetime.now() - timedelta(days=days)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_writer_in_child)
+
+
+def _append_entries(log_path: Path, entries: List[Dict[str, Any]]) -> None:
+    """
+    Append entries to a log file and add them to the index.
+
+    Only entries that were written are indexed. Entries written but not
+    indexed mark the index stale, so other processes rebuild it instead
+    of answering from an index that misses them.
+    """
+    log_dir = log_path.parent.parent
+    data = b"".join(_encode_entry(e) for e in entries)
+    # Open the index first: a new index is filled from the files, which
+    # must not already contain these entries
+    index = _get_index(log_dir)
+
+    written: List[bool] = []
+
+    def write() -> bool:
+        written.append(_append_lines(log_path, data))
+        return written[0]
 
-    for log_file in sorted(log_dir.glob("*.json"), reverse=True):
+    if index is not None:
+        protocol, day = log_path.parent.name, _log_day(log_path)
         try:
-            # Check date from filename
-            date_str = log_file.stem
-            file_date = datetime.strptime(date_str, "%Y-%m-%d")
-            if file_date < cutoff:
-                break
+            index.add(((protocol, day, entry) for entry in entries), write=write)
+            return
+        except Exception as e:
+            _disable_index(log_dir, e)
+
+    if not written:
+        write()
+    if written[0]:
+        LogIndex(log_dir).mark_stale()
+
 
-            with open(log_file, "r") as f:
-                file_entries = json.load(f)
-                if not isinstance(file_entries, list):
-                    file_entries = [file_entries]
+def _append_lines(log_path: Path, data: bytes) -> bool:
+    """Append encoded lines to a log file with a single O_APPEND write; False if that failed."""
+    try:
+        fd = os.open(str(log_path), os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+    except OSError as e:
+        import sys
+        print(f"[WARN] Failed to write log: {e}", file=sys.stderr)
+        return False
+    return True
+
+
+def read_log_file(log_path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Yield the entries of a log file, JSONL or legacy JSON array.
 
-                for entry in file_entries:
-                    if status_filter is None or entry.get("status") == status_filter:
-                        entries.append(entry)
+    Lines that do not parse (e.g. a write cut short by a crash) are
+    skipped.
 
-        except (json.JSONDecodeError, IOError, ValueError):
+    Args:
+        log_path: Path to a .jsonl or legacy .json log file, optionally
+            gzipped (.gz)
+    """
+    compressed = log_path.suffix == GZIP_SUFFIX
+    legacy = (log_path.with_suffix("") if compressed else log_path).suffix == LEGACY_SUFFIX
+    with (gzip.open(log_path, "rt") if compressed else open(log_path, "r")) as f:
+        if legacy:
+            content = f.read().strip()
+            if not content:
+                return
+            entries = json.loads(content)
+            yield from (entries if isinstance(entries, list) else [entries])
+            return
+
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def convert_legacy_logs(log_dir: Optional[str] = None) -> int:
+    """
+    Rewrite legacy JSON-array log files as JSONL.
+
+    Entries of a legacy {date}.json are placed before those already in
+    {date}.jsonl for the same day, then the legacy file is removed.
+    Unreadable legacy files are left alone.
+
+    Args:
+        log_dir: Log directory (default: the configured one)
+
+    Returns:
+        Number of files converted
+    """
+    converted = 0
+    for legacy_path in sorted(Path(log_dir or _config["log_dir"]).rglob(f"*{LEGACY_SUFFIX}")):
+        try:
+            entries = list(read_log_file(legacy_path))
+        except (json.JSONDecodeError, IOError, UnicodeDecodeError):
             continue
 
-    return entries
+        target = legacy_path.with_suffix(LOG_SUFFIX)
+        data = b"".join(_encode_entry(e) for e in entries)
+        try:
+            if target.exists():
+                with open(target, "rb") as f:
+                    data += f.read()
+            tmp_path = target.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, target)
+            legacy_path.unlink()
+        except OSError:
+            continue
+        converted += 1
+
+    return converted
+
+
+def query_logs(
+    protocol: Optional[str] = None,
+    task: Optional[str] = None,
+    status: Optional[str] = None,
+    entry_type: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    min_duration_ms: Optional[float] = None,
+    limit: Optional[int] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Stream log entries matching every given filter, oldest first.
+
+    Uses the SQLite index when available (rebuilding it first if entries
+    were logged without being indexed), otherwise reads the files.
+
+    Args:
+        protocol: Protocol (log subdirectory)
+        task: Task name
+        status: Entry status (success/error/skipped/timeout)
+        entry_type: "task", "protocol_summary", "error" or "dropped"
+        since: Earliest timestamp, ISO format ("2026-01-05" or
+            "2026-01-05T14:00")
+        until: Timestamp before which entries must lie (exclusive)
+        min_duration_ms: Only entries that took at least this long
+            (task duration_ms or protocol total_duration_ms)
+        limit: Maximum number of entries
+
+    Yields:
+        Log entries
+    """
+    flush_logs()
+    log_dir = Path(_config["log_dir"])
+    if not log_dir.exists():
+        return
+
+    index = _current_index(log_dir)
+    if index is not None:
+        yield from index.query(protocol, task, status, entry_type, since, until, min_duration_ms, limit)
+        return
+
+    yield from _scan_logs(log_dir, protocol, task, status, entry_type, since, until, min_duration_ms, limit)
+
+
+def _scan_logs(
+    log_dir: Path,
+    protocol: Optional[str],
+    task: Optional[str],
+    status: Optional[str],
+    entry_type_filter: Optional[str],
+    since: Optional[str],
+    until: Optional[str],
+    min_duration_ms: Optional[float],
+    limit: Optional[int]
+) -> Iterator[Dict[str, Any]]:
+    """query_logs without the index: read the files whose date can match."""
+    def matches(entry: Dict[str, Any]) -> bool:
+        if task is not None and entry.get("task") != task:
+            return False
+        if status is not None and entry.get("status") != status:
+            return False
+        if entry_type_filter is not None and entry_type(entry) != entry_type_filter:
+            return False
+        timestamp = entry.get("timestamp", "")
+        if (since and timestamp < since) or (until and timestamp >= until):
+            return False
+        if min_duration_ms is not None:
+            try:
+                return float(entry.get("duration_ms", entry.get("total_duration_ms"))) >= min_duration_ms
+            except (TypeError, ValueError):
+                return False
+        return True
+
+    def scan_protocol(protocol_dir: Path) -> Iterator[Dict[str, Any]]:
+        for log_file in sorted(_log_files(protocol_dir), key=_log_day):
+            day = _log_day(log_file)
+            if (since and day < since[:10]) or (until and day > until[:10]):
+                continue
+            try:
+                yield from (entry for entry in read_log_file(log_file) if matches(entry))
+            except (json.JSONDecodeError, IOError, UnicodeDecodeError):
+                continue
+
+    if protocol is not None:
+        protocol_dirs = [log_dir / protocol] if (log_dir / protocol).is_dir() else []
+    else:
+        protocol_dirs = sorted(p for p in log_dir.iterdir() if p.is_dir())
+
+    # Each protocol's files are in time order; merge them lazily
+    merged = heapq.merge(*(scan_protocol(d) for d in protocol_dirs), key=lambda e: e.get("timestamp", ""))
+    yield from itertools.islice(merged, limit)
+
+
+def task_stats(
+    protocol: Optional[str] = None,
+    task: Optional[str] = None,
+    days: int = 7
+) -> Dict[Tuple[str, str], TaskStats]:
+    """
+    Run counts, failures and duration sketches per (protocol, task).
+
+    Merges the per-day sketches kept in the log index, rebuilt first if
+    entries were logged without being indexed, so the numbers never
+    leave out runs that are in the files; without the index they are
+    computed from the task entries.
+
+    Args:
+        protocol: Only this protocol
+        task: Only this task
+        days: Number of days to cover (1 = today only)
+
+    Returns:
+        (protocol, task) -> TaskStats
+    """
+    flush_logs()
+    since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    log_dir = Path(_config["log_dir"])
+    if not log_dir.exists():
+        return {}
+
+    index = _current_index(log_dir)
+    if index is not None:
+        try:
+            return index.task_stats(protocol, task, since)
+        except Exception as e:
+            _disable_index(log_dir, e)
+
+    per_day: Dict[Tuple[str, str, str], TaskStats] = {}
+    protocol_dirs = [log_dir / protocol] if protocol else sorted(p for p in log_dir.iterdir() if p.is_dir())
+    for protocol_dir in protocol_dirs:
+        rows = (
+            (protocol_dir.name, entry.get("timestamp", "")[:10], entry)
+            for entry in _scan_logs(log_dir, protocol_dir.name, task, None, "task", since, None, None, None)
+        )
+        for _ in collect_stats(rows, per_day):
+            pass
+
+    merged: Dict[Tuple[str, str], TaskStats] = {}
+    for (row_protocol, row_task, _), day_stats in per_day.items():
+        merged.setdefault((row_protocol, row_task), TaskStats()).merge(day_stats)
+    return merged
+
+
+def get_recent_logs(
+    protocol: str,
+    days: int = 1,
+    status_filter: Optional[str] = None
+) -> list:
+    """
+    Get recent log entries.
+
+    Args:
+        protocol: Protocol name
+        days: Number of days to look back (1 = today only)
+        status_filter: Filter by status (success/error/skipped)
+
+    Returns:
+        List of log entries, oldest first
+    """
+    since = (datetime.now() - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    return list(query_logs(protocol=protocol, status=status_filter, since=since))
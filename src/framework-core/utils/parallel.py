@@ -2,16 +2,106 @@
 Parallel task execution utilities.
 
 Uses ThreadPoolExecutor for concurrent task execution with
-structured error handling and timing.
+structured error handling and timing. Tasks may declare dependencies
+and be run as a graph with run_task_graph.
+
+Timeouts: a task with timeout_s, or any task when the runner is given a
+deadline, runs on a daemon thread that is abandoned once its budget is
+spent. The runner reports TIMEOUT and returns on time; the abandoned
+thread cannot be killed and finishes (or dies with the process) in the
+background, so only put timeouts on tasks whose late side effects are
+harmless.
+
+Executors: tasks run on threads by default. CPU-bound tasks can set
+executor="process" to run in a shared ProcessPoolExecutor kept for the
+life of the process (see get_process_pool). Their func, args and
+TaskResult must be picklable, so use module-level functions.
+
+Asyncio: run_tasks_parallel_async runs the same TaskDefinitions on an
+event loop with bounded concurrency. Coroutine functions are awaited
+directly; plain functions are handed to the loop's default executor.
+
+Cancellation: every run has a CancellationToken (see utils.cancellation)
+with a child token per task. When fail_fast (or a critical task) stops
+the run, the token is cancelled: subprocesses started through
+run_subprocess are killed, tasks with cancellable=True see the flag,
+and the runner returns without waiting for the abandoned work.
+
+Timing: each TaskResult records when its task was queued and started,
+when it ended and which worker ran it.
+
+Hooks: observers registered with utils.hooks are told when each task
+starts and ends (on the thread running it), e.g. to log it or add it
+to a Tracer's timeline. Without observers this costs one attribute
+check per task.
+
+Scheduling: pass plan= (see utils.scheduler.plan_schedule) to submit
+ready tasks longest-expected-first, run tasks expected to take under a
+millisecond inline on the calling thread, and size the pool from the
+expected load instead of max_workers.
+
+Resources: tasks declare the shared resources they use (network, disk,
+git:read, git:write, ...; see utils.resources) and hold them while their
+body runs, so per-class limits and reader/writer exclusion apply across
+all runners. Time spent waiting for a resource counts against the
+task's timeout but not its duration_ms.
+
+Streaming: iter_tasks_parallel and iter_task_graph are generators that
+yield each TaskResult as soon as it is available (run_tasks_parallel and
+run_task_graph collect them into a list). Closing one early cancels the
+run.
+
+Nested tasks: a running task can open a TaskGroup and spawn child tasks
+into its runner's pool. Joining the group runs still-queued children on
+the waiting thread instead of blocking it, so fan-out from inside a
+task cannot deadlock a full pool. Child results are attached to the
+parent's TaskResult.children.
+
+Map: map_parallel(func, iterable, window=N) applies func to a lazily
+consumed iterable with at most N calls in flight, for fine-grained
+per-file work where a TaskDefinition per item would be too heavy.
+
+Run context: every run has a RunContext (see utils.context) that is made
+current in each worker, so memoized lookups (git status, diff stats)
+are shared by all tasks of the run. Pass context= to share one across
+several runs, or activate one around the protocol.
 """
 
+import asyncio
+import atexit
+import contextvars
+import multiprocessing
+import os
+import threading
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed, Future
-from typing import Callable, List, Dict, Any, Optional, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, Future, FIRST_COMPLETED
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, List, Dict, Any, Iterable, Iterator, Optional, Tuple, Set
 from functools import wraps
 from dataclasses import dataclass
 
 from .result import TaskResult, TaskStatus
+from .cancellation import CancellationToken, current_token, set_current_token, reset_current_token
+from .context import RunContext, current_context, set_current_context, reset_current_context
+from . import hooks
+from .scheduler import SchedulePlan
+from .resources import parse_resource, hold_resources, holds_locks
+from .usage import start_usage
+
+# Executor hints for TaskDefinition.executor
+EXECUTOR_THREAD = "thread"
+EXECUTOR_PROCESS = "process"
+
+# Shared process pool for CPU-bound work (created lazily)
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+# Thread pool of the runner executing the current task (TaskGroup spawns into it)
+_current_pool: contextvars.ContextVar = contextvars.ContextVar("task_pool", default=None)
+
+# Child results collected for the task running in the current context
+_current_children: contextvars.ContextVar = contextvars.ContextVar("task_children", default=None)
 
 
 @dataclass
@@ -24,15 +114,39 @@ class TaskDefinition:
         func: Callable to execute
         args: Positional arguments
         kwargs: Keyword arguments
+        depends_on: Names of tasks that must finish before this one starts
+            (only honoured by run_task_graph)
+        timeout_s: Maximum seconds the task may run before it is reported
+            as TIMEOUT (None = no per-task limit)
+        executor: "thread" (default, for I/O-bound tasks) or "process"
+            (for CPU-bound tasks; func and args must be picklable)
+        cancellable: If True, func receives a cancel_token keyword argument
+            (a CancellationToken) to poll during long work
+        critical: If True, failure of this task cancels the rest of the
+            run as if fail_fast were set
+        resources: Resource classes held while the task runs, e.g.
+            ("network",) or ("git:write",) (see utils.resources)
     """
     name: str
     func: Callable
     args: tuple = ()
     kwargs: dict = None
+    depends_on: tuple = ()
+    timeout_s: Optional[float] = None
+    executor: str = EXECUTOR_THREAD
+    cancellable: bool = False
+    critical: bool = False
+    resources: tuple = ()
 
     def __post_init__(self):
         if self.kwargs is None:
             self.kwargs = {}
+        self.depends_on = tuple(self.depends_on)
+        self.resources = tuple(self.resources)
+        for resource in self.resources:
+            parse_resource(resource)
+        if self.executor not in (EXECUTOR_THREAD, EXECUTOR_PROCESS):
+            raise ValueError(f"Unknown executor for task {self.name}: {self.executor}")
 
 
 def time_task(func: Callable) -> Callable:
@@ -61,58 +175,355 @@ class TaskExecutionError(Exception):
         self.duration_ms = duration_ms
 
 
-def _execute_task(task: TaskDefinition) -> TaskResult:
+# Statuses that count as failure for fail_fast and dependency blocking
+_FAILED_STATUSES = (TaskStatus.ERROR, TaskStatus.TIMEOUT)
+
+
+class TaskGraphError(ValueError):
+    """Exception raised when a task graph is malformed (duplicates, unknown deps, cycles)."""
+
+
+def _to_task_result(task: TaskDefinition, result: Any, duration_ms: int) -> TaskResult:
+    """Turn a task function's return value into a TaskResult."""
+    # If the function returns a TaskResult, use it
+    if isinstance(result, TaskResult):
+        result.duration_ms = duration_ms
+        return result
+
+    # Otherwise, wrap the result
+    return TaskResult.create_success(
+        name=task.name,
+        duration_ms=duration_ms,
+        data={"result": result} if result is not None else None
+    )
+
+
+def _task_kwargs(task: TaskDefinition, token: Optional[CancellationToken]) -> dict:
+    """Keyword arguments for a call, including the token for cancellable tasks."""
+    if task.cancellable:
+        return {**task.kwargs, "cancel_token": token or CancellationToken()}
+    return task.kwargs
+
+
+def _run_task_body(task: TaskDefinition, token: Optional[CancellationToken] = None) -> TaskResult:
     """
     Execute a single task and return its result.
 
-    Handles exceptions and timing internally.
+    Handles exceptions and timing internally. The token becomes the
+    current one while the task runs so its subprocesses can be tracked,
+    and results of TaskGroup children it spawns are attached to its
+    result. With usage capture on (see utils.usage), the body's CPU
+    time, RSS growth, subprocesses and I/O are recorded as well.
     """
-    start = time.perf_counter()
+    usage = start_usage()
+    start_ns = time.perf_counter_ns()
+    children: List[TaskResult] = []
+    reset = set_current_token(token)
+    reset_children = _current_children.set(children)
     try:
-        result = task.func(*task.args, **task.kwargs)
-        duration_ms = int((time.perf_counter() - start) * 1000)
-
-        # If the function returns a TaskResult, use it
-        if isinstance(result, TaskResult):
-            result.duration_ms = duration_ms
-            return result
-
-        # Otherwise, wrap the result
-        return TaskResult.create_success(
-            name=task.name,
-            duration_ms=duration_ms,
-            data={"result": result} if result is not None else None
-        )
+        result = task.func(*task.args, **_task_kwargs(task, token))
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        task_result = _to_task_result(task, result, elapsed_ns // 1_000_000)
+        task_result.duration_ns = elapsed_ns
     except TaskExecutionError as e:
-        return TaskResult.create_error(
+        task_result = TaskResult.create_error(
             name=task.name,
-            error=str(e),
+            error_msg=str(e),
             duration_ms=e.duration_ms
         )
     except Exception as e:
-        duration_ms = int((time.perf_counter() - start) * 1000)
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        task_result = TaskResult.create_error(
+            name=task.name,
+            error_msg=str(e),
+            duration_ms=elapsed_ns // 1_000_000
+        )
+        task_result.duration_ns = elapsed_ns
+    finally:
+        _current_children.reset(reset_children)
+        reset_current_token(reset)
+
+    if usage is not None:
+        task_result.usage = usage.finish()
+    if children:
+        task_result.children = children + task_result.children
+    return task_result
+
+
+def _run_task_holding_resources(task: TaskDefinition, token: Optional[CancellationToken] = None) -> TaskResult:
+    """Run the task body while holding its declared resources."""
+    if not task.resources:
+        return _run_task_body(task, token)
+
+    try:
+        with hold_resources(task.resources, token):
+            return _run_task_body(task, token)
+    except Exception as e:
+        # Cancelled (or misused) while waiting for a resource
+        return TaskResult.create_error(name=task.name, error_msg=str(e), duration_ms=0)
+
+
+def get_process_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the shared process pool for CPU-bound work.
+
+    The pool has process_pool_workers() workers, one per core, is
+    created on first use and shut down at interpreter exit. Workers are started by a forkserver (spawn where
+    that is unavailable), never forked from this process: the log writer
+    and pool threads may hold locks that a forked child would inherit
+    locked forever.
+
+    Returns:
+        The shared ProcessPoolExecutor, or None when called from inside a
+        worker process (nested pools are not created; run inline instead)
+    """
+    global _process_pool
+
+    if multiprocessing.parent_process() is not None:
+        return None
+
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=process_pool_workers(),
+                mp_context=_process_context(),
+            )
+            atexit.register(shutdown_process_pool)
+        return _process_pool
+
+
+def process_pool_workers() -> int:
+    """Number of workers in the shared process pool (one per core)."""
+    return os.cpu_count() or 1
+
+
+def _process_context() -> multiprocessing.context.BaseContext:
+    """Safe start method for pool workers: forkserver on POSIX, spawn otherwise."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+def shutdown_process_pool() -> None:
+    """Shut down the shared process pool, if one was started."""
+    global _process_pool
+
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+
+    if pool is not None:
+        pool.shutdown(wait=True)
+
+
+def _execute_in_process(
+    task: TaskDefinition,
+    pool: ProcessPoolExecutor,
+    budget: Optional[float]
+) -> TaskResult:
+    """Run a task in the process pool and wait for its (unpickled) result."""
+    start = time.perf_counter()
+    try:
+        future = pool.submit(_run_task_body, task)
+        return future.result(timeout=budget)
+    except FutureTimeoutError:
+        future.cancel()
+        return TaskResult.create_timeout(
+            task.name,
+            round(budget, 3),
+            duration_ms=int((time.perf_counter() - start) * 1000)
+        )
+    except Exception as e:
+        # Pickling failures and a broken pool surface here
         return TaskResult.create_error(
             name=task.name,
-            error=str(e),
-            duration_ms=duration_ms
+            error_msg=f"Process execution failed: {e}",
+            duration_ms=int((time.perf_counter() - start) * 1000)
         )
 
 
+def _task_budget(task: TaskDefinition, deadline_at: Optional[float]) -> Optional[float]:
+    """Seconds a task may run: its own timeout capped by what is left of the deadline."""
+    budget = task.timeout_s
+    if deadline_at is not None:
+        remaining = max(0.0, deadline_at - time.monotonic())
+        budget = remaining if budget is None else min(budget, remaining)
+    return budget
+
+
+def _record_timing(
+    task: TaskDefinition,
+    result: TaskResult,
+    queued_at: Optional[float],
+    started_at: float
+) -> None:
+    """Stamp timing and worker identity on a result."""
+    ended_at = time.perf_counter()
+    result.started_at = started_at
+    result.ended_at = ended_at
+    if result.duration_ns is None:
+        # Timeouts, process results and coroutines: time spent on the task
+        result.duration_ns = int((ended_at - started_at) * 1e9)
+    result.queue_wait_ms = round((started_at - queued_at) * 1000, 3) if queued_at is not None else 0.0
+    result.worker = threading.current_thread().name
+
+
+def _execute_task(
+    task: TaskDefinition,
+    deadline_at: Optional[float] = None,
+    run_token: Optional[CancellationToken] = None,
+    queued_at: Optional[float] = None
+) -> TaskResult:
+    """
+    Execute a task, enforcing its timeout and the run deadline.
+
+    Args:
+        task: Task to execute
+        deadline_at: Absolute time.monotonic() value by which the run
+            must finish (None = no deadline)
+        run_token: Cancellation token of the run (a child token is
+            created for the task)
+        queued_at: time.perf_counter() when the task was submitted
+
+    Returns:
+        The task's result, or a TIMEOUT result if the budget ran out
+    """
+    if hooks.observers:
+        hooks.notify_task_start(task)
+    started_at = time.perf_counter()
+    result = _execute_task_budgeted(task, deadline_at, run_token)
+    _record_timing(task, result, queued_at, started_at)
+    if hooks.observers:
+        hooks.notify_task_end(task, result)
+    return result
+
+
+def _execute_task_budgeted(
+    task: TaskDefinition,
+    deadline_at: Optional[float],
+    run_token: Optional[CancellationToken]
+) -> TaskResult:
+    """Run a task on the right executor within its time budget."""
+    budget = _task_budget(task, deadline_at)
+
+    if budget is not None and budget <= 0:
+        return TaskResult.create_timeout(task.name, 0)
+
+    if task.executor == EXECUTOR_PROCESS:
+        pool = get_process_pool()
+        if pool is not None:
+            if not task.resources:
+                return _execute_in_process(task, pool, budget)
+            # Resources are held by this thread on the child's behalf
+            try:
+                with hold_resources(task.resources, run_token):
+                    return _execute_in_process(task, pool, _task_budget(task, deadline_at))
+            except Exception as e:
+                return TaskResult.create_error(name=task.name, error_msg=str(e), duration_ms=0)
+
+    token = run_token.child() if run_token is not None else CancellationToken()
+
+    if budget is None:
+        return _run_task_holding_resources(task, token)
+
+    outcome: List[TaskResult] = []
+    start = time.perf_counter()
+    # Threads do not inherit context variables; carry the run context over
+    thread_context = contextvars.copy_context()
+    worker = threading.Thread(
+        target=lambda: outcome.append(thread_context.run(_run_task_holding_resources, task, token)),
+        name=f"task-{task.name}",
+        daemon=True
+    )
+    worker.start()
+    worker.join(budget)
+
+    if outcome:
+        return outcome[0]
+
+    # Kill the abandoned task's subprocesses and tell it to stop
+    token.cancel(f"{task.name} timed out")
+
+    return TaskResult.create_timeout(
+        task.name,
+        round(budget, 3),
+        duration_ms=int((time.perf_counter() - start) * 1000)
+    )
+
+
+def _deadline_at(deadline: Optional[float]) -> Optional[float]:
+    """Convert a relative deadline in seconds to an absolute monotonic time."""
+    return None if deadline is None else time.monotonic() + deadline
+
+
+def _run_context(context: Optional[RunContext]) -> RunContext:
+    """The context for a run: the given one, the caller's current one, or a fresh one."""
+    return context or current_context() or RunContext()
+
+
+def _run_with_context(run_context: RunContext, fn: Callable, *args) -> Any:
+    """Call fn with run_context current (use inside a copied context)."""
+    set_current_context(run_context)
+    return fn(*args)
+
+
+def _run_in_pool(executor: ThreadPoolExecutor, run_context: RunContext, fn: Callable, *args) -> Any:
+    """Call fn with run_context current and executor as the pool for TaskGroup children."""
+    _current_pool.set(executor)
+    return _run_with_context(run_context, fn, *args)
+
+
+def _submit(executor: ThreadPoolExecutor, run_context: RunContext, fn: Callable, *args) -> Future:
+    """Submit fn so that it runs with run_context current in the worker thread."""
+    return executor.submit(contextvars.copy_context().run, _run_in_pool, executor, run_context, fn, *args)
+
+
+def _run_inline(executor: ThreadPoolExecutor, run_context: RunContext, fn: Callable, *args) -> Any:
+    """Call fn on the calling thread exactly as _submit would run it in a worker."""
+    return contextvars.copy_context().run(_run_in_pool, executor, run_context, fn, *args)
+
+
+def _pool_size(tasks: List[TaskDefinition], max_workers: int, plan: Optional[SchedulePlan]) -> int:
+    """Worker count: the plan's choice (capped by max_workers) or one per task."""
+    if plan is None:
+        return min(max_workers, len(tasks))
+    return max(1, min(max_workers, plan.workers))
+
+
+def _plan_order(tasks: List[TaskDefinition], plan: Optional[SchedulePlan]) -> List[TaskDefinition]:
+    """Tasks in submission order: highest planned priority first (stable)."""
+    if plan is None:
+        return list(tasks)
+    return sorted(tasks, key=lambda t: -plan.priority.get(t.name, 0.0))
+
+
 def run_tasks_parallel(
     tasks: List[TaskDefinition],
     max_workers: int = 10,
-    fail_fast: bool = False
+    fail_fast: bool = False,
+    deadline: Optional[float] = None,
+    context: Optional[RunContext] = None,
+    plan: Optional[SchedulePlan] = None
 ) -> List[TaskResult]:
     """
     Execute tasks in parallel using ThreadPoolExecutor.
 
+    Collects iter_tasks_parallel into a list.
+
     Args:
         tasks: List of TaskDefinition objects to execute
         max_workers: Maximum concurrent workers (default: 10)
-        fail_fast: If True, stop on first error (default: False)
+        fail_fast: If True, stop on first error or timeout (default: False);
+            tasks marked critical always do
+        deadline: Seconds the whole run may take; tasks still running
+            when it expires come back as TIMEOUT (default: no deadline)
+        context: RunContext shared by the tasks (default: the current
+            one, or a fresh one for this run)
+        plan: SchedulePlan giving submission order, inline tasks and pool
+            size (default: list order, everything on the pool)
 
     Returns:
-        List of TaskResult objects in completion order
+        List of TaskResult objects in completion order, followed by
+        skipped results for tasks abandoned by a cancellation
 
     Example:
         tasks = [
@@ -121,61 +532,760 @@ def run_tasks_parallel(
         ]
         results = run_tasks_parallel(tasks, max_workers=5)
     """
+    return list(iter_tasks_parallel(tasks, max_workers, fail_fast, deadline, context, plan))
+
+
+def iter_tasks_parallel(
+    tasks: List[TaskDefinition],
+    max_workers: int = 10,
+    fail_fast: bool = False,
+    deadline: Optional[float] = None,
+    context: Optional[RunContext] = None,
+    plan: Optional[SchedulePlan] = None
+) -> Iterator[TaskResult]:
+    """
+    Execute tasks in parallel, yielding each TaskResult as it completes.
+
+    Takes the same arguments as run_tasks_parallel. Closing the
+    generator before it is exhausted cancels the run.
+
+    Yields:
+        TaskResult objects in completion order, followed by skipped
+        results for tasks abandoned by a cancellation
+
+    Example:
+        for result in iter_tasks_parallel(tasks):
+            print(result.name, result.status.value)
+    """
+    if not tasks:
+        return
+
+    deadline_at = _deadline_at(deadline)
+    run_token = CancellationToken()
+    run_context = _run_context(context)
+    inline = plan.inline if plan is not None else set()
+    executor = ThreadPoolExecutor(max_workers=_pool_size(tasks, max_workers, plan))
+    collected: Set[Future] = set()
+    ran_inline: Set[str] = set()
+    future_to_task: Dict[Future, TaskDefinition] = {}
+
+    try:
+        # Submit all pooled tasks, longest expected first when planned
+        ordered = _plan_order(tasks, plan)
+        for task in ordered:
+            if task.name not in inline:
+                future_to_task[_submit(
+                    executor, run_context, _execute_task, task, deadline_at, run_token, time.perf_counter()
+                )] = task
+
+        # Trivial tasks run here while the pool works
+        for task in ordered:
+            if task.name not in inline or run_token.cancelled:
+                continue
+            result = _run_inline(executor, run_context, _execute_task, task, deadline_at, run_token, time.perf_counter())
+            ran_inline.add(task.name)
+            if (fail_fast or task.critical) and result.status in _FAILED_STATUSES:
+                _cancel_run(run_token, future_to_task, f"Cancelled due to failure of {task.name}")
+            yield result
+
+        # Collect results as they complete (nothing to wait for if an
+        # inline task already cancelled the run)
+        completed = as_completed(future_to_task) if not run_token.cancelled else ()
+        for future in completed:
+            task = future_to_task[future]
+            collected.add(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                # This shouldn't happen as _execute_task catches exceptions
+                result = TaskResult.create_error(
+                    name=task.name,
+                    error_msg=f"Unexpected error: {str(e)}",
+                    duration_ms=0
+                )
+
+            # Check for fail_fast
+            stop = (fail_fast or task.critical) and result.status in _FAILED_STATUSES
+            if stop:
+                _cancel_run(run_token, future_to_task, f"Cancelled due to failure of {task.name}")
+            yield result
+            if stop:
+                break
+    except GeneratorExit:
+        # The consumer stopped reading; nobody will collect the rest
+        _cancel_run(run_token, future_to_task, "Cancelled: results no longer consumed")
+        raise
+    finally:
+        # After a cancellation, do not wait for abandoned work
+        executor.shutdown(wait=not run_token.cancelled)
+
+    if run_token.cancelled:
+        for future, task in future_to_task.items():
+            if future not in collected:
+                yield TaskResult.create_skipped(name=task.name, reason=run_token.reason)
+        for task in tasks:
+            if task.name in inline and task.name not in ran_inline:
+                yield TaskResult.create_skipped(name=task.name, reason=run_token.reason)
+
+
+def _cancel_run(run_token: CancellationToken, futures: Dict[Future, TaskDefinition], reason: str) -> None:
+    """Cancel the run token (killing tracked subprocesses) and every pending future."""
+    run_token.cancel(reason)
+    for future in futures:
+        future.cancel()
+
+
+async def _execute_task_async(
+    task: TaskDefinition,
+    deadline_at: Optional[float] = None,
+    run_token: Optional[CancellationToken] = None,
+    queued_at: Optional[float] = None
+) -> TaskResult:
+    """
+    Execute a task on the running event loop.
+
+    Coroutine functions are awaited (and cancelled on timeout); plain
+    functions run through _execute_task in the loop's default executor.
+    """
+    if not asyncio.iscoroutinefunction(task.func):
+        loop = asyncio.get_running_loop()
+        # run_in_executor does not carry context variables over by itself
+        return await loop.run_in_executor(
+            None, contextvars.copy_context().run, _execute_task, task, deadline_at, run_token, queued_at
+        )
+
+    if hooks.observers:
+        hooks.notify_task_start(task)
+    started_at = time.perf_counter()
+    result = await _execute_coroutine_task(task, deadline_at, run_token)
+    _record_timing(task, result, queued_at, started_at)
+    if hooks.observers:
+        hooks.notify_task_end(task, result)
+    return result
+
+
+async def _execute_coroutine_task(
+    task: TaskDefinition,
+    deadline_at: Optional[float],
+    run_token: Optional[CancellationToken]
+) -> TaskResult:
+    """Await a coroutine task within its time budget."""
+    if task.resources:
+        # Resource locks are held per thread and would block the event loop
+        return TaskResult.create_error(
+            name=task.name,
+            error_msg="Resource classes are only supported for thread and process tasks"
+        )
+
+    budget = _task_budget(task, deadline_at)
+    if budget is not None and budget <= 0:
+        return TaskResult.create_timeout(task.name, 0)
+
+    token = run_token.child() if run_token is not None else CancellationToken()
+    # Each asyncio task runs in its own context copy, so this does not leak
+    set_current_token(token)
+
+    start = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(task.func(*task.args, **_task_kwargs(task, token)), budget)
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        return _to_task_result(task, result, duration_ms)
+    except asyncio.TimeoutError:
+        return TaskResult.create_timeout(
+            task.name,
+            round(budget, 3),
+            duration_ms=int((time.perf_counter() - start) * 1000)
+        )
+    except Exception as e:
+        duration_ms = int((time.perf_counter() - start) * 1000)
+        return TaskResult.create_error(
+            name=task.name,
+            error_msg=str(e),
+            duration_ms=duration_ms
+        )
+
+
+async def run_tasks_parallel_async(
+    tasks: List[TaskDefinition],
+    max_concurrency: int = 10,
+    fail_fast: bool = False,
+    deadline: Optional[float] = None,
+    context: Optional[RunContext] = None
+) -> List[TaskResult]:
+    """
+    Execute tasks concurrently on the running event loop.
+
+    At most max_concurrency tasks run at once, so dozens of git or file
+    operations can be fanned out without a thread per call.
+
+    Args:
+        tasks: List of TaskDefinition objects (coroutine or plain functions)
+        max_concurrency: Maximum tasks in flight (default: 10)
+        fail_fast: If True, cancel remaining tasks on first error or timeout
+            (tasks marked critical always do)
+        deadline: Seconds the whole run may take; tasks still running
+            when it expires come back as TIMEOUT (default: no deadline)
+        context: RunContext shared by the tasks (default: the current
+            one, or a fresh one for this run)
+
+    Returns:
+        List of TaskResult objects in completion order, followed by
+        skipped results for tasks cancelled by fail_fast
+
+    Example:
+        tasks = [
+            TaskDefinition(path, get_status_async, kwargs={"cwd": path})
+            for path in paths
+        ]
+        results = asyncio.run(run_tasks_parallel_async(tasks, max_concurrency=8))
+    """
     results: List[TaskResult] = []
 
     if not tasks:
         return results
 
-    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
-        # Submit all tasks
-        future_to_task: Dict[Future, TaskDefinition] = {
-            executor.submit(_execute_task, task): task
+    deadline_at = _deadline_at(deadline)
+    run_token = CancellationToken()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(task: TaskDefinition) -> TaskResult:
+        queued_at = time.perf_counter()
+        async with semaphore:
+            return await _execute_task_async(task, deadline_at, run_token, queued_at)
+
+    # asyncio tasks copy the context at creation, so set it just for that
+    reset = set_current_context(_run_context(context))
+    try:
+        pending: Dict[asyncio.Future, TaskDefinition] = {
+            asyncio.ensure_future(run_one(task)): task
             for task in tasks
         }
+    finally:
+        reset_current_context(reset)
 
-        # Collect results as they complete
-        for future in as_completed(future_to_task):
-            task = future_to_task[future]
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        stop = False
+
+        for future in done:
+            task = pending.pop(future)
             try:
                 result = future.result()
-                results.append(result)
-
-                # Check for fail_fast
-                if fail_fast and result.status == TaskStatus.ERROR:
-                    # Cancel remaining futures
-                    for f in future_to_task:
-                        f.cancel()
-                    break
-
             except Exception as e:
-                # This shouldn't happen as _execute_task catches exceptions
-                results.append(TaskResult.create_error(
+                # This shouldn't happen as _execute_task_async catches exceptions
+                result = TaskResult.create_error(
                     name=task.name,
-                    error=f"Unexpected error: {str(e)}",
+                    error_msg=f"Unexpected error: {str(e)}",
                     duration_ms=0
+                )
+            results.append(result)
+
+            if (fail_fast or task.critical) and result.status in _FAILED_STATUSES:
+                stop = True
+
+        if stop:
+            run_token.cancel(f"Cancelled due to failure of {result.name}")
+            for future in pending:
+                future.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in pending.values():
+                results.append(TaskResult.create_skipped(
+                    name=task.name,
+                    reason=run_token.reason
                 ))
+            break
 
     return results
 
 
-def run_tasks_sequential(tasks: List[TaskDefinition]) -> List[TaskResult]:
+def _validate_task_graph(tasks: List[TaskDefinition]) -> Dict[str, TaskDefinition]:
+    """
+    Check a task graph for duplicate names, unknown dependencies and cycles.
+
+    Args:
+        tasks: List of TaskDefinition objects
+
+    Returns:
+        Mapping of task name to TaskDefinition
+
+    Raises:
+        TaskGraphError: If the graph is malformed
+    """
+    by_name: Dict[str, TaskDefinition] = {}
+    for task in tasks:
+        if task.name in by_name:
+            raise TaskGraphError(f"Duplicate task name: {task.name}")
+        by_name[task.name] = task
+
+    for task in tasks:
+        for dep in task.depends_on:
+            if dep not in by_name:
+                raise TaskGraphError(f"Task {task.name} depends on unknown task: {dep}")
+            if dep == task.name:
+                raise TaskGraphError(f"Task {task.name} depends on itself")
+
+    # Depth-first search for cycles (white/grey/black colouring)
+    state: Dict[str, int] = {}
+
+    def visit(name: str, path: List[str]) -> None:
+        state[name] = 1
+        for dep in by_name[name].depends_on:
+            if state.get(dep) == 1:
+                cycle = path[path.index(dep):] + [dep]
+                raise TaskGraphError(f"Dependency cycle: {' -> '.join(cycle)}")
+            if dep not in state:
+                visit(dep, path + [dep])
+        state[name] = 2
+
+    for task in tasks:
+        if task.name not in state:
+            visit(task.name, [task.name])
+
+    return by_name
+
+
+def run_task_graph(
+    tasks: List[TaskDefinition],
+    max_workers: int = 10,
+    fail_fast: bool = False,
+    deadline: Optional[float] = None,
+    context: Optional[RunContext] = None,
+    plan: Optional[SchedulePlan] = None
+) -> List[TaskResult]:
+    """
+    Execute tasks respecting their declared dependencies.
+
+    Each task is submitted as soon as all tasks in its depends_on have
+    finished, so total time tends towards the critical path rather than
+    the sum of sequential phases. Dependents of a failed task (status
+    ERROR or TIMEOUT) are not run and are reported as skipped; a
+    dependency that finished as SKIPPED on its own does not block its
+    dependents. Collects iter_task_graph into a list.
+
+    Args:
+        tasks: List of TaskDefinition objects, optionally with depends_on
+        max_workers: Maximum concurrent workers (default: 10)
+        fail_fast: If True, cancel the run on first error or timeout
+            (tasks marked critical always do)
+        deadline: Seconds the whole run may take; tasks still running
+            when it expires come back as TIMEOUT (default: no deadline)
+        context: RunContext shared by the tasks (default: the current
+            one, or a fresh one for this run)
+        plan: SchedulePlan giving the order in which ready tasks are
+            submitted, inline tasks and pool size (default: list order,
+            everything on the pool)
+
+    Returns:
+        List of TaskResult objects in completion order, followed by
+        skipped results for tasks that never ran
+
+    Raises:
+        TaskGraphError: On duplicate names, unknown dependencies or cycles
+
+    Example:
+        tasks = [
+            TaskDefinition("scan", scan),
+            TaskDefinition("review", review),
+            TaskDefinition("commit", commit, depends_on=("scan", "review")),
+        ]
+        results = run_task_graph(tasks)
+    """
+    return list(iter_task_graph(tasks, max_workers, fail_fast, deadline, context, plan))
+
+
+def iter_task_graph(
+    tasks: List[TaskDefinition],
+    max_workers: int = 10,
+    fail_fast: bool = False,
+    deadline: Optional[float] = None,
+    context: Optional[RunContext] = None,
+    plan: Optional[SchedulePlan] = None
+) -> Iterator[TaskResult]:
+    """
+    Execute a task graph, yielding each TaskResult as it completes.
+
+    Takes the same arguments as run_task_graph. The graph is validated
+    before the first result is requested. Closing the generator before
+    it is exhausted cancels the run.
+
+    Returns:
+        Iterator over TaskResult objects in completion order, followed
+        by skipped results for tasks that never ran
+
+    Raises:
+        TaskGraphError: On duplicate names, unknown dependencies or cycles
+    """
+    _validate_task_graph(tasks)
+    return _iter_task_graph(tasks, max_workers, fail_fast, deadline, context, plan)
+
+
+def _iter_task_graph(
+    tasks: List[TaskDefinition],
+    max_workers: int,
+    fail_fast: bool,
+    deadline: Optional[float],
+    context: Optional[RunContext],
+    plan: Optional[SchedulePlan]
+) -> Iterator[TaskResult]:
+    """Generator behind iter_task_graph (the graph is already validated)."""
+    if not tasks:
+        return
+
+    deadline_at = _deadline_at(deadline)
+    run_context = _run_context(context)
+
+    remaining_deps: Dict[str, Set[str]] = {t.name: set(t.depends_on) for t in tasks}
+    dependents: Dict[str, List[str]] = {t.name: [] for t in tasks}
+    for task in tasks:
+        for dep in task.depends_on:
+            dependents[dep].append(task.name)
+
+    blocked: Dict[str, str] = {}  # task name -> name of the failed task blocking it
+    last_dependency: Dict[str, str] = {}  # task name -> dependency that finished last
+    ready_results: List[TaskResult] = []  # finished but not yet yielded
+    submitted: Set[str] = set()
+    finished: Set[str] = set()
+    run_token = CancellationToken()
+
+    def block_dependents(failed: str, root: str) -> None:
+        for child in dependents[failed]:
+            if child not in blocked:
+                blocked[child] = root
+                block_dependents(child, root)
+
+    ordered = _plan_order(tasks, plan)
+    inline = plan.inline if plan is not None else set()
+    executor = ThreadPoolExecutor(max_workers=_pool_size(tasks, max_workers, plan))
+    future_to_task: Dict[Future, TaskDefinition] = {}
+
+    def record(task: TaskDefinition, result: TaskResult) -> None:
+        result.blocked_by = last_dependency.get(task.name)
+        ready_results.append(result)
+        finished.add(task.name)
+
+        if result.status in _FAILED_STATUSES:
+            block_dependents(task.name, task.name)
+            if (fail_fast or task.critical) and not run_token.cancelled:
+                _cancel_run(run_token, future_to_task, f"Cancelled due to failure of {task.name}")
+        else:
+            for child in dependents[task.name]:
+                remaining_deps[child].discard(task.name)
+                last_dependency[child] = task.name
+
+    def submit_ready() -> None:
+        # Inline tasks can unblock further tasks, so repeat until stable
+        while not run_token.cancelled:
+            run_here = []
+            for task in ordered:
+                name = task.name
+                if name in submitted or name in blocked or remaining_deps[name]:
+                    continue
+                submitted.add(name)
+                if name in inline:
+                    run_here.append(task)
+                    continue
+                future_to_task[_submit(
+                    executor, run_context, _execute_task, task, deadline_at, run_token, time.perf_counter()
+                )] = task
+
+            if not run_here:
+                return
+
+            # Pooled work is already queued; the trivial tasks run here meanwhile
+            for task in run_here:
+                if run_token.cancelled:
+                    return
+                record(task, _run_inline(
+                    executor, run_context, _execute_task, task, deadline_at, run_token, time.perf_counter()
+                ))
+
+    def drain() -> List[TaskResult]:
+        drained = list(ready_results)
+        ready_results.clear()
+        return drained
+
+    try:
+        submit_ready()
+        yield from drain()
+
+        while future_to_task and not run_token.cancelled:
+            done, _ = wait(future_to_task, return_when=FIRST_COMPLETED)
+
+            for future in done:
+                task = future_to_task.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # This shouldn't happen as _execute_task catches exceptions
+                    result = TaskResult.create_error(
+                        name=task.name,
+                        error_msg=f"Unexpected error: {str(e)}",
+                        duration_ms=0
+                    )
+                record(task, result)
+
+            if not run_token.cancelled:
+                submit_ready()
+            yield from drain()
+            # After a cancellation the loop exits: running tasks are
+            # abandoned instead of waited for
+    except GeneratorExit:
+        # The consumer stopped reading; nobody will collect the rest
+        _cancel_run(run_token, future_to_task, "Cancelled: results no longer consumed")
+        raise
+    finally:
+        executor.shutdown(wait=not run_token.cancelled)
+
+    for task in tasks:
+        if task.name in finished:
+            continue
+        if task.name in blocked:
+            reason = f"Skipped due to error in {blocked[task.name]}"
+        else:
+            reason = run_token.reason
+        yield TaskResult.create_skipped(name=task.name, reason=reason)
+
+
+class TaskGroup:
+    """
+    Child tasks of the running task, executed on its runner's pool.
+
+    spawn() queues a child and asks the pool to run it; join() (or
+    leaving the with block) runs any children still queued on the
+    calling thread and then waits only for children already running on
+    other workers, so a parent never blocks a worker on work that is
+    stuck behind it in the queue. Children share the parent's RunContext
+    and cancellation token; once the run is cancelled, children that have
+    not started are reported as skipped.
+
+    Child results are returned by join() in spawn order and attached to
+    the parent's TaskResult.children. Outside a runner (or in a process
+    worker) children simply run on join().
+
+    Children spawned while the parent holds a reader/writer lock such as
+    "git:write" (declared in TaskDefinition.resources, or taken with
+    hold_resources) also run on join(), on the parent's thread: the locks
+    are reentrant only for the holding thread, so a child on another
+    worker needing the lock would wait for the parent while the parent
+    waits for it. Semaphore classes like "disk" do not force this; such
+    children still fan out across the pool.
+
+    Example:
+        with TaskGroup() as group:
+            for i, chunk in enumerate(chunks):
+                group.spawn(f"scan[{i}]", scan_chunk, chunk)
+        findings = [r.data["result"] for r in group.results]
+    """
+
+    def __init__(self):
+        self._pool: Optional[ThreadPoolExecutor] = _current_pool.get()
+        self._run_context = _run_context(None)
+        self._parent_children: Optional[List[TaskResult]] = _current_children.get()
+        self._token = current_token()
+        self._condition = threading.Condition()
+        self._queue: "deque[Tuple[int, TaskDefinition, float]]" = deque()
+        self._slots: List[Optional[TaskResult]] = []
+        self._running = 0
+        self._reported = 0
+        self.results: List[TaskResult] = []
+
+    def spawn(self, name: str, func: Callable, *args: Any, **kwargs: Any) -> None:
+        """
+        Queue func(*args, **kwargs) as a child task.
+
+        Args:
+            name: Child task name (e.g. "scan[3]")
+            func: Callable to execute
+            *args: Positional arguments
+            **kwargs: Keyword arguments
+        """
+        task = TaskDefinition(name, func, args=args, kwargs=kwargs)
+        with self._condition:
+            self._queue.append((len(self._slots), task, time.perf_counter()))
+            self._slots.append(None)
+
+        # A holder's child runs on the holder's thread (see the class docstring)
+        if self._pool is not None and not holds_locks():
+            try:
+                _submit(self._pool, self._run_context, self._run_next)
+            except RuntimeError:
+                # The pool is shutting down; join() runs the child instead
+                pass
+
+    def _run_next(self) -> bool:
+        """Run one queued child, if any; returns False when the queue is empty."""
+        with self._condition:
+            if not self._queue:
+                return False
+            index, task, queued_at = self._queue.popleft()
+            self._running += 1
+
+        try:
+            if self._token is not None and self._token.cancelled:
+                result = TaskResult.create_skipped(name=task.name, reason=self._token.reason)
+            else:
+                result = _execute_task(task, run_token=self._token, queued_at=queued_at)
+        except Exception as e:
+            # This shouldn't happen as _execute_task catches exceptions
+            result = TaskResult.create_error(name=task.name, error_msg=f"Unexpected error: {e}")
+
+        with self._condition:
+            self._slots[index] = result
+            self._running -= 1
+            self._condition.notify_all()
+        return True
+
+    def join(self) -> List[TaskResult]:
+        """
+        Wait for every spawned child, helping to run queued ones.
+
+        Returns:
+            Child TaskResults in spawn order
+        """
+        # Help: run queued children here rather than wait for a free worker
+        while self._run_next():
+            pass
+
+        with self._condition:
+            while self._running:
+                self._condition.wait()
+            self.results = list(self._slots)
+
+        if self._parent_children is not None:
+            self._parent_children.extend(self.results[self._reported:])
+        self._reported = len(self.results)
+        return self.results
+
+    def __enter__(self) -> "TaskGroup":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # Join even when the body raised, so no child outlives the parent
+        self.join()
+
+
+def map_parallel(
+    func: Callable[[Any], Any],
+    iterable: Iterable[Any],
+    window: int = 32,
+    ordered: bool = True,
+    max_workers: Optional[int] = None,
+    executor: str = EXECUTOR_THREAD
+) -> Iterator[Any]:
+    """
+    Apply func to every item, with at most window calls in flight.
+
+    Items are pulled from iterable only as results are consumed, so
+    memory stays flat however long the input is. Called from a task,
+    the workers share the task's RunContext and cancellation token, and
+    no further items are submitted once the run is cancelled.
+
+    Args:
+        func: Function of one item (module-level if executor="process")
+        iterable: Items, consumed lazily
+        window: Maximum calls submitted but not yet yielded (default: 32)
+        ordered: Yield results in input order (default) or as they complete
+        max_workers: Threads to use (default: window); ignored for processes
+        executor: "thread" (default) or "process" (the shared process
+            pool; falls back to threads inside a worker process)
+
+    Yields:
+        func(item) for each item
+
+    Raises:
+        Exception: Whatever func raised, when its result is reached
+        TaskCancelledError: If the calling task's run was cancelled
+
+    Example:
+        for findings in map_parallel(scan_file, iter_paths(), window=64):
+            ...
+    """
+    if window < 1:
+        raise ValueError(f"window must be at least 1: {window}")
+    if executor not in (EXECUTOR_THREAD, EXECUTOR_PROCESS):
+        raise ValueError(f"Unknown executor: {executor}")
+
+    token = current_token()
+    items = iter(iterable)
+    pool = get_process_pool() if executor == EXECUTOR_PROCESS else None
+    threads: Optional[ThreadPoolExecutor] = None
+
+    if pool is None:
+        threads = ThreadPoolExecutor(max_workers=min(max_workers or window, window), thread_name_prefix="map")
+        run_context = _run_context(None)
+
+        def submit(item: Any) -> Future:
+            # _submit copies this context, so workers also see the task's token
+            return _submit(threads, run_context, func, item)
+    else:
+        def submit(item: Any) -> Future:
+            return pool.submit(func, item)
+
+    pending: "deque[Future]" = deque()
+    exhausted = False
+
+    def fill() -> None:
+        nonlocal exhausted
+        while not exhausted and len(pending) < window:
+            if token is not None:
+                token.raise_if_cancelled()
+            try:
+                item = next(items)
+            except StopIteration:
+                exhausted = True
+                return
+            pending.append(submit(item))
+
+    try:
+        fill()
+        while pending:
+            if ordered:
+                future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = next(iter(done))
+                pending.remove(future)
+            result = future.result()
+            # Refill before handing the result over so workers stay busy
+            fill()
+            yield result
+    finally:
+        # Early exit (consumer stopped, error, cancellation): drop queued calls
+        for future in pending:
+            future.cancel()
+        if threads is not None:
+            threads.shutdown(wait=token is None or not token.cancelled)
+
+
+def run_tasks_sequential(
+    tasks: List[TaskDefinition],
+    deadline: Optional[float] = None,
+    context: Optional[RunContext] = None
+) -> List[TaskResult]:
     """
     Execute tasks sequentially (for tasks that must run in order).
 
     Args:
         tasks: List of TaskDefinition objects to execute in order
+        deadline: Seconds the whole run may take (default: no deadline)
+        context: RunContext shared by the tasks (default: the current
+            one, or a fresh one for this run)
 
     Returns:
         List of TaskResult objects in execution order
     """
     results: List[TaskResult] = []
+    deadline_at = _deadline_at(deadline)
+    run_context = _run_context(context)
 
     for task in tasks:
-        result = _execute_task(task)
+        result = contextvars.copy_context().run(
+            _run_with_context, run_context, _execute_task, task, deadline_at, None, time.perf_counter()
+        )
         results.append(result)
 
-        # Stop on error for sequential tasks
-        if result.status == TaskStatus.ERROR:
+        # Stop on error or timeout for sequential tasks
+        if result.status in _FAILED_STATUSES:
             # Mark remaining tasks as skipped
             for remaining_task in tasks[len(results):]:
                 results.append(TaskResult.create_skipped(
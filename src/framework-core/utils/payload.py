@@ -0,0 +1,153 @@
+"""
+Bounded task payloads for CLI output.
+
+Task data can hold very long lists (every staged file of a large
+change, copied into several results). Before output, PayloadSpiller
+replaces each list longer than max_items, at any depth of the data,
+with a summary:
+
+    {"count": 12000, "first": [...first max_items items...], "truncated": true}
+
+The complete data of such a task is written to a sidecar file,
+.claude/cache/results/<run-id>/<task>.json, whose path is reported as
+the task's data_file. `framework-core result show <run-id> <task>`
+prints it again. Only the most recent KEPT_RUNS runs are kept.
+"""
+
+import json
+import os
+import re
+import secrets
+import shutil
+from dataclasses import replace
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from .encoding import dumps
+from .result import ProtocolResult, TaskResult
+
+RESULTS_DIR = Path(".claude/cache/results")
+
+# Lists longer than this are summarized in the output
+DEFAULT_MAX_ITEMS = 100
+
+# Number of runs whose sidecar files are kept
+KEPT_RUNS = 20
+
+
+def new_run_id() -> str:
+    """Sortable unique run id, e.g. 20260105-143012-3fa9c1."""
+    return f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+
+
+def _file_name(task: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", task) + ".json"
+
+
+def summarize(value: Any, max_items: int) -> Tuple[Any, bool]:
+    """
+    Replace lists longer than max_items with a count and their first items.
+
+    Args:
+        value: JSON-compatible value
+        max_items: Longest list kept as is
+
+    Returns:
+        (bounded value, whether anything was truncated)
+    """
+    if isinstance(value, dict):
+        bounded = {}
+        truncated = False
+        for key, item in value.items():
+            bounded[key], cut = summarize(item, max_items)
+            truncated = truncated or cut
+        return (bounded, True) if truncated else (value, False)
+
+    if isinstance(value, (list, tuple)):
+        if len(value) > max_items:
+            head = [summarize(item, max_items)[0] for item in value[:max_items]]
+            return {"count": len(value), "first": head, "truncated": True}, True
+        items = [summarize(item, max_items) for item in value]
+        if any(cut for _, cut in items):
+            return [item for item, _ in items], True
+        return value, False
+
+    return value, False
+
+
+class PayloadSpiller:
+    """
+    Bounds the payloads of one run's results and spills the full data.
+
+    Args:
+        run_id: Id of the run (see new_run_id)
+        max_items: Longest list kept inline
+        directory: Root of the sidecar files
+    """
+
+    def __init__(self, run_id: str, max_items: int = DEFAULT_MAX_ITEMS, directory: Path = RESULTS_DIR):
+        self.run_id = run_id
+        self.max_items = max_items
+        self.directory = Path(directory)
+        self._pruned = False
+
+    def bound(self, task_result: TaskResult) -> TaskResult:
+        """
+        Return task_result with bounded data.
+
+        When something was truncated the full data is written to a
+        sidecar file and the copy's data_file points at it; otherwise
+        task_result itself is returned.
+        """
+        if task_result.data is None:
+            return task_result
+
+        bounded, truncated = summarize(task_result.data, self.max_items)
+        if not truncated:
+            return task_result
+
+        path = self._write(task_result.name, task_result.data)
+        return replace(task_result, data=bounded, data_file=str(path))
+
+    def bound_protocol(self, result: ProtocolResult) -> ProtocolResult:
+        """Return result with every task bounded and the run id set."""
+        return replace(result, tasks=[self.bound(t) for t in result.tasks], run_id=self.run_id)
+
+    def _write(self, task: str, data: Dict[str, Any]) -> Path:
+        run_dir = self.directory / self.run_id
+        run_dir.mkdir(parents=True, exist_ok=True)
+        if not self._pruned:
+            self._pruned = True
+            prune_runs(self.directory)
+
+        path = run_dir / _file_name(task)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            f.write(dumps({"run_id": self.run_id, "task": task, "data": data}))
+        os.replace(tmp_path, path)
+        return path
+
+
+def prune_runs(directory: Path = RESULTS_DIR, keep: int = KEPT_RUNS) -> None:
+    """Delete the sidecar files of all but the newest keep runs."""
+    try:
+        runs = sorted(p for p in Path(directory).iterdir() if p.is_dir())
+    except OSError:
+        return
+    for run_dir in runs[:-keep] if keep > 0 else runs:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+
+def load_spilled(run_id: str, task: str, directory: Path = RESULTS_DIR) -> Dict[str, Any]:
+    """
+    Read the full data of a task from its sidecar file.
+
+    Raises:
+        FileNotFoundError: If the run or task has no sidecar file
+    """
+    path = Path(directory) / Path(run_id).name / _file_name(task)
+    if Path(run_id).name != run_id or not path.is_file():
+        raise FileNotFoundError(f"No stored payload for task {task!r} of run {run_id!r} ({path})")
+    with open(path, "r") as f:
+        return json.load(f)
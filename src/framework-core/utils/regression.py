@@ -0,0 +1,112 @@
+"""
+Performance-regression detection against a rolling baseline.
+
+The baseline of a task is an exponentially weighted moving average of
+its past durations (the history from utils.scheduler.load_task_history,
+oldest first) together with an exponentially weighted variance, so
+recent runs count most and old slow or fast phases fade out.
+
+A finished task is reported as a regression when all of these hold:
+- the baseline has at least MIN_SAMPLES runs
+- it ran more than Z_THRESHOLD standard deviations above the average
+- it took at least MIN_RATIO times the average
+- and at least MIN_DELTA_MS longer (sub-millisecond noise is ignored)
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+# Weight of the newest sample in the moving average
+EWMA_ALPHA = 0.3
+
+MIN_SAMPLES = 5
+Z_THRESHOLD = 3.0
+MIN_RATIO = 1.5
+MIN_DELTA_MS = 5.0
+
+
+@dataclass
+class Baseline:
+    """
+    Rolling duration baseline of one task.
+
+    Attributes:
+        mean_ms: Exponentially weighted average duration
+        stddev_ms: Exponentially weighted standard deviation
+        samples: Number of runs behind the baseline
+    """
+    mean_ms: float
+    stddev_ms: float
+    samples: int
+
+
+def build_baseline(durations: List[float], alpha: float = EWMA_ALPHA) -> Baseline:
+    """
+    Fold durations (oldest first) into an EWMA baseline.
+
+    Args:
+        durations: Past durations in ms
+        alpha: Weight of each new sample
+
+    Returns:
+        Baseline of the durations
+    """
+    mean = durations[0]
+    variance = 0.0
+    for value in durations[1:]:
+        delta = value - mean
+        mean += alpha * delta
+        # Incremental EW variance (West 1979)
+        variance = (1 - alpha) * (variance + alpha * delta * delta)
+    return Baseline(mean_ms=mean, stddev_ms=math.sqrt(variance), samples=len(durations))
+
+
+def build_baselines(history: Dict[str, List[float]]) -> Dict[str, Baseline]:
+    """Baselines for every task with recorded durations."""
+    return {name: build_baseline(durations) for name, durations in history.items() if durations}
+
+
+def detect_regressions(results: List[Any], history: Dict[str, List[float]]) -> List[Dict[str, Any]]:
+    """
+    Compare a run's task durations against their baselines.
+
+    Args:
+        results: TaskResult objects of the run
+        history: Past durations recorded before the run (see
+            utils.scheduler.load_task_history)
+
+    Returns:
+        One entry per regressed task, slowest relative to its baseline
+        first, with duration_ms, baseline_ms, stddev_ms, ratio, z_score
+        and samples
+    """
+    baselines = build_baselines(history)
+    regressions = []
+
+    for result in results:
+        baseline = baselines.get(result.name)
+        if baseline is None or baseline.samples < MIN_SAMPLES or result.status.value == "skipped":
+            continue
+
+        duration_ms = result.precise_duration_ms
+        delta = duration_ms - baseline.mean_ms
+        if delta < MIN_DELTA_MS or duration_ms < baseline.mean_ms * MIN_RATIO:
+            continue
+        # A perfectly steady history has no spread; any such slowdown counts
+        z_score = delta / baseline.stddev_ms if baseline.stddev_ms > 0 else math.inf
+        if z_score <= Z_THRESHOLD:
+            continue
+
+        regressions.append({
+            "task": result.name,
+            "duration_ms": round(duration_ms, 3),
+            "baseline_ms": round(baseline.mean_ms, 3),
+            "stddev_ms": round(baseline.stddev_ms, 3),
+            "ratio": round(duration_ms / baseline.mean_ms, 2) if baseline.mean_ms > 0 else None,
+            "z_score": round(z_score, 2) if math.isfinite(z_score) else None,
+            "samples": baseline.samples,
+        })
+
+    regressions.sort(key=lambda r: -(r["ratio"] or math.inf))
+    return regressions
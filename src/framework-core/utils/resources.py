@@ -0,0 +1,280 @@
+"""
+Resource classes for limiting concurrency between tasks.
+
+A task declares the shared resources it uses in TaskDefinition.resources
+and the runner holds them while the task body runs:
+
+- "network", "disk" or any other plain name: a counting semaphore
+  (see DEFAULT_LIMITS; unknown names allow one holder at a time)
+- "<name>:read" / "<name>:write": a reader/writer lock, any number of
+  readers or a single writer
+
+Git uses "git:read" and "git:write". Independently of task declarations,
+_run_git_command in tasks/git.py runs read-only git commands lock-free
+(GIT_OPTIONAL_LOCKS=0, so `git status` does not refresh .git/index) and
+holds "git:write" for commands that modify the repository, which keeps
+them from racing for .git/index.lock.
+
+Locks are reentrant for the thread holding them, so a task declared
+with "git:write" can call stage_files() and commit() freely. Resources
+are always acquired in sorted order, so tasks cannot deadlock each other.
+Reentrancy is per thread, though: work a lock holder hands to another
+thread and waits for must not need the same lock (TaskGroup checks
+holds_locks() and runs such children on the holder's thread). Semaphore
+slots are not re-entered that way: a child on another worker simply
+takes a slot of its own.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .cancellation import CancellationToken, current_token
+
+# Common resource classes
+NETWORK = "network"
+DISK = "disk"
+GIT_READ = "git:read"
+GIT_WRITE = "git:write"
+
+# Holders allowed at once per semaphore class
+DEFAULT_LIMITS: Dict[str, int] = {
+    NETWORK: 4,
+    DISK: 2,
+}
+
+# How often a blocked acquire re-checks the cancellation token (seconds)
+_POLL_INTERVAL_S = 0.05
+
+_MODES = ("read", "write")
+
+
+def parse_resource(resource: str) -> Tuple[str, Optional[str]]:
+    """
+    Split a resource declaration into its name and mode.
+
+    Args:
+        resource: e.g. "network" or "git:write"
+
+    Returns:
+        (name, mode) where mode is "read", "write" or None for semaphores
+
+    Raises:
+        ValueError: If the mode is not read or write
+    """
+    name, sep, mode = resource.partition(":")
+    if not name or (sep and mode not in _MODES):
+        raise ValueError(f"Invalid resource: {resource!r} (expected NAME, NAME:read or NAME:write)")
+    return name, (mode if sep else None)
+
+
+def _wait(condition: threading.Condition, token: Optional[CancellationToken]) -> None:
+    """Wait on a condition, raising TaskCancelledError once token is cancelled."""
+    if token is None:
+        condition.wait()
+        return
+    token.raise_if_cancelled()
+    condition.wait(_POLL_INTERVAL_S)
+    token.raise_if_cancelled()
+
+
+class ResourceSemaphore:
+    """Counting semaphore that is reentrant per thread."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._condition = threading.Condition()
+        self._holders: Dict[int, int] = {}  # thread ident -> depth
+
+    def acquire(self, token: Optional[CancellationToken] = None) -> None:
+        ident = threading.get_ident()
+        with self._condition:
+            if ident in self._holders:
+                self._holders[ident] += 1
+                return
+            while len(self._holders) >= self.limit:
+                _wait(self._condition, token)
+            self._holders[ident] = 1
+
+    def release(self) -> None:
+        ident = threading.get_ident()
+        with self._condition:
+            self._holders[ident] -= 1
+            if not self._holders[ident]:
+                del self._holders[ident]
+                self._condition.notify_all()
+
+
+class ReadWriteLock:
+    """
+    Writer-preferring reader/writer lock, reentrant per thread.
+
+    A thread holding the write lock may also take the read lock. A
+    thread holding only the read lock cannot upgrade to write (that
+    would deadlock against another upgrading reader) and gets a
+    RuntimeError instead.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._readers: Dict[int, int] = {}  # thread ident -> depth
+        self._writer: Optional[int] = None
+        self._write_depth = 0
+        self._waiting_writers = 0
+
+    def acquire_read(self, token: Optional[CancellationToken] = None) -> None:
+        ident = threading.get_ident()
+        with self._condition:
+            if self._writer == ident or ident in self._readers:
+                self._readers[ident] = self._readers.get(ident, 0) + 1
+                return
+            while self._writer is not None or self._waiting_writers:
+                _wait(self._condition, token)
+            self._readers[ident] = 1
+
+    def release_read(self) -> None:
+        ident = threading.get_ident()
+        with self._condition:
+            self._readers[ident] -= 1
+            if not self._readers[ident]:
+                del self._readers[ident]
+                self._condition.notify_all()
+
+    def acquire_write(self, token: Optional[CancellationToken] = None) -> None:
+        ident = threading.get_ident()
+        with self._condition:
+            if self._writer == ident:
+                self._write_depth += 1
+                return
+            if ident in self._readers:
+                raise RuntimeError("Cannot upgrade a read lock to a write lock; declare the write resource instead")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    _wait(self._condition, token)
+            finally:
+                self._waiting_writers -= 1
+            self._writer = ident
+            self._write_depth = 1
+
+    def release_write(self) -> None:
+        with self._condition:
+            self._write_depth -= 1
+            if not self._write_depth:
+                self._writer = None
+                self._condition.notify_all()
+
+
+class ResourceManager:
+    """
+    Registry of the semaphores and reader/writer locks behind resource names.
+
+    Args:
+        limits: Holders allowed at once per semaphore class
+    """
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        self._lock = threading.Lock()
+        self._limits = dict(limits or {})
+        self._semaphores: Dict[str, ResourceSemaphore] = {}
+        self._rw_locks: Dict[str, ReadWriteLock] = {}
+        self._local = threading.local()  # .depth: hold() blocks with reader/writer locks entered by this thread
+
+    def set_limit(self, name: str, limit: int) -> None:
+        """Set the number of concurrent holders of a semaphore class."""
+        if limit < 1:
+            raise ValueError(f"Resource limit must be at least 1: {name}={limit}")
+        with self._lock:
+            self._limits[name] = limit
+            semaphore = self._semaphores.get(name)
+        if semaphore is not None:
+            with semaphore._condition:
+                semaphore.limit = limit
+                semaphore._condition.notify_all()
+
+    def holding_locks(self) -> bool:
+        """True while the calling thread holds a reader/writer lock via hold()."""
+        return getattr(self._local, "depth", 0) > 0
+
+    def _semaphore(self, name: str) -> ResourceSemaphore:
+        with self._lock:
+            if name not in self._semaphores:
+                self._semaphores[name] = ResourceSemaphore(self._limits.get(name, 1))
+            return self._semaphores[name]
+
+    def _rw_lock(self, name: str) -> ReadWriteLock:
+        with self._lock:
+            if name not in self._rw_locks:
+                self._rw_locks[name] = ReadWriteLock()
+            return self._rw_locks[name]
+
+    @contextmanager
+    def hold(self, resources: Iterable[str], token: Optional[CancellationToken] = None) -> Iterator[None]:
+        """
+        Hold every resource for the duration of a with block.
+
+        Args:
+            resources: Resource declarations (see parse_resource)
+            token: Cancellation token checked while waiting (default:
+                the current task's token)
+
+        Raises:
+            TaskCancelledError: If the token is cancelled while waiting
+        """
+        if token is None:
+            token = current_token()
+
+        releases: List = []
+        locks = False
+        try:
+            # Sorted order: two tasks never wait on each other's resources;
+            # write before read so a name declared both ways does not upgrade
+            for name, mode in sorted({parse_resource(r) for r in resources}, key=lambda r: (r[0], r[1] != "write", r[1] or "")):
+                if mode is None:
+                    semaphore = self._semaphore(name)
+                    semaphore.acquire(token)
+                    releases.append(semaphore.release)
+                elif mode == "read":
+                    rw_lock = self._rw_lock(name)
+                    rw_lock.acquire_read(token)
+                    releases.append(rw_lock.release_read)
+                    locks = True
+                else:
+                    rw_lock = self._rw_lock(name)
+                    rw_lock.acquire_write(token)
+                    releases.append(rw_lock.release_write)
+                    locks = True
+            if locks:
+                self._local.depth = getattr(self._local, "depth", 0) + 1
+                releases.append(self._leave)
+            yield
+        finally:
+            for release in reversed(releases):
+                release()
+
+    def _leave(self) -> None:
+        self._local.depth -= 1
+
+
+# Process-wide manager used by the runners and tasks/git.py
+_manager = ResourceManager(DEFAULT_LIMITS)
+
+
+def get_resource_manager() -> ResourceManager:
+    """Get the process-wide ResourceManager."""
+    return _manager
+
+
+def set_resource_limit(name: str, limit: int) -> None:
+    """Set the concurrency limit of a semaphore class (e.g. "network")."""
+    _manager.set_limit(name, limit)
+
+
+def hold_resources(resources: Iterable[str], token: Optional[CancellationToken] = None):
+    """Hold resources on the process-wide manager (context manager)."""
+    return _manager.hold(resources, token)
+
+
+def holds_locks() -> bool:
+    """True while the calling thread holds a reader/writer lock of the process-wide manager."""
+    return _manager.holding_locks()
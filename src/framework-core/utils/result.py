@@ -3,19 +3,42 @@ Result dataclasses for structured task and protocol outputs.
 
 TaskResult: Individual task execution result
 ProtocolResult: Aggregated protocol execution result
+
+Both use __slots__ (a protocol run creates many of them) and describe
+their JSON form once, in _json_items(): to_dict() builds it as a dict,
+utils.encoding streams it without building the dict tree.
 """
 
-from dataclasses import dataclass, field, asdict
-from typing import Optional, List, Any, Dict
+from dataclasses import dataclass, field, fields
+from typing import Optional, List, Any, Dict, Iterator, Tuple
 from enum import Enum
 import json
 
 
+def _slotted(cls):
+    """
+    Rebuild a dataclass with __slots__ for its fields.
+
+    Equivalent to dataclass(slots=True), which needs Python 3.10. The
+    generated __init__ keeps the defaults, so the class attributes that
+    held them can go.
+    """
+    cls_dict = dict(cls.__dict__)
+    names = tuple(f.name for f in fields(cls))
+    for name in names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    cls_dict["__slots__"] = names
+    return type(cls)(cls.__name__, cls.__bases__, cls_dict)
+
+
 class TaskStatus(Enum):
     """Task execution status."""
     SUCCESS = "success"
     ERROR = "error"
     SKIPPED = "skipped"
+    TIMEOUT = "timeout"
 
 
 class ProtocolStatus(Enum):
@@ -25,35 +48,86 @@ class ProtocolStatus(Enum):
     USER_INPUT_REQUIRED = "user_input_required"
 
 
+@_slotted
 @dataclass
 class TaskResult:
     """
     Result of a single task execution.
 
+    Instances are picklable so tasks can run in a process pool.
+
     Attributes:
         name: Task identifier
-        status: Execution status (success/error/skipped)
-        duration_ms: Execution time in milliseconds
+        status: Execution status (success/error/skipped/timeout)
+        duration_ms: Execution time in milliseconds (truncated)
         data: Optional task-specific data
         error: Error message if status is error
+        duration_ns: Execution time in nanoseconds, when measured by the runner
+        started_at: time.perf_counter() when a worker started the task
+        ended_at: time.perf_counter() when the task finished
+        queue_wait_ms: Time between submission and start
+        worker: Name of the thread that ran the task
+        children: Results of child tasks spawned through a TaskGroup
+        usage: CPU time, peak RSS growth, subprocesses and I/O of the
+            task body, when usage capture is on (see utils.usage)
+        data_file: Sidecar file holding the full data when data was
+            bounded for output (see utils.payload)
+        blocked_by: Dependency whose completion let the task start (the
+            last of its depends_on to finish), set by the graph runner
+
+    The timing fields other than duration_ns are filled in by the runner
+    and are not part of to_dict(); see utils.trace for exporting them as
+    a timeline.
+    Children appear in to_dict() as a summary without their data.
     """
     name: str
     status: TaskStatus
     duration_ms: int = 0
     data: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    duration_ns: Optional[int] = None
+    started_at: Optional[float] = None
+    ended_at: Optional[float] = None
+    queue_wait_ms: Optional[float] = None
+    worker: Optional[str] = None
+    children: List["TaskResult"] = field(default_factory=list)
+    usage: Optional[Dict[str, Any]] = None
+    data_file: Optional[str] = None
+    blocked_by: Optional[str] = None
+
+    def _json_items(self) -> Iterator[Tuple[str, Any]]:
+        """Key/value pairs of the JSON form, in output order."""
+        yield "name", self.name
+        yield "status", self.status.value
+        yield "duration_ms", self.duration_ms
+        if self.duration_ns is not None:
+            yield "duration_ns", self.duration_ns
+        if self.data is not None:
+            yield "data", self.data
+        if self.data_file is not None:
+            yield "data_file", self.data_file
+        if self.error is not None:
+            yield "error", self.error
+        if self.usage is not None:
+            yield "usage", self.usage
+        if self.children:
+            yield "children", [child.to_summary_dict() for child in self.children]
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for JSON serialization."""
+        return dict(self._json_items())
+
+    def to_summary_dict(self) -> Dict[str, Any]:
+        """Like to_dict() but without data, for nesting under a parent."""
         result = {
             "name": self.name,
             "status": self.status.value,
             "duration_ms": self.duration_ms,
         }
-        if self.data is not None:
-            result["data"] = self.data
         if self.error is not None:
             result["error"] = self.error
+        if self.children:
+            result["children"] = [child.to_summary_dict() for child in self.children]
         return result
 
     def to_json(self) -> str:
@@ -75,7 +149,62 @@ class TaskResult:
         """Create a skipped task result."""
         return cls(name=name, status=TaskStatus.SKIPPED, duration_ms=0, data={"reason": reason} if reason else None, error=None)
 
+    @classmethod
+    def create_timeout(cls, name: str, timeout_s: float, duration_ms: int = 0) -> "TaskResult":
+        """Create a timed-out task result."""
+        return cls(name=name, status=TaskStatus.TIMEOUT, duration_ms=duration_ms, data={"timeout_s": timeout_s}, error=f"Timed out after {timeout_s:g}s")
+
+    @property
+    def precise_duration_ms(self) -> float:
+        """Duration in milliseconds with sub-millisecond precision when available."""
+        if self.duration_ns is not None:
+            return self.duration_ns / 1e6
+        return float(self.duration_ms)
+
+
+def _timing_summary(tasks: List[TaskResult]) -> Tuple[Optional[float], float, Optional[float], List[str]]:
+    """
+    Derive wall-clock time, summed task time, efficiency and critical path.
+
+    Uses the runner's started_at/ended_at stamps; results without them
+    (skipped tasks, hand-built results) only count towards task time.
+
+    Returns:
+        (wall_clock_ms, task_time_ms, parallel_efficiency, critical_path)
+    """
+    task_time_ms = sum(t.precise_duration_ms for t in tasks)
+    timed = [t for t in tasks if t.started_at is not None and t.ended_at is not None]
+    if not timed:
+        return None, task_time_ms, None, []
+
+    wall_s = max(t.ended_at for t in timed) - min(t.started_at for t in timed)
+    wall_clock_ms = wall_s * 1000
+
+    # Peak number of tasks running at once
+    events = sorted([(t.started_at, 1) for t in timed] + [(t.ended_at, -1) for t in timed])
+    running = peak = 0
+    for _, delta in events:
+        running += delta
+        peak = max(peak, running)
+
+    # Speedup over running the same tasks back to back, per concurrent slot
+    timed_ms = sum((t.ended_at - t.started_at) * 1000 for t in timed)
+    efficiency = round(timed_ms / (wall_clock_ms * peak), 3) if wall_clock_ms > 0 and peak else None
+
+    # Walk back from the last task to finish along the dependencies that
+    # held each task up (recorded by the graph runner as blocked_by)
+    by_name = {t.name: t for t in timed}
+    current = max(timed, key=lambda t: t.ended_at)
+    path = [current.name]
+    while current.blocked_by in by_name and current.blocked_by not in path:
+        current = by_name[current.blocked_by]
+        path.append(current.name)
+    path.reverse()
+
+    return wall_clock_ms, task_time_ms, efficiency, path
 
+
+@_slotted
 @dataclass
 class ProtocolResult:
     """
@@ -85,9 +214,20 @@ class ProtocolResult:
         protocol: Protocol name (cold-start, completion)
         status: Overall execution status
         tasks: List of individual task results
-        total_duration_ms: Total execution time
+        total_duration_ms: Wall-clock time of the run (sum of task times
+            when the tasks carry no timing stamps)
         user_prompt: Optional prompt for user input (when status is user_input_required)
         summary: Optional summary message
+        wall_clock_ms: Wall-clock time with sub-millisecond precision
+        task_time_ms: Sum of the task durations
+        parallel_efficiency: task_time_ms / (wall_clock_ms * peak
+            concurrency); 1.0 means every busy slot was kept busy
+        critical_path: The last task to finish, preceded by the chain of
+            dependencies that held it up (see TaskResult.blocked_by)
+        run_id: Id under which bounded task payloads were stored (see
+            utils.payload)
+        perf_regressions: Tasks that ran markedly slower than their
+            rolling baseline (see utils.regression)
     """
     protocol: str
     status: ProtocolStatus
@@ -95,19 +235,61 @@ class ProtocolResult:
     total_duration_ms: int = 0
     user_prompt: Optional[str] = None
     summary: Optional[str] = None
+    wall_clock_ms: Optional[float] = None
+    task_time_ms: float = 0.0
+    parallel_efficiency: Optional[float] = None
+    critical_path: List[str] = field(default_factory=list)
+    run_id: Optional[str] = None
+    perf_regressions: List[Dict[str, Any]] = field(default_factory=list)
 
-    def to_dict(self) -> Dict[str, Any]:
-        """Convert to dictionary for JSON serialization."""
-        result = {
-            "protocol": self.protocol,
-            "status": self.status.value,
-            "tasks": [t.to_dict() for t in self.tasks],
-            "total_duration_ms": self.total_duration_ms,
-        }
+    def __post_init__(self):
+        if self.tasks and self.wall_clock_ms is None:
+            self.refresh_timing()
+
+    def refresh_timing(self) -> None:
+        """Recompute the timing summary from the task results."""
+        wall_clock_ms, self.task_time_ms, self.parallel_efficiency, self.critical_path = _timing_summary(self.tasks)
+        if wall_clock_ms is not None:
+            self.set_wall_clock(wall_clock_ms)
+        else:
+            self.total_duration_ms = int(self.task_time_ms)
+
+    def set_wall_clock(self, wall_clock_ms: float) -> None:
+        """
+        Record the measured wall-clock time of the whole protocol.
+
+        The protocol entry points call this with their end-to-end time,
+        which also covers work outside the tasks.
+        """
+        self.wall_clock_ms = round(wall_clock_ms, 3)
+        self.total_duration_ms = int(wall_clock_ms)
+
+    def _json_items(self) -> Iterator[Tuple[str, Any]]:
+        """Key/value pairs of the JSON form, in output order (tasks as TaskResult objects)."""
+        yield "protocol", self.protocol
+        yield "status", self.status.value
+        if self.run_id is not None:
+            yield "run_id", self.run_id
+        yield "tasks", self.tasks
+        yield "total_duration_ms", self.total_duration_ms
+        yield "task_time_ms", round(self.task_time_ms, 3)
+        if self.wall_clock_ms is not None:
+            yield "wall_clock_ms", self.wall_clock_ms
+        if self.parallel_efficiency is not None:
+            yield "parallel_efficiency", self.parallel_efficiency
+        if self.critical_path:
+            yield "critical_path", self.critical_path
+        if self.perf_regressions:
+            yield "perf_regressions", self.perf_regressions
         if self.user_prompt is not None:
-            result["user_prompt"] = self.user_prompt
+            yield "user_prompt", self.user_prompt
         if self.summary is not None:
-            result["summary"] = self.summary
+            yield "summary", self.summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization."""
+        result = dict(self._json_items())
+        result["tasks"] = [t.to_dict() for t in self.tasks]
         return result
 
     def to_json(self) -> str:
@@ -129,10 +311,15 @@ class ProtocolResult:
         """Count of skipped tasks."""
         return sum(1 for t in self.tasks if t.status == TaskStatus.SKIPPED)
 
+    @property
+    def timeout_count(self) -> int:
+        """Count of timed-out tasks."""
+        return sum(1 for t in self.tasks if t.status == TaskStatus.TIMEOUT)
+
     def add_task(self, task: TaskResult) -> None:
         """Add a task result."""
         self.tasks.append(task)
-        self.total_duration_ms += task.duration_ms
+        self.refresh_timing()
 
     def get_errors(self) -> List[TaskResult]:
         """Get all error tasks."""
@@ -141,35 +328,29 @@ class ProtocolResult:
     @classmethod
     def success(cls, protocol: str, tasks: List[TaskResult], summary: Optional[str] = None) -> "ProtocolResult":
         """Create a successful protocol result."""
-        total_ms = sum(t.duration_ms for t in tasks)
         return cls(
             protocol=protocol,
             status=ProtocolStatus.SUCCESS,
             tasks=tasks,
-            total_duration_ms=total_ms,
             summary=summary
         )
 
     @classmethod
     def error(cls, protocol: str, tasks: List[TaskResult], summary: Optional[str] = None) -> "ProtocolResult":
         """Create an error protocol result."""
-        total_ms = sum(t.duration_ms for t in tasks)
         return cls(
             protocol=protocol,
             status=ProtocolStatus.ERROR,
             tasks=tasks,
-            total_duration_ms=total_ms,
             summary=summary
         )
 
     @classmethod
     def user_input_required(cls, protocol: str, tasks: List[TaskResult], prompt: str) -> "ProtocolResult":
         """Create a protocol result requiring user input."""
-        total_ms = sum(t.duration_ms for t in tasks)
         return cls(
             protocol=protocol,
             status=ProtocolStatus.USER_INPUT_REQUIRED,
             tasks=tasks,
-            total_duration_ms=total_ms,
             user_prompt=prompt
         )
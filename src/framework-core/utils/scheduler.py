@@ -0,0 +1,238 @@
+"""
+History-driven schedule planning.
+
+Past task durations are read from the protocol logs (utils/logger.py),
+where JsonLogObserver (utils/hooks.py) records every task. From them plan_schedule() derives:
+- a priority per task (longest expected remaining path first, i.e.
+  longest-task-first for independent tasks)
+- the tasks cheap enough to run inline on the calling thread
+- a worker count sized from the expected load and os.cpu_count()
+- a simulated timeline and the estimated makespan
+
+The runners accept the resulting SchedulePlan through their plan=
+argument; without one they keep submitting in list order.
+"""
+
+import heapq
+import math
+import os
+from dataclasses import dataclass, field
+from statistics import median
+from typing import Any, Dict, List, Set, Tuple
+
+# Tasks expected to finish faster than this run inline on the calling thread
+INLINE_THRESHOLD_MS = 1.0
+
+# Estimate for tasks with no recorded history
+DEFAULT_ESTIMATE_MS = 50.0
+
+# Number of most recent samples per task used for the estimate
+HISTORY_SAMPLES = 20
+
+
+@dataclass
+class SchedulePlan:
+    """
+    Predicted schedule for a set of tasks.
+
+    Attributes:
+        workers: Thread pool size to use
+        priority: Task name -> rank (higher is submitted first)
+        inline: Names of tasks to run on the calling thread
+        estimates_ms: Task name -> expected duration
+        samples: Task name -> number of history samples behind the estimate
+        timeline: Task name -> (predicted start ms, predicted end ms, lane)
+        makespan_ms: Estimated wall-clock time of the run
+    """
+    workers: int
+    priority: Dict[str, float] = field(default_factory=dict)
+    inline: Set[str] = field(default_factory=set)
+    estimates_ms: Dict[str, float] = field(default_factory=dict)
+    samples: Dict[str, int] = field(default_factory=dict)
+    timeline: Dict[str, Tuple[float, float, str]] = field(default_factory=dict)
+    makespan_ms: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization (tasks in predicted start order)."""
+        tasks = []
+        for name, (start, end, lane) in sorted(self.timeline.items(), key=lambda item: (item[1][0], -self.priority.get(item[0], 0))):
+            tasks.append({
+                "name": name,
+                "expected_ms": round(self.estimates_ms.get(name, 0.0), 3),
+                "history_samples": self.samples.get(name, 0),
+                "lane": lane,
+                "predicted_start_ms": round(start, 3),
+                "predicted_end_ms": round(end, 3),
+            })
+        return {
+            "workers": self.workers,
+            "estimated_makespan_ms": round(self.makespan_ms, 3),
+            "tasks": tasks,
+        }
+
+
+def load_task_history(protocol: str, days: int = 7) -> Dict[str, List[float]]:
+    """
+    Collect recent task durations from the protocol's logs.
+
+    Args:
+        protocol: Protocol name (log subdirectory)
+        days: Number of days to look back
+
+    Returns:
+        Task name -> durations in ms, most recent last
+    """
+    from .logger import get_recent_logs
+
+    history: Dict[str, List[float]] = {}
+    entries = [e for e in get_recent_logs(protocol, days=days) if "task" in e and "duration_ms" in e]
+    entries.sort(key=lambda e: e.get("timestamp", ""))
+
+    for entry in entries:
+        if entry.get("status") == "skipped":
+            continue
+        try:
+            history.setdefault(entry["task"], []).append(float(entry["duration_ms"]))
+        except (TypeError, ValueError):
+            continue
+
+    return history
+
+
+def estimate_durations(history: Dict[str, List[float]]) -> Dict[str, float]:
+    """Median of the most recent samples per task."""
+    return {
+        name: median(samples[-HISTORY_SAMPLES:])
+        for name, samples in history.items()
+        if samples
+    }
+
+
+def plan_schedule(
+    tasks: List[Any],
+    history: Dict[str, List[float]],
+    max_workers: int = 10
+) -> SchedulePlan:
+    """
+    Plan the execution of tasks from their duration history.
+
+    Args:
+        tasks: TaskDefinition objects (dependencies are honoured)
+        history: Output of load_task_history
+        max_workers: Upper bound on the pool size
+
+    Returns:
+        SchedulePlan for run_tasks_parallel / run_task_graph
+    """
+    measured = estimate_durations(history)
+    estimates = {t.name: measured.get(t.name, DEFAULT_ESTIMATE_MS) for t in tasks}
+    samples = {t.name: min(len(history.get(t.name, [])), HISTORY_SAMPLES) for t in tasks}
+
+    # Only measured, plain thread tasks qualify; anything with a budget,
+    # an executor hint or resources to wait for keeps its own machinery
+    inline = {
+        t.name for t in tasks
+        if t.name in measured
+        and estimates[t.name] < INLINE_THRESHOLD_MS
+        and t.executor == "thread"
+        and t.timeout_s is None
+        and not t.resources
+    }
+
+    # Rank = own estimate + longest chain of dependents (upward rank)
+    dependents: Dict[str, List[str]] = {t.name: [] for t in tasks}
+    for t in tasks:
+        for dep in t.depends_on:
+            if dep in dependents:
+                dependents[dep].append(t.name)
+
+    priority: Dict[str, float] = {}
+
+    def rank(name: str) -> float:
+        if name not in priority:
+            priority[name] = estimates[name] + max((rank(child) for child in dependents[name]), default=0.0)
+        return priority[name]
+
+    for t in tasks:
+        rank(t.name)
+
+    pooled = [t.name for t in tasks if t.name not in inline]
+    workers = _size_pool(pooled, estimates, max_workers)
+
+    plan = SchedulePlan(
+        workers=workers,
+        priority=priority,
+        inline=inline,
+        estimates_ms=estimates,
+        samples=samples,
+    )
+    plan.timeline, plan.makespan_ms = _simulate(tasks, plan)
+    return plan
+
+
+def _size_pool(pooled: List[str], estimates: Dict[str, float], max_workers: int) -> int:
+    """
+    Choose the pool size.
+
+    More workers than total/longest cannot shorten the run (the longest
+    task bounds it), and beyond cpu_count + 4 threads mostly contend.
+    """
+    if not pooled:
+        return 1
+
+    total = sum(estimates[name] for name in pooled)
+    longest = max(estimates[name] for name in pooled)
+    useful = math.ceil(total / longest) if longest > 0 else len(pooled)
+    cpu_cap = (os.cpu_count() or 1) + 4
+
+    return max(1, min(max_workers, len(pooled), useful, cpu_cap))
+
+
+def _simulate(tasks: List[Any], plan: SchedulePlan) -> Tuple[Dict[str, Tuple[float, float, str]], float]:
+    """List-schedule the tasks on plan.workers lanes plus the inline lane."""
+    remaining = {t.name: set(t.depends_on) for t in tasks}
+    dependents: Dict[str, List[str]] = {t.name: [] for t in tasks}
+    for t in tasks:
+        for dep in t.depends_on:
+            if dep in dependents:
+                dependents[dep].append(t.name)
+
+    timeline: Dict[str, Tuple[float, float, str]] = {}
+    ready = [name for name, deps in remaining.items() if not deps]
+    running: List[Tuple[float, str]] = []
+    free = plan.workers
+    now = 0.0
+    inline_clock = 0.0
+
+    def finish(name: str) -> None:
+        for child in dependents[name]:
+            remaining[child].discard(name)
+            if not remaining[child]:
+                ready.append(child)
+
+    while ready or running:
+        ready.sort(key=lambda name: -plan.priority[name])
+        pending = []
+        for name in ready:
+            if name in plan.inline:
+                start = max(now, inline_clock)
+                inline_clock = start + plan.estimates_ms[name]
+                timeline[name] = (start, inline_clock, "inline")
+                finish(name)
+            elif free > 0:
+                free -= 1
+                end = now + plan.estimates_ms[name]
+                timeline[name] = (now, end, "pool")
+                heapq.heappush(running, (end, name))
+            else:
+                pending.append(name)
+        # finish() may have appended newly ready tasks during the loop
+        ready = pending + [name for name in ready if name not in timeline and name not in pending]
+
+        if running:
+            now, name = heapq.heappop(running)
+            free += 1
+            finish(name)
+
+    makespan = max((end for _, end, _ in timeline.values()), default=0.0)
+    return timeline, makespan
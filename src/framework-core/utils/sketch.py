@@ -0,0 +1,106 @@
+"""
+Mergeable latency sketches.
+
+LatencySketch is a log-bucketed histogram (the DDSketch scheme): a
+duration v lands in bucket ceil(log(v) / log(gamma)), so every quantile
+it reports is within RELATIVE_ACCURACY of the true value whatever the
+distribution. Sketches merge by adding bucket counts, which is how the
+per-day sketches kept in the log index are combined into a week.
+
+A sketch of a few thousand durations from 0.01 ms to minutes stays
+within a few hundred buckets.
+"""
+
+import math
+from typing import Any, Dict, Optional
+
+# Reported quantiles are within this fraction of the true value
+RELATIVE_ACCURACY = 0.01
+
+# Durations at or below this (ms) share one bucket
+MIN_TRACKED_MS = 0.001
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+
+class LatencySketch:
+    """Quantile sketch of durations in milliseconds."""
+
+    __slots__ = ("buckets", "zero_count", "count", "sum_ms", "min_ms", "max_ms")
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+        self.sum_ms = 0.0
+        self.min_ms: Optional[float] = None
+        self.max_ms: Optional[float] = None
+
+    def add(self, value_ms: float, count: int = 1) -> None:
+        """Record a duration."""
+        if value_ms <= MIN_TRACKED_MS:
+            self.zero_count += count
+        else:
+            key = math.ceil(math.log(value_ms) / _LOG_GAMMA)
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.count += count
+        self.sum_ms += value_ms * count
+        self.min_ms = value_ms if self.min_ms is None else min(self.min_ms, value_ms)
+        self.max_ms = value_ms if self.max_ms is None else max(self.max_ms, value_ms)
+
+    def merge(self, other: "LatencySketch") -> None:
+        """Add another sketch's durations to this one."""
+        for key, count in other.buckets.items():
+            self.buckets[key] = self.buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.sum_ms += other.sum_ms
+        if other.min_ms is not None:
+            self.min_ms = other.min_ms if self.min_ms is None else min(self.min_ms, other.min_ms)
+        if other.max_ms is not None:
+            self.max_ms = other.max_ms if self.max_ms is None else max(self.max_ms, other.max_ms)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """
+        Estimate the q-quantile (0 <= q <= 1).
+
+        Returns:
+            Duration in ms, or None for an empty sketch
+        """
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return self.min_ms
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if rank < seen:
+                # Midpoint of the bucket (in the relative sense), clamped to what was seen
+                estimate = 2 * _GAMMA ** key / (_GAMMA + 1)
+                return min(max(estimate, self.min_ms), self.max_ms)
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Compact JSON form (bucket keys as strings)."""
+        return {
+            "b": {str(k): v for k, v in self.buckets.items()},
+            "z": self.zero_count,
+            "n": self.count,
+            "s": round(self.sum_ms, 3),
+            "min": self.min_ms,
+            "max": self.max_ms,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LatencySketch":
+        """Rebuild a sketch from to_dict() output."""
+        sketch = cls()
+        sketch.buckets = {int(k): v for k, v in data.get("b", {}).items()}
+        sketch.zero_count = data.get("z", 0)
+        sketch.count = data.get("n", 0)
+        sketch.sum_ms = data.get("s", 0.0)
+        sketch.min_ms = data.get("min")
+        sketch.max_ms = data.get("max")
+        return sketch
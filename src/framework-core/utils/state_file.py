@@ -0,0 +1,131 @@
+"""
+Atomic, lock-protected writes of small state files.
+
+Parallel tasks read .framework-config and .last_session while others
+rewrite them. A plain open(path, "w") truncates the file first, so a
+reader can see it empty or half written. atomic_write() writes a
+temporary file in the same directory, fsyncs it and renames it over
+the target: readers see the old or the new contents, never a mix, and
+never have to lock.
+
+Read-modify-write cycles (set a preset, bump the version) additionally
+take an advisory fcntl lock on a <file>.lock sidecar via locked(), so
+two writers cannot both read the old contents and lose one update.
+Where fcntl is unavailable (Windows) the lock only covers threads of
+the current process.
+
+Both the .lock sidecars and the short-lived .<file>.<pid>.<thread>.tmp
+files sit next to the state file; install.sh gitignores them under
+.claude/ and the completion commit never stages them (see
+tasks.git.FRAMEWORK_STATE_PATHS).
+"""
+
+import json
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+PathLike = Union[str, Path]
+
+# Process-local locks used when fcntl is unavailable
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
+
+def atomic_write(path: PathLike, data: Union[bytes, str], fsync: bool = True) -> None:
+    """
+    Replace a file's contents atomically.
+
+    The temporary file is created with the usual 0666 & ~umask mode, so
+    the result has the permissions a plain write would have given it.
+
+    Args:
+        path: File to write (its directory is created if needed)
+        data: New contents (str is encoded as UTF-8)
+        fsync: Flush the data (and the rename) to disk before returning
+
+    Raises:
+        OSError: If the file cannot be written; the target is untouched
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, target)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+    if fsync:
+        _fsync_directory(target.parent)
+
+
+def atomic_write_json(path: PathLike, value: Any, indent: Optional[int] = 2, fsync: bool = True) -> None:
+    """Write value as JSON with atomic_write()."""
+    atomic_write(path, json.dumps(value, indent=indent), fsync=fsync)
+
+
+def _fsync_directory(directory: Path) -> None:
+    """Persist a rename; not supported on every platform."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+@contextmanager
+def locked(path: PathLike) -> Iterator[None]:
+    """
+    Hold an exclusive advisory lock for a read-modify-write of path.
+
+    Only writers that use locked() exclude each other; plain reads and
+    atomic writes never wait. The lock is not reentrant.
+
+    Args:
+        path: State file the lock protects (the lock itself is taken on
+            path + ".lock")
+    """
+    lock_path = Path(f"{path}.lock")
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if fcntl is None:
+        key = os.path.abspath(lock_path)
+        with _thread_locks_guard:
+            lock = _thread_locks.setdefault(key, threading.Lock())
+        with lock:
+            yield
+        return
+
+    # flock locks belong to the open file, so threads of this process
+    # holding separate descriptors exclude each other as well
+    with open(lock_path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
@@ -0,0 +1,108 @@
+"""
+Task latency statistics for reports and monitoring.
+
+Turns the per-task stats of utils.logger.task_stats() into JSON-ready
+summaries (count, failure rate, p50/p90/p99) or into the Prometheus
+text exposition format for node_exporter's textfile collector.
+"""
+
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .log_index import TaskStats
+
+# Quantiles reported for every task
+QUANTILES = (0.5, 0.9, 0.99)
+
+# Prometheus metric name prefix
+METRIC_PREFIX = "framework_core_task"
+
+
+def _round(value: Any) -> Any:
+    return round(value, 3) if isinstance(value, float) else value
+
+
+def summarize_stats(stats: Dict[Tuple[str, str], TaskStats]) -> List[Dict[str, Any]]:
+    """
+    One summary per task, sorted by protocol and task.
+
+    Args:
+        stats: Output of utils.logger.task_stats
+
+    Returns:
+        Dicts with protocol, task, count, failures, error_rate, mean_ms,
+        max_ms and p50_ms/p90_ms/p99_ms
+    """
+    summaries = []
+    for (protocol, task), task_stats in sorted(stats.items()):
+        sketch = task_stats.sketch
+        summary = {
+            "protocol": protocol,
+            "task": task,
+            "count": task_stats.total,
+            "failures": task_stats.failures,
+            "error_rate": round(task_stats.failures / task_stats.total, 4) if task_stats.total else 0.0,
+        }
+        if sketch.count:
+            summary["mean_ms"] = _round(sketch.sum_ms / sketch.count)
+            summary["max_ms"] = _round(sketch.max_ms)
+            for q in QUANTILES:
+                summary[f"p{int(q * 100)}_ms"] = _round(sketch.quantile(q))
+        summaries.append(summary)
+    return summaries
+
+
+def _label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_prometheus(stats: Dict[Tuple[str, str], TaskStats]) -> str:
+    """
+    Render stats in the Prometheus text format.
+
+    Durations are exported in seconds as a summary metric, plus run and
+    failure counters per task.
+    """
+    duration = f"{METRIC_PREFIX}_duration_seconds"
+    lines = [
+        f"# HELP {duration} Task duration over the reporting window.",
+        f"# TYPE {duration} summary",
+    ]
+    runs = []
+    failures = []
+    for (protocol, task), task_stats in sorted(stats.items()):
+        labels = f'protocol="{_label_value(protocol)}",task="{_label_value(task)}"'
+        sketch = task_stats.sketch
+        for q in QUANTILES:
+            value = sketch.quantile(q)
+            if value is not None:
+                lines.append(f'{duration}{{{labels},quantile="{q}"}} {value / 1000:.6g}')
+        lines.append(f"{duration}_sum{{{labels}}} {sketch.sum_ms / 1000:.6g}")
+        lines.append(f"{duration}_count{{{labels}}} {sketch.count}")
+        runs.append(f"{METRIC_PREFIX}_runs{{{labels}}} {task_stats.total}")
+        failures.append(f"{METRIC_PREFIX}_failures{{{labels}}} {task_stats.failures}")
+
+    lines += [
+        f"# HELP {METRIC_PREFIX}_runs Task runs over the reporting window.",
+        f"# TYPE {METRIC_PREFIX}_runs gauge",
+    ] + runs + [
+        f"# HELP {METRIC_PREFIX}_failures Failed or timed-out task runs over the reporting window.",
+        f"# TYPE {METRIC_PREFIX}_failures gauge",
+    ] + failures
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path: str, text: str) -> None:
+    """
+    Write a textfile-collector file atomically.
+
+    node_exporter may read the directory at any time, so the text is
+    written to a temporary file and renamed into place.
+    """
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, target)
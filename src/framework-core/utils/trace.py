@@ -0,0 +1,135 @@
+"""
+Timeline tracing in Chrome trace-event format.
+
+A Tracer collects complete ("X") events with monotonic start/end times
+and the thread that ran them. Registering a TraceObserver (see
+utils.hooks) records one event per task; code inside a task can open
+nested spans:
+
+    with span("git status"):
+        ...
+
+Spans are free when no tracer is active (one context variable lookup).
+The resulting JSON loads in Perfetto (ui.perfetto.dev) or
+chrome://tracing.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+# Tracer of the run in progress
+_current_tracer: contextvars.ContextVar = contextvars.ContextVar("tracer", default=None)
+
+
+class Tracer:
+    """
+    Thread-safe collector of trace events.
+
+    Times are time.perf_counter() values; they are converted to
+    microseconds relative to the tracer's creation on export.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+
+    def add_span(
+        self,
+        name: str,
+        start: float,
+        end: float,
+        category: str = "span",
+        args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Record a finished span on the calling thread.
+
+        Args:
+            name: Span name shown on the timeline
+            start: time.perf_counter() at span start
+            end: time.perf_counter() at span end
+            category: Event category (e.g. "task", "git", "scan")
+            args: Extra details shown when the span is selected
+        """
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": round((start - self._origin) * 1e6, 3),
+            "dur": round((end - start) * 1e6, 3),
+            "pid": self._pid,
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Build the trace-event JSON document."""
+        with self._lock:
+            events = list(self._events)
+            threads = dict(self._threads)
+
+        metadata = [
+            {"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": "framework-core"}}
+        ]
+        for tid, thread_name in threads.items():
+            metadata.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": thread_name}})
+
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        """Write the trace as JSON to path."""
+        trace_path = Path(path)
+        trace_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(trace_path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+
+    @contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        """Make this the current tracer for the duration of a with block."""
+        reset = _current_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracer.reset(reset)
+
+
+def current_tracer() -> Optional[Tracer]:
+    """Get the active tracer, if any."""
+    return _current_tracer.get()
+
+
+@contextmanager
+def span(name: str, category: str = "span", **args: Any) -> Iterator[None]:
+    """
+    Record the enclosed block as a nested span when tracing is active.
+
+    Args:
+        name: Span name
+        category: Event category
+        **args: Extra details attached to the event
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        tracer.add_span(name, start, time.perf_counter(), category, args or None)
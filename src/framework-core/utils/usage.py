@@ -0,0 +1,130 @@
+"""
+Per-task resource usage accounting.
+
+When capture is enabled (--resources), the runner measures for each
+task body:
+- CPU time of the thread running it (time.thread_time)
+- growth of the process's peak RSS while it ran (getrusage high-water
+  mark, so only new peaks register)
+- subprocesses spawned through run_subprocess / the git helpers, with
+  their total latency and a per-command count
+- bytes read and written by the thread (rchar/wchar from
+  /proc/thread-self/io, Linux only)
+
+The result is stored as a dict on TaskResult.usage and appears in
+to_dict(). Metrics a platform cannot provide are left out. Worker
+threads started by the task (map_parallel, TaskGroup pull jobs) inherit
+its usage record for subprocess accounting, but their CPU time and I/O
+are not attributed to it.
+"""
+
+import contextvars
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Usage record of the task running in the current context
+_current_usage: contextvars.ContextVar = contextvars.ContextVar("task_usage", default=None)
+
+_enabled = False
+
+
+def enable_usage_capture(enabled: bool = True) -> None:
+    """Turn per-task usage capture on or off (process-wide)."""
+    global _enabled
+    _enabled = enabled
+
+
+def usage_capture_enabled() -> bool:
+    """Check whether per-task usage capture is on."""
+    return _enabled
+
+
+def _peak_rss_kb() -> Optional[int]:
+    """Process peak RSS in KiB, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _thread_io() -> Optional[Dict[str, int]]:
+    """rchar/wchar of the calling thread, if /proc provides them."""
+    try:
+        with open("/proc/thread-self/io", "r") as f:
+            counters = dict(line.split(":", 1) for line in f.read().splitlines() if ":" in line)
+        return {"rchar": int(counters["rchar"]), "wchar": int(counters["wchar"])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class UsageProbe:
+    """
+    Usage measurement of one task body; create with start_usage().
+
+    Subprocess counters are updated from any thread sharing the task's
+    context, so they are guarded by a lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.subprocess_count = 0
+        self.subprocess_ms = 0.0
+        self.commands: Dict[str, int] = {}
+        self._cpu_start = time.thread_time()
+        self._rss_start = _peak_rss_kb()
+        self._io_start = _thread_io()
+        self._reset = _current_usage.set(self)
+
+    def record_subprocess(self, cmd: List[str], duration_s: float) -> None:
+        """Count a finished subprocess."""
+        key = " ".join(cmd[:2]) if cmd and cmd[0] == "git" else (cmd[0] if cmd else "?")
+        with self._lock:
+            self.subprocess_count += 1
+            self.subprocess_ms += duration_s * 1000
+            self.commands[key] = self.commands.get(key, 0) + 1
+
+    def finish(self) -> Dict[str, Any]:
+        """Stop measuring (on the thread that started) and return the usage dict."""
+        _current_usage.reset(self._reset)
+
+        usage: Dict[str, Any] = {
+            "cpu_ms": round((time.thread_time() - self._cpu_start) * 1000, 3),
+        }
+
+        rss_end = _peak_rss_kb()
+        if self._rss_start is not None and rss_end is not None:
+            usage["peak_rss_kb"] = rss_end
+            usage["peak_rss_delta_kb"] = rss_end - self._rss_start
+
+        io_end = _thread_io()
+        if self._io_start is not None and io_end is not None:
+            usage["read_bytes"] = io_end["rchar"] - self._io_start["rchar"]
+            usage["written_bytes"] = io_end["wchar"] - self._io_start["wchar"]
+
+        with self._lock:
+            usage["subprocesses"] = self.subprocess_count
+            usage["subprocess_ms"] = round(self.subprocess_ms, 3)
+            if self.commands:
+                usage["subprocess_commands"] = dict(self.commands)
+
+        return usage
+
+
+def start_usage() -> Optional[UsageProbe]:
+    """Start measuring the calling task body, or return None when capture is off."""
+    return UsageProbe() if _enabled else None
+
+
+def record_subprocess(cmd: List[str], duration_s: float) -> None:
+    """Attribute a finished subprocess to the current task, if it is being measured."""
+    usage = _current_usage.get()
+    if usage is not None:
+        usage.record_subprocess(cmd, duration_s)